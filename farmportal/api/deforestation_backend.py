@@ -0,0 +1,157 @@
+"""
+Deforestation analysis backends.
+
+The Earth Engine backend is the production default. The local backend computes
+the same metrics from Hansen GFC tiles on disk (see `farmportal.api.local_raster`),
+so risk analysis can be tested and benchmarked on a machine with no network.
+
+Selected through site_config.json:
+
+    "deforestation": {
+        "backend": "local",                 # or "earth_engine" (default)
+        "raster_dir": "/srv/hansen_tiles",  # local backend only
+        "supersample": 3,                   # optional, 3 => ~10 m sampling like EE scale=10
+        "extract_polygons": true,           # optional EE stage filling Land Plot.deforested_polygons
+        "polygon_tolerance_m": 5            # simplification tolerance for those polygons
+    }
+
+Analyses run in one of three modes: "fast" (coarse estimate for interactive
+previews), "standard" (scale adapted to plot size) and "exact" (full 10 m
+resolution for compliance runs). Stats record the scale used as `analysis_scale_m`.
+"""
+
+import frappe
+
+BACKEND_EARTH_ENGINE = "earth_engine"
+BACKEND_LOCAL = "local"
+
+ANALYSIS_MODE_FAST = "fast"
+ANALYSIS_MODE_STANDARD = "standard"
+ANALYSIS_MODE_EXACT = "exact"
+ANALYSIS_MODES = (ANALYSIS_MODE_FAST, ANALYSIS_MODE_STANDARD, ANALYSIS_MODE_EXACT)
+HANSEN_PIXEL_M = 30
+
+_BACKENDS = {}
+
+
+def get_deforestation_config():
+    """Get deforestation backend configuration from site config"""
+    return frappe.conf.get("deforestation", {}) or {}
+
+
+def normalize_analysis_mode(mode):
+    mode = str(mode or "").strip().lower()
+    return mode if mode in ANALYSIS_MODES else ANALYSIS_MODE_STANDARD
+
+
+class DeforestationBackend:
+    """Interface shared by all backends. Stats use the app-wide stats dict shape."""
+
+    name = None
+
+    def analysis_scale(self, coordinates, area_ha=None, mode=None):
+        """Sampling resolution (m) this backend uses for a plot in the given mode."""
+        raise NotImplementedError
+
+    def calculate(self, coordinates, area_ha=None, ensure_init=True, mode=None):
+        """Return stats for one plot, or None when the geometry is unusable."""
+        raise NotImplementedError
+
+    def calculate_batch(self, candidates, ensure_init=True, mode=None):
+        """Analyze (idx, coordinates, area) tuples and return {idx: stats}."""
+        results = {}
+        for idx, coordinates, area in candidates:
+            try:
+                stats = self.calculate(coordinates, area_ha=area, ensure_init=ensure_init, mode=mode)
+            except Exception as e:
+                frappe.log_error(
+                    message=f"{self.name} deforestation calculation failed for item {idx}: {str(e)}",
+                    title="Deforestation Error",
+                )
+                continue
+            if stats:
+                results[idx] = stats
+        return results
+
+
+class EarthEngineBackend(DeforestationBackend):
+    name = BACKEND_EARTH_ENGINE
+
+    def analysis_scale(self, coordinates, area_ha=None, mode=None):
+        from farmportal.api.landplots import _reduction_params
+
+        return _reduction_params(coordinates, area_ha=area_ha, mode=mode)["scale"]
+
+    def calculate(self, coordinates, area_ha=None, ensure_init=True, mode=None):
+        from farmportal.api.landplots import _ee_calculate_deforestation
+
+        return _ee_calculate_deforestation(coordinates, area_ha=area_ha, ensure_init=ensure_init, mode=mode)
+
+    def calculate_batch(self, candidates, ensure_init=True, mode=None):
+        from farmportal.api.landplots import _ee_calculate_deforestation_batch
+
+        return _ee_calculate_deforestation_batch(candidates, ensure_init=ensure_init, mode=mode)
+
+
+class LocalRasterBackend(DeforestationBackend):
+    name = BACKEND_LOCAL
+
+    def __init__(self, raster_dir, supersample=None):
+        from farmportal.api.local_raster import LocalRasterEngine
+
+        self.engine = LocalRasterEngine(raster_dir, supersample=supersample)
+
+    def _supersample(self, mode):
+        # Fast previews read Hansen pixels as-is; other modes use the configured sub-sampling.
+        if normalize_analysis_mode(mode) == ANALYSIS_MODE_FAST:
+            return 1
+        return self.engine.supersample
+
+    def analysis_scale(self, coordinates, area_ha=None, mode=None):
+        return int(round(HANSEN_PIXEL_M / self._supersample(mode)))
+
+    def calculate(self, coordinates, area_ha=None, ensure_init=True, mode=None):
+        from farmportal.api.landplots import _stats_from_area_sums
+
+        sums = self.engine.calculate(coordinates, area_ha=area_ha, supersample=self._supersample(mode))
+        if sums is None:
+            return None
+
+        # Same band names as the Earth Engine reduction.
+        band_sums = {
+            "forest": sums["forest_m2"],
+            "loss": sums["loss_m2"],
+            "hansen_loss": sums["hansen_loss_m2"],
+            "sentinel_loss": sums["sentinel_loss_m2"],
+        }
+        for code, area_m2 in sums["hansen_loss_by_year_m2"].items():
+            band_sums[f"loss_{2000 + code}"] = area_m2
+        return _stats_from_area_sums(
+            band_sums,
+            scale=self.analysis_scale(coordinates, area_ha=area_ha, mode=mode),
+        )
+
+def get_deforestation_backend():
+    """Return the configured backend, built once per process and config."""
+    config = get_deforestation_config()
+    backend_name = str(config.get("backend") or BACKEND_EARTH_ENGINE).strip().lower()
+
+    if backend_name == BACKEND_LOCAL:
+        raster_dir = config.get("raster_dir")
+        if not raster_dir:
+            frappe.throw("deforestation.raster_dir must be set to use the local deforestation backend")
+        supersample = config.get("supersample")
+        key = (BACKEND_LOCAL, raster_dir, supersample)
+        if key not in _BACKENDS:
+            _BACKENDS[key] = LocalRasterBackend(raster_dir, supersample=supersample)
+        return _BACKENDS[key]
+
+    key = (BACKEND_EARTH_ENGINE, backend_name)
+    if key not in _BACKENDS:
+        if backend_name != BACKEND_EARTH_ENGINE:
+            frappe.log_error(
+                message=f"Unknown deforestation backend '{backend_name}', falling back to Earth Engine",
+                title="Deforestation Backend Config",
+            )
+        _BACKENDS[key] = EarthEngineBackend()
+    return _BACKENDS[key]
@@ -0,0 +1,185 @@
+"""
+Process-wide Earth Engine initialization.
+
+Credentials are passed to EE as in-memory key data; nothing is written to disk.
+Initialization is lazy: callers that need EE call `initialize()`, which is a
+no-op once the process is ready. Analysis jobs call `warm_up` first, which
+starts initialization in a background thread while they load their plots.
+A failed attempt is retried with exponential backoff (30 s up to 15 min), so a
+transient credential or network error does not disable EE for the process.
+
+Site config:
+
+    "earth_engine": {
+        "service_account": "svc@project.iam.gserviceaccount.com",
+        "project": "my-project",
+        "private_key": {...service account JSON key...}
+    }
+
+The legacy top-level `ee_service_account` / `ee_private_key` keys are still read.
+An optional `"ndvi_change_asset"` points analysis at a pre-exported image of
+2019-2020 minus 2024-2025 Sentinel-2 NDVI instead of building medians per call.
+"""
+
+import json
+import os
+import threading
+import time
+
+import frappe
+
+try:
+    import ee
+except ImportError:
+    ee = None
+
+INIT_RETRY_BASE_SEC = 30
+INIT_RETRY_MAX_SEC = 15 * 60
+
+_LOCK = threading.Lock()
+_STATE = {
+    "ready": False,
+    "warming": False,
+    "error": None,
+    "failures": 0,
+    "failed_at": None,
+    "initialized_at": None,
+    "pid": None,
+}
+
+
+def _reset_after_fork():
+    """Forked children must not reuse the parent's EE HTTP sessions or lock."""
+    global _LOCK
+    _LOCK = threading.Lock()
+    _STATE.update(
+        ready=False, warming=False, error=None, failures=0, failed_at=None, initialized_at=None, pid=None
+    )
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_credentials_config():
+    """Return (service_account, key_data, project) from site config."""
+    config = frappe.conf.get("earth_engine", {}) or {}
+    service_account = config.get("service_account") or frappe.conf.get("ee_service_account")
+    private_key = config.get("private_key") or frappe.conf.get("ee_private_key")
+    project = config.get("project")
+
+    if isinstance(private_key, dict):
+        project = project or private_key.get("project_id")
+        private_key = json.dumps(private_key)
+    return service_account, private_key, project
+
+
+def is_ready() -> bool:
+    return bool(_STATE["ready"]) and _STATE["pid"] == os.getpid()
+
+
+def _in_retry_backoff() -> bool:
+    """True while the last failed attempt is too recent to try again."""
+    if not _STATE["failures"] or _STATE["failed_at"] is None:
+        return False
+    delay = min(INIT_RETRY_BASE_SEC * 2 ** (_STATE["failures"] - 1), INIT_RETRY_MAX_SEC)
+    return time.monotonic() - _STATE["failed_at"] < delay
+
+
+def _initialize(service_account, key_data, project):
+    with _LOCK:
+        if is_ready():
+            return True
+        try:
+            credentials = ee.ServiceAccountCredentials(service_account, key_data=key_data)
+            ee.Initialize(credentials, project=project)
+        except Exception as e:
+            if "already been initialized" not in str(e):
+                _STATE.update(
+                    ready=False,
+                    warming=False,
+                    error=str(e),
+                    failures=_STATE["failures"] + 1,
+                    failed_at=time.monotonic(),
+                )
+                return False
+        _STATE.update(
+            ready=True,
+            warming=False,
+            error=None,
+            failures=0,
+            failed_at=None,
+            initialized_at=time.time(),
+            pid=os.getpid(),
+        )
+        return True
+
+
+def initialize() -> bool:
+    """Initialize Earth Engine for this process; returns readiness."""
+    if is_ready():
+        return True
+    if ee is None:
+        _STATE["error"] = "earthengine-api is not installed"
+        return False
+    if _in_retry_backoff():
+        # Already logged; fail fast until the backoff expires.
+        return False
+
+    service_account, key_data, project = get_credentials_config()
+    if not service_account or not key_data:
+        _STATE["error"] = "Earth Engine configuration not found in site_config.json"
+        frappe.logger().warning(_STATE["error"])
+        return False
+
+    if not _initialize(service_account, key_data, project):
+        frappe.log_error(
+            message=f"Earth Engine initialization failed: {_STATE['error']}",
+            title="Earth Engine Initialization",
+        )
+        return False
+    return True
+
+
+def warm_up():
+    """Start initialization in the background ahead of EE work (no-op when ready or backing off)."""
+    if ee is None or is_ready() or _STATE["warming"] or _in_retry_backoff():
+        return
+
+    try:
+        service_account, key_data, project = get_credentials_config()
+    except Exception:
+        return
+    if not service_account or not key_data:
+        return
+
+    with _LOCK:
+        if _STATE["warming"] or is_ready():
+            return
+        _STATE["warming"] = True
+
+    # Site config is read here; the thread only talks to EE and needs no Frappe context.
+    threading.Thread(
+        target=_initialize,
+        args=(service_account, key_data, project),
+        name="ee-init",
+        daemon=True,
+    ).start()
+
+
+def get_status():
+    return {
+        "ready": is_ready(),
+        "warming": bool(_STATE["warming"]),
+        "error": _STATE["error"],
+        "failures": _STATE["failures"],
+        "initialized_at": _STATE["initialized_at"],
+        "pid": os.getpid(),
+    }
+
+
+@frappe.whitelist()
+def get_earth_engine_status():
+    """Earth Engine readiness of the worker serving this request."""
+    frappe.only_for("System Manager")
+    return get_status()
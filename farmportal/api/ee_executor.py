@@ -0,0 +1,197 @@
+"""
+Shared executor for blocking Earth Engine requests (getInfo, getMapId).
+
+Calls run on a bounded thread pool behind a token-bucket rate limit. Throttling
+and transient server errors are retried with exponential backoff and full
+jitter, and every call is bounded by a timeout. A call still running at its
+timeout cannot be cancelled; its thread stays busy until EE answers, so the
+executor moves new calls to a fresh pool and lets the old one wind down. Only
+hand EE client calls to it: worker threads have no Frappe request context.
+
+Optional site config under "earth_engine" (limits apply per worker process):
+
+    "max_concurrency": 4,
+    "requests_per_second": 5,
+    "max_retries": 4,
+    "call_timeout": 120
+"""
+
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import frappe
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_CALL_TIMEOUT_SEC = 120
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+_TRANSIENT_PATTERN = re.compile(
+    r"\b(429|500|502|503|504)\b"
+    r"|too many requests|quota exceeded|rate limit|internal error|backend error"
+    r"|service unavailable|deadline exceeded|connection reset|temporarily unavailable",
+    re.IGNORECASE,
+)
+
+_EXECUTOR = None
+_EXECUTOR_PID = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+class EarthEngineTimeout(Exception):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = max(float(rate), 0.01)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_transient_ee_error(error) -> bool:
+    """True for throttling (429), 5xx and network errors worth retrying."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status is not None:
+        try:
+            return int(status) in TRANSIENT_STATUS_CODES
+        except (TypeError, ValueError):
+            pass
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return bool(_TRANSIENT_PATTERN.search(str(error)))
+
+
+class EarthEngineExecutor:
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_CONCURRENCY,
+        requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+        max_retries=DEFAULT_MAX_RETRIES,
+        call_timeout=DEFAULT_CALL_TIMEOUT_SEC,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.call_timeout = float(call_timeout)
+        self._bucket = TokenBucket(requests_per_second, capacity=self.max_workers)
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool()
+        # Pool each pending future runs on, to retire the right pool when one hangs.
+        self._future_pools = weakref.WeakKeyDictionary()
+
+        # Bound each HTTP request at the client level; the future timeout below is a backstop.
+        try:
+            import ee
+
+            ee.data.setDeadline(int(self.call_timeout * 1000))
+        except Exception:
+            pass
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ee-call")
+
+    def _retire_pool(self, future):
+        """Route later calls to a fresh pool; the hung one exits once its calls return."""
+        with self._pool_lock:
+            pool = self._future_pools.get(future)
+            if pool is not self._pool:
+                return
+            self._pool = self._new_pool()
+        pool.shutdown(wait=False)
+        frappe.logger().warning("Earth Engine call hung past its timeout; replaced the executor pool")
+
+    def _backstop_timeout(self):
+        return self.call_timeout * (self.max_retries + 1) + BACKOFF_MAX_SEC * self.max_retries
+
+    def _call_with_retry(self, fn, args, kwargs):
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_ee_error(e):
+                    raise
+                time.sleep(random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** attempt))))
+                attempt += 1
+
+    def submit(self, fn, *args, **kwargs):
+        with self._pool_lock:
+            future = self._pool.submit(self._call_with_retry, fn, args, kwargs)
+            self._future_pools[future] = self._pool
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self._backstop_timeout())
+        except FutureTimeoutError:
+            # cancel() only drops calls still queued; a running one keeps its thread.
+            if not future.cancel():
+                self._retire_pool(future)
+            raise EarthEngineTimeout("Earth Engine request timed out")
+
+    def run(self, fn, *args, **kwargs):
+        """Run one EE call through the pool and wait for its result."""
+        return self._result(self.submit(fn, *args, **kwargs))
+
+    def map(self, fn, items, return_exceptions=False):
+        """Run fn(item) concurrently; results keep input order."""
+        futures = [self.submit(fn, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(self._result(future))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+
+def get_ee_executor() -> EarthEngineExecutor:
+    """Per-process executor, rebuilt after fork so pools are never shared across workers."""
+    global _EXECUTOR, _EXECUTOR_PID
+    pid = os.getpid()
+    if _EXECUTOR is not None and _EXECUTOR_PID == pid:
+        return _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_PID != pid:
+            config = frappe.conf.get("earth_engine", {}) or {}
+            _EXECUTOR = EarthEngineExecutor(
+                max_workers=config.get("max_concurrency") or DEFAULT_MAX_CONCURRENCY,
+                requests_per_second=config.get("requests_per_second") or DEFAULT_REQUESTS_PER_SECOND,
+                max_retries=config.get("max_retries", DEFAULT_MAX_RETRIES),
+                call_timeout=config.get("call_timeout") or DEFAULT_CALL_TIMEOUT_SEC,
+            )
+            _EXECUTOR_PID = pid
+    return _EXECUTOR
+
+
+def run_ee(fn, *args, **kwargs):
+    """Shortcut for get_ee_executor().run(...)."""
+    return get_ee_executor().run(fn, *args, **kwargs)
@@ -0,0 +1,565 @@
+import base64
+import hashlib
+import json
+import math
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+# 7 decimal places is ~1 cm at the equator; finer input digits are GPS noise.
+COORDINATE_PRECISION = 7
+EARTH_RADIUS_M = 6371008.8
+# Declared plot areas within 20% of the polygon's geodesic area are accepted.
+AREA_MISMATCH_TOLERANCE = 0.2
+# Compact storage: "g1:" + base64(zlib(int64 deltas of fixed-point lng/lat)).
+GEOMETRY_ENCODING_PREFIX = "g1:"
+FIXED_POINT_SCALE = 10 ** COORDINATE_PRECISION
+DECODE_CACHE_SIZE = 4096
+
+# List/map payloads ship Douglas-Peucker simplifications; "full" is for a single opened plot.
+DETAIL_FULL = "full"
+DETAIL_HIGH = "high"
+DETAIL_MEDIUM = "medium"
+DETAIL_LOW = "low"
+DETAIL_TOLERANCES_M = {DETAIL_LOW: 20.0, DETAIL_MEDIUM: 5.0, DETAIL_HIGH: 1.0}
+# Web-map zoom -> level; ground resolution is ~19 m/px at z13 and ~5 m/px at z15.
+ZOOM_DETAIL_STEPS = ((13, DETAIL_LOW), (15, DETAIL_MEDIUM))
+DEFAULT_LIST_DETAIL = DETAIL_MEDIUM
+# Row fields read by plot_coordinates that list endpoints must not return.
+GEOMETRY_INTERNAL_FIELDS = ("geometry_hash", "geometry_blob", "geometry_simplified")
+BBOX_FIELDS = ("bbox_min_lng", "bbox_min_lat", "bbox_max_lng", "bbox_max_lat")
+# Distance (m) under which points count as on a polygon edge; stored coordinates are ~1 cm.
+OVERLAP_EPSILON_M = 0.005
+# Tallest plot bbox accepted (~55 km); viewport queries rely on it to bound their index range.
+MAX_PLOT_LAT_SPAN_DEG = 0.5
+
+_DECODE_CACHE = OrderedDict()
+_DECODE_LOCK = threading.Lock()
+
+
+def normalize_ring(coordinates, precision=COORDINATE_PRECISION):
+    """
+    Normalize [[lng, lat], ...] input into a rounded ring without consecutive
+    duplicates. Polygons (3+ distinct points) are returned closed.
+    """
+    points = []
+    for point in coordinates or []:
+        try:
+            lng = round(float(point[0]), precision)
+            lat = round(float(point[1]), precision)
+        except (TypeError, ValueError, IndexError):
+            continue
+        if points and points[-1] == [lng, lat]:
+            continue
+        points.append([lng, lat])
+
+    if len(points) > 2 and points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+
+def ring_signed_area(ring):
+    """Shoelace signed area in coordinate units; positive for counter-clockwise rings."""
+    total = 0.0
+    for i in range(len(ring) - 1):
+        x1, y1 = ring[i]
+        x2, y2 = ring[i + 1]
+        total += x1 * y2 - x2 * y1
+    return total / 2.0
+
+
+def ring_area_m2(ring):
+    """Spherical area of a closed lng/lat ring in square metres (unsigned)."""
+    if len(ring) < 4:
+        return 0.0
+    total = 0.0
+    for i in range(len(ring) - 1):
+        lng1, lat1 = ring[i]
+        lng2, lat2 = ring[i + 1]
+        total += math.radians(lng2 - lng1) * (
+            2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2))
+        )
+    return abs(total) * EARTH_RADIUS_M ** 2 / 2.0
+
+
+def plot_area_ha(coordinates):
+    """Geodesic area of a plot polygon in hectares; None for points and lines."""
+    ring = normalize_ring(coordinates)
+    if len(ring) < 4:
+        return None
+    return ring_area_m2(ring) / 10000.0
+
+
+def is_area_mismatch(declared_ha, computed_ha, tolerance=AREA_MISMATCH_TOLERANCE):
+    """True when the declared area is off from the polygon's area by more than `tolerance` (relative)."""
+    try:
+        declared_ha = float(declared_ha or 0)
+    except (TypeError, ValueError):
+        declared_ha = 0.0
+    if not computed_ha or declared_ha <= 0:
+        return False
+    return abs(declared_ha - computed_ha) > tolerance * computed_ha
+
+
+def _canonical_ring(ring):
+    """Rotate/orient a closed ring so the same polygon always serializes identically."""
+    if len(ring) < 4:
+        return ring
+
+    open_ring = ring[:-1]
+    if ring_signed_area(ring) < 0:
+        open_ring = open_ring[::-1]
+    start = open_ring.index(min(open_ring))
+    rotated = open_ring[start:] + open_ring[:start]
+    return rotated + [rotated[0]]
+
+
+def geometry_hash(coordinates, **extra):
+    """
+    Content hash of a plot geometry. Identical polygons hash equally regardless
+    of start vertex, winding or float noise; `extra` values are folded into the key.
+    """
+    payload = {"ring": _canonical_ring(normalize_ring(coordinates))}
+    payload.update(extra)
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def normalize_plot_coordinates(coordinates):
+    """
+    Storage form of plot coordinates: rounded, consecutive duplicates dropped and
+    polygon rings closed and counter-clockwise (RFC 7946). Single points stay as-is.
+    """
+    ring = normalize_ring(coordinates)
+    if len(ring) >= 4 and ring_signed_area(ring) < 0:
+        ring = ring[::-1]
+    return ring
+
+
+def encode_coordinates(coordinates):
+    """Compact text encoding of [[lng, lat], ...] (lossless at COORDINATE_PRECISION)."""
+    values = []
+    prev_x = prev_y = 0
+    for lng, lat in coordinates:
+        x = int(round(float(lng) * FIXED_POINT_SCALE))
+        y = int(round(float(lat) * FIXED_POINT_SCALE))
+        values.append(x - prev_x)
+        values.append(y - prev_y)
+        prev_x, prev_y = x, y
+    packed = struct.pack(f"<{len(values)}q", *values)
+    return GEOMETRY_ENCODING_PREFIX + base64.b64encode(zlib.compress(packed, 6)).decode("ascii")
+
+
+def decode_coordinates(encoded):
+    if not encoded or not encoded.startswith(GEOMETRY_ENCODING_PREFIX):
+        raise ValueError("Unsupported geometry encoding")
+    packed = zlib.decompress(base64.b64decode(encoded[len(GEOMETRY_ENCODING_PREFIX):]))
+    values = struct.unpack(f"<{len(packed) // 8}q", packed)
+
+    coordinates = []
+    x = y = 0
+    for i in range(0, len(values) - 1, 2):
+        x += values[i]
+        y += values[i + 1]
+        coordinates.append([x / FIXED_POINT_SCALE, y / FIXED_POINT_SCALE])
+    return coordinates
+
+
+def _local_xy(ring, origin_lat=None):
+    """Equirectangular projection to metres at `origin_lat` (default: the first vertex)."""
+    lat0 = math.radians(ring[0][1] if origin_lat is None else origin_lat)
+    kx = math.radians(1) * EARTH_RADIUS_M * math.cos(lat0)
+    ky = math.radians(1) * EARTH_RADIUS_M
+    return [(lng * kx, lat * ky) for lng, lat in ring]
+
+
+def _segment_distance(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def _douglas_peucker_keep(xy, first, last, tolerance, keep):
+    stack = [(first, last)]
+    while stack:
+        start, end = stack.pop()
+        worst, worst_distance = None, tolerance
+        for i in range(start + 1, end):
+            distance = _segment_distance(xy[i], xy[start], xy[end])
+            if distance > worst_distance:
+                worst, worst_distance = i, distance
+        if worst is not None:
+            keep[worst] = True
+            stack.append((start, worst))
+            stack.append((worst, end))
+
+
+def simplify_ring(ring, tolerance_m):
+    """
+    Douglas-Peucker simplification of a closed lng/lat ring with a tolerance in
+    metres. Returns the ring unchanged when it would collapse below a triangle.
+    """
+    if len(ring) <= 4 or not tolerance_m:
+        return ring
+
+    xy = _local_xy(ring)
+    # Anchor on the vertex farthest from the start so both halves are open chains.
+    far = max(range(1, len(ring) - 1), key=lambda i: math.hypot(xy[i][0] - xy[0][0], xy[i][1] - xy[0][1]))
+    keep = [False] * len(ring)
+    keep[0] = keep[far] = keep[-1] = True
+    _douglas_peucker_keep(xy, 0, far, tolerance_m, keep)
+    _douglas_peucker_keep(xy, far, len(ring) - 1, tolerance_m, keep)
+
+    simplified = [point for point, kept in zip(ring, keep) if kept]
+    return simplified if len(simplified) >= 4 else ring
+
+
+def resolve_detail(detail=None, zoom=None, default=DEFAULT_LIST_DETAIL):
+    """
+    Detail level for list/map payloads from an explicit `detail` or a web-map `zoom`.
+    "full" is deliberately not accepted; full geometry is served per plot only.
+    """
+    detail = str(detail or "").strip().lower()
+    if detail in DETAIL_TOLERANCES_M:
+        return detail
+    try:
+        zoom = float(zoom)
+    except (TypeError, ValueError):
+        return default
+    for max_zoom, level in ZOOM_DETAIL_STEPS:
+        if zoom <= max_zoom:
+            return level
+    return DETAIL_HIGH
+
+
+def simplified_geometry_levels(coordinates):
+    """
+    Encoded simplification per detail level. Levels that would not drop any
+    vertex are omitted; readers fall back to the full geometry for them.
+    """
+    levels = {}
+    for level, tolerance_m in DETAIL_TOLERANCES_M.items():
+        simplified = simplify_ring(coordinates, tolerance_m)
+        if len(simplified) < len(coordinates):
+            levels[level] = encode_coordinates(simplified)
+    return levels
+
+
+def coordinates_bbox(coordinates):
+    """(min_lng, min_lat, max_lng, max_lat) of [[lng, lat], ...]."""
+    lngs = [point[0] for point in coordinates]
+    lats = [point[1] for point in coordinates]
+    return min(lngs), min(lats), max(lngs), max(lats)
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+class _EdgeGrid:
+    """Uniform grid over a polygon's edges so edge tests only visit nearby edges."""
+
+    def __init__(self, edges):
+        self.edges = edges
+        xs = [x for edge in edges for x, _y in edge]
+        ys = [y for edge in edges for _x, y in edge]
+        self.min_x, self.min_y = min(xs), min(ys)
+        n = max(1, int(math.sqrt(len(edges))))
+        self.cell_w = (max(xs) - self.min_x) / n or 1.0
+        self.cell_h = (max(ys) - self.min_y) / n or 1.0
+        self.cells = {}
+        self.rows = {}
+        for index, ((x1, y1), (x2, y2)) in enumerate(edges):
+            c0, r0 = self._cell(min(x1, x2), min(y1, y2))
+            c1, r1 = self._cell(max(x1, x2), max(y1, y2))
+            for row in range(r0, r1 + 1):
+                self.rows.setdefault(row, []).append(index)
+                for col in range(c0, c1 + 1):
+                    self.cells.setdefault((col, row), []).append(index)
+
+    def _cell(self, x, y):
+        return int((x - self.min_x) // self.cell_w), int((y - self.min_y) // self.cell_h)
+
+    def near(self, x0, y0, x1, y1):
+        c0, r0 = self._cell(min(x0, x1) - OVERLAP_EPSILON_M, min(y0, y1) - OVERLAP_EPSILON_M)
+        c1, r1 = self._cell(max(x0, x1) + OVERLAP_EPSILON_M, max(y0, y1) + OVERLAP_EPSILON_M)
+        found = set()
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                found.update(self.cells.get((col, row), ()))
+        return [self.edges[index] for index in sorted(found)]
+
+    def row(self, y):
+        return [self.edges[index] for index in self.rows.get(self._cell(self.min_x, y)[1], ())]
+
+
+def _edge_split_params(p1, p2, grid):
+    """Parameters along p1->p2 where it meets the grid's edges (crossings and collinear ends)."""
+    rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+    r_len2 = rx * rx + ry * ry
+    params = [0.0, 1.0]
+    if r_len2 == 0:
+        return params
+    r_len = math.sqrt(r_len2)
+
+    for q1, q2 in grid.near(p1[0], p1[1], p2[0], p2[1]):
+        sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+        qpx, qpy = q1[0] - p1[0], q1[1] - p1[1]
+        denom = _cross(rx, ry, sx, sy)
+        if abs(denom) > 1e-12 * r_len * math.hypot(sx, sy):
+            t = _cross(qpx, qpy, sx, sy) / denom
+            u = _cross(qpx, qpy, rx, ry) / denom
+            if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+                params.append(t)
+        elif abs(_cross(qpx, qpy, rx, ry)) / r_len <= OVERLAP_EPSILON_M:
+            # Collinear edges: split at the other edge's endpoints.
+            for qx, qy in (q1, q2):
+                t = ((qx - p1[0]) * rx + (qy - p1[1]) * ry) / r_len2
+                if 0.0 < t < 1.0:
+                    params.append(t)
+    return sorted(set(params))
+
+
+def _locate(point, grid):
+    """
+    Position of a point relative to a polygon's edge grid: (1, None) inside,
+    (0, None) outside, or (None, edge) when it lies on that boundary edge.
+    """
+    x, y = point
+    for edge in grid.near(x, y, x, y):
+        if _segment_distance(point, edge[0], edge[1]) <= OVERLAP_EPSILON_M:
+            return None, edge
+    inside = False
+    for (x1, y1), (x2, y2) in grid.row(y):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return int(inside), None
+
+
+def _clipped_boundary_sum(edges, other_grid, keep_shared):
+    """
+    Shoelace terms of the parts of `edges` inside the other polygon. Boundary
+    shared with the other polygon is counted only when `keep_shared` and both
+    run the same way (same side interiors), so it is counted exactly once.
+    """
+    total = 0.0
+    for p1, p2 in edges:
+        params = _edge_split_params(p1, p2, other_grid)
+        dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+        for t0, t1 in zip(params, params[1:]):
+            a = (p1[0] + dx * t0, p1[1] + dy * t0)
+            b = (p1[0] + dx * t1, p1[1] + dy * t1)
+            if math.hypot(b[0] - a[0], b[1] - a[1]) <= OVERLAP_EPSILON_M:
+                continue
+            inside, on_edge = _locate(((a[0] + b[0]) / 2.0, (a[1] + b[1]) / 2.0), other_grid)
+            if on_edge is not None:
+                ex, ey = on_edge[1][0] - on_edge[0][0], on_edge[1][1] - on_edge[0][1]
+                if not (keep_shared and dx * ex + dy * ey > 0):
+                    continue
+            elif not inside:
+                continue
+            total += _cross(a[0], a[1], b[0], b[1])
+    return total
+
+
+def _ring_edges(xy):
+    if ring_signed_area(xy) < 0:
+        xy = xy[::-1]
+    return list(zip(xy, xy[1:]))
+
+
+def polygon_intersection_area_m2(ring_a, ring_b):
+    """
+    Exact intersection area (m2) of two simple polygons given as closed lng/lat rings,
+    via Green's theorem over the boundary parts of each ring inside the other.
+    Handles non-convex rings and shared edges; both rings are projected to local metres.
+    """
+    ring_a, ring_b = normalize_ring(ring_a), normalize_ring(ring_b)
+    if len(ring_a) < 4 or len(ring_b) < 4:
+        return 0.0
+    bbox_a, bbox_b = coordinates_bbox(ring_a), coordinates_bbox(ring_b)
+    if bbox_a[0] > bbox_b[2] or bbox_b[0] > bbox_a[2] or bbox_a[1] > bbox_b[3] or bbox_b[1] > bbox_a[3]:
+        return 0.0
+
+    origin_lat = (ring_a[0][1] + ring_b[0][1]) / 2.0
+    edges_a = _ring_edges(_local_xy(ring_a, origin_lat))
+    edges_b = _ring_edges(_local_xy(ring_b, origin_lat))
+    total = _clipped_boundary_sum(edges_a, _EdgeGrid(edges_b), keep_shared=True)
+    total += _clipped_boundary_sum(edges_b, _EdgeGrid(edges_a), keep_shared=False)
+    return max(total / 2.0, 0.0)
+
+
+def plot_geometry_fields(coordinates):
+    """
+    Land Plot column values for a geometry: normalized `coordinates` JSON plus the
+    compact `geometry_blob`, content `geometry_hash`, the precomputed
+    `geometry_simplified` levels, the bbox_* columns and `computed_area_ha`.
+    Empty input clears them.
+    """
+    if isinstance(coordinates, str):
+        try:
+            coordinates = json.loads(coordinates)
+        except Exception:
+            coordinates = None
+
+    normalized = normalize_plot_coordinates(coordinates) if isinstance(coordinates, list) else []
+    if not normalized:
+        return {
+            "coordinates": None,
+            "geometry_blob": None,
+            "geometry_hash": None,
+            "geometry_simplified": None,
+            "computed_area_ha": 0,
+            **dict.fromkeys(BBOX_FIELDS, 0),
+        }
+    return {
+        **dict(zip(BBOX_FIELDS, coordinates_bbox(normalized))),
+        "coordinates": json.dumps(normalized),
+        "geometry_blob": encode_coordinates(normalized),
+        "geometry_hash": geometry_hash(normalized),
+        "geometry_simplified": json.dumps(simplified_geometry_levels(normalized), separators=(",", ":")),
+        "computed_area_ha": plot_area_ha(normalized) or 0,
+    }
+
+
+def exceeds_max_plot_span(fields):
+    """True when plot_geometry_fields output spans more latitude than MAX_PLOT_LAT_SPAN_DEG."""
+    return (fields.get("bbox_max_lat") or 0) - (fields.get("bbox_min_lat") or 0) > MAX_PLOT_LAT_SPAN_DEG
+
+
+def _cached(key):
+    with _DECODE_LOCK:
+        cached = _DECODE_CACHE.get(key)
+        if cached is not None:
+            _DECODE_CACHE.move_to_end(key)
+        return cached
+
+
+def _remember(key, coordinates):
+    with _DECODE_LOCK:
+        _DECODE_CACHE[key] = coordinates
+        _DECODE_CACHE.move_to_end(key)
+        while len(_DECODE_CACHE) > DECODE_CACHE_SIZE:
+            _DECODE_CACHE.popitem(last=False)
+
+
+def _full_coordinates(row):
+    encoded = row.get("geometry_blob")
+    if encoded:
+        try:
+            return decode_coordinates(encoded)
+        except Exception:
+            pass
+    raw = row.get("coordinates")
+    if isinstance(raw, list):
+        return raw
+    if raw:
+        try:
+            return json.loads(raw)
+        except Exception:
+            return None
+    return None
+
+
+def _simplified_coordinates(row, detail):
+    levels = row.get("geometry_simplified")
+    if isinstance(levels, str):
+        try:
+            levels = json.loads(levels)
+        except Exception:
+            levels = None
+
+    if isinstance(levels, dict):
+        if levels.get(detail):
+            try:
+                return decode_coordinates(levels[detail])
+            except Exception:
+                pass
+        else:
+            return _full_coordinates(row)
+
+    # Not precomputed yet (row predates the backfill): simplify on the fly.
+    coordinates = _full_coordinates(row)
+    if not isinstance(coordinates, list):
+        return None
+    return simplify_ring(coordinates, DETAIL_TOLERANCES_M[detail])
+
+
+def plot_coordinates(row, detail=DETAIL_FULL, remember=True):
+    """
+    Decoded coordinates of a Land Plot row (dict with geometry_hash, geometry_blob,
+    geometry_simplified and/or coordinates) at the given detail level, memoized per
+    process by geometry hash. Prefers the compact encodings and falls back to the
+    JSON column for rows not yet backfilled.
+    The returned list is shared between callers and must not be mutated.
+    One-pass bulk reads (exports) pass remember=False so they don't evict the hot set.
+    """
+    if detail not in DETAIL_TOLERANCES_M:
+        detail = DETAIL_FULL
+
+    key = row.get("geometry_hash")
+    if key:
+        key = key if detail == DETAIL_FULL else f"{key}:{detail}"
+        cached = _cached(key)
+        if cached is not None:
+            return cached
+
+    if detail == DETAIL_FULL:
+        coordinates = _full_coordinates(row)
+    else:
+        coordinates = _simplified_coordinates(row, detail)
+    if not isinstance(coordinates, list):
+        return None
+
+    if key and remember:
+        _remember(key, coordinates)
+    return coordinates
+
+
+def plot_geometry_columns(detail, alias="lp"):
+    """
+    SELECT expressions reading only the geometry `detail` needs: the encoded level
+    itself, with the full geometry (blob, else JSON) filled in only on rows where
+    that level is missing. Feed the rows to plot_coordinates/apply_plot_detail.
+    """
+    p = f"{alias}." if alias else ""
+    blob_missing = f"COALESCE({p}geometry_blob, '') = ''"
+    if detail not in DETAIL_TOLERANCES_M:
+        return [
+            f"{p}geometry_hash",
+            f"{p}geometry_blob",
+            f"IF({blob_missing}, {p}coordinates, NULL) AS coordinates",
+        ]
+
+    level = f"JSON_UNQUOTE(JSON_EXTRACT({p}geometry_simplified, '$.{detail}'))"
+    level_missing = f"COALESCE({level}, '') = ''"
+    return [
+        f"{p}geometry_hash",
+        # Rows not backfilled yet keep NULL so readers simplify them on the fly.
+        f"IF({p}geometry_simplified IS NULL, NULL, JSON_OBJECT('{detail}', {level})) AS geometry_simplified",
+        f"IF({level_missing}, {p}geometry_blob, NULL) AS geometry_blob",
+        f"IF({level_missing} AND {blob_missing}, {p}coordinates, NULL) AS coordinates",
+    ]
+
+
+def _has_geometry(row):
+    return any(row.get(field) for field in ("coordinates", "geometry_blob", "geometry_simplified"))
+
+
+def apply_plot_detail(plots, detail, as_json=False):
+    """
+    Replace `coordinates` on list rows with the geometry at `detail` and drop the
+    internal geometry columns. `as_json` keeps the column's JSON string form.
+    """
+    for plot in plots:
+        coordinates = plot_coordinates(plot, detail) if _has_geometry(plot) else None
+        if as_json:
+            plot["coordinates"] = json.dumps(coordinates) if coordinates is not None else None
+        else:
+            plot["coordinates"] = coordinates
+        for field in GEOMETRY_INTERNAL_FIELDS:
+            plot.pop(field, None)
+    return plots
@@ -311,21 +311,107 @@
 
 # Earth Engine Configuration from site config
 
+import base64
 import frappe
 import json
 import os
+import threading
 import ee
 import uuid
-import tempfile
 from datetime import datetime
 from frappe import _
 from farmportal.api.organization_profile import (
     _require_supplier_permission,
     SUPPLIER_PERMISSION_PLOT_MANAGER,
 )
+from farmportal.api.deforestation_backend import (
+    ANALYSIS_MODE_EXACT,
+    ANALYSIS_MODE_FAST,
+    BACKEND_EARTH_ENGINE,
+    get_deforestation_backend,
+    get_deforestation_config,
+    normalize_analysis_mode,
+)
+from farmportal.api.geometry import (
+    DETAIL_FULL,
+    MAX_PLOT_LAT_SPAN_DEG,
+    apply_plot_detail,
+    geometry_hash,
+    normalize_ring,
+    plot_coordinates,
+    plot_geometry_columns,
+    resolve_detail,
+    ring_area_m2,
+)
+from farmportal.api import earth_engine, shared_cache
+from farmportal.api.ee_executor import get_ee_executor, run_ee
+from farmportal.api.requests import (
+    _collect_customer_shared_plot_names,
+    _plot_loss_evidence,
+)
 
 DEFAULT_SINGLE_POINT_RADIUS_M = 100.0
-_EE_READY = False
+DEFAULT_ANALYSIS_SCALE_M = 10
+# Hansen lossyear codes after the 2020 baseline (21 => 2021), reduced as one band per year.
+HANSEN_LOSS_YEAR_CODES = (21, 22, 23, 24)
+LOSS_YEAR_BANDS = tuple(f"loss_{2000 + code}" for code in HANSEN_LOSS_YEAR_CODES)
+# Bands of the single-pass area reduction; "loss" is the combined (union) loss.
+AREA_BANDS = ("forest", "hansen_loss", "sentinel_loss", "loss") + LOSS_YEAR_BANDS
+SENTINEL_BASELINE_DATES = ("2019-01-01", "2020-12-31")
+SENTINEL_RECENT_DATES = ("2024-01-01", "2026-01-01")
+SENTINEL_RECENT_WINDOW = "2024-2025"
+# Standard mode coarsens estates so their reductions stay within EE time limits.
+ADAPTIVE_SCALE_STEPS_HA = ((1000, 10), (5000, 20))
+ADAPTIVE_MAX_SCALE_M = 30
+# tileScale by pixel count at the chosen scale; dense outlines need tiling too.
+TILE_SCALE_STEPS_PIXELS = ((1e5, 1), (1e6, 2), (1e7, 4), (5e7, 8))
+MAX_TILE_SCALE = 16
+TILE_SCALE_DENSE_VERTICES = 2000
+# Upper bounds for one reduceRegions request; vertices dominate the serialized payload.
+DEFORESTATION_BATCH_MAX_PLOTS = 250
+DEFORESTATION_BATCH_MAX_VERTICES = 50000
+DEFORESTATION_CACHE_DOCTYPE = "Deforestation Analysis Cache"
+# Version of stored deforestation stats (cache rows and Land Plot analysis_key). Bump it when
+# the stats change shape; customers' analyzed state (requests.RISK_ANALYSIS_CACHE_VERSION) is kept.
+DEFORESTATION_STATS_VERSION = "hansen_sentinel_area_v3"
+DEFORESTATION_CACHE_STATS_KEY = "deforestation_cache_stats"
+# EE map IDs expire after a few hours; keep cached tile URLs just under that
+# and renew them in the background once they are half way through their life.
+EE_MAP_ID_LIFETIME_SEC = 4 * 60 * 60
+TILE_CACHE_TTL_SEC = EE_MAP_ID_LIFETIME_SEC - 15 * 60
+TILE_CACHE_REFRESH_AFTER_SEC = EE_MAP_ID_LIFETIME_SEC // 2
+GLOBAL_TILES_CACHE_KEY = "deforestation_global_tiles"
+PLOT_TILE_LAYERS_CACHE_KEY = "deforestation_plot_tile_layers"
+# Optional loss-polygon stage: simplification tolerance, stored precision (~10 cm), plots per job.
+DEFAULT_POLYGON_TOLERANCE_M = 5.0
+DEFORESTED_POLYGON_PRECISION = 6
+POLYGON_EXTRACTION_JOB_SIZE = 100
+PLOT_ANALYSIS_JOB_SIZE = 200
+HANSEN_GFC_ASSET = "UMD/hansen/global_forest_change_2024_v1_12"
+SENTINEL2_COLLECTION = "COPERNICUS/S2_SR_HARMONIZED"
+# Hansen GFC native grid (0.00025 deg); screening buffers past a pixel diagonal (~40 m).
+HANSEN_CRS_TRANSFORM = [0.00025, 0, -180, 0, -0.00025, 80]
+HANSEN_SCREENING_BUFFER_M = 45
+# Viewport queries bound bbox_min_lat to [south - span, north] so the index range stays
+# narrow; Land Plot validation rejects taller geometry.
+BBOX_QUERY_MAX_SPAN_DEG = MAX_PLOT_LAT_SPAN_DEG
+BBOX_QUERY_DEFAULT_LIMIT = 1000
+BBOX_QUERY_MAX_LIMIT = 5000
+LAND_PLOT_LIST_FIELDS = (
+    "name", "plot_id", "farmer_name", "state_province", "country", "area",
+    "computed_area_ha", "area_mismatch", "yield_dried_mt", "coordinates", "geojson",
+    "latitude", "longitude", "commodities", "products", "deforestation_percentage",
+    "deforested_area", "deforested_polygons",
+)
+LAND_PLOT_LIST_MAX_LIMIT = 5000
+# Same risk rule as the risk dashboard: mitigated plots count as low risk.
+PLOT_RISK_CONDITIONS = {
+    "high": "COALESCE(lp.custom_risk_mitigated, 0) = 0 AND lp.deforestation_percentage > 0",
+    "low": "(lp.custom_risk_mitigated = 1 OR COALESCE(lp.deforestation_percentage, 0) <= 0)",
+    "mitigated": "lp.custom_risk_mitigated = 1",
+}
+_GLOBAL_LAYERS = None
+_GLOBAL_LAYERS_LOCK = threading.Lock()
 
 
 def get_ee_config():
@@ -333,62 +419,14 @@ def get_ee_config():
     return frappe.conf.get("earth_engine", {})
 
 def init_earth_engine():
-    """Initialize Earth Engine with service account credentials from site config"""
-    global _EE_READY
-    if _EE_READY:
-        return
+    """Initialize Earth Engine for this process (shared with risk_dashboard)"""
+    return earth_engine.initialize()
 
-    print("[DEBUG] Initializing Earth Engine...")  # [DEBUG]
-    try:
-        ee_config = get_ee_config()
-        
-        if not ee_config:
-            error_msg = "Earth Engine configuration not found in site_config.json"
-            safe_log_error(error_msg)
-            print(f"[DEBUG] {error_msg}")  # [DEBUG]
-            return
-        
-        service_account = ee_config.get("service_account")
-        project = ee_config.get("project")
-        private_key_json = ee_config.get("private_key")
-        
-        if not all([service_account, project, private_key_json]):
-            error_msg = "Incomplete Earth Engine configuration in site_config.json"
-            safe_log_error(error_msg)
-            print(f"[DEBUG] {error_msg}")  # [DEBUG]
-            return
-
-        # Fast path: EE already initialized in this process.
-        if ee.data._credentials:
-            _EE_READY = True
-            return
-        
-        # Create temporary file for credentials (EE requires file path)
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
-            json.dump(private_key_json, temp_file)
-            temp_key_path = temp_file.name
-        
-        try:
-            credentials = ee.ServiceAccountCredentials(service_account, temp_key_path)
-            try:
-                ee.Initialize(credentials, project=project)
-                print("[DEBUG] Earth Engine initialized successfully.")  # [DEBUG]
-                _EE_READY = True
-            except Exception as e:
-                if "already been initialized" in str(e):
-                    print("[DEBUG] Earth Engine already initialized.")  # [DEBUG]
-                    _EE_READY = True
-                else:
-                    raise
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_key_path):
-                os.unlink(temp_key_path)
-                
-    except Exception as e:
-        _EE_READY = False
-        safe_log_error(f"Earth Engine initialization failed: {str(e)}")
-        print(f"[DEBUG] Earth Engine initialization failed: {e}")  # [DEBUG]
+
+def warm_up_earth_engine():
+    """Start EE initialization in the background when the configured backend runs on EE."""
+    if get_deforestation_backend().name == BACKEND_EARTH_ENGINE:
+        earth_engine.warm_up()
 
 def safe_log_error(message, title=None, method="API"):
     print(f"[DEBUG] Logging error: {message} (title={title}, method={method})")  # [DEBUG]
@@ -478,12 +516,56 @@ def _build_analysis_geometry(coordinates, area_ha=None):
         return None
     return ee.Geometry.Polygon([coords])
 
-def _build_deforestation_inputs(geometry):
+def _analysis_area_ha(coordinates, area_ha=None):
+    """Area the analysis geometry will cover: the point buffer or the polygon itself."""
+    if len(coordinates) == 1:
+        area_value = _to_positive_float(area_ha)
+        if area_value:
+            return area_value
+        return 3.141592653589793 * DEFAULT_SINGLE_POINT_RADIUS_M ** 2 / 10000.0
+    try:
+        return ring_area_m2(normalize_ring(coordinates)) / 10000.0
+    except Exception:
+        return _to_positive_float(area_ha) or 0.0
+
+def _reduction_params(coordinates, area_ha=None, mode=None, scale=None):
     """
-    Build Hansen + Sentinel-2 masks for combined deforestation analysis.
-    Combined loss is computed as UNION(Hansen loss, Sentinel NDVI-loss).
+    Pick reduction scale and tileScale for a plot.
+
+    "exact" always reduces at 10 m, "fast" at the Hansen 30 m grid, and "standard"
+    coarsens only large estates. A given `scale` (e.g. that of a stored analysis)
+    overrides the mode. tileScale grows with the pixel count and for dense
+    outlines. bestEffort is never used, so the returned scale is the one applied.
     """
-    gfc = ee.Image("UMD/hansen/global_forest_change_2024_v1_12")
+    mode = normalize_analysis_mode(mode)
+    area = _analysis_area_ha(coordinates, area_ha)
+
+    if scale:
+        scale = int(scale)
+    elif mode == ANALYSIS_MODE_EXACT:
+        scale = DEFAULT_ANALYSIS_SCALE_M
+    elif mode == ANALYSIS_MODE_FAST:
+        scale = ADAPTIVE_MAX_SCALE_M
+    else:
+        scale = ADAPTIVE_MAX_SCALE_M
+        for max_area_ha, step_scale in ADAPTIVE_SCALE_STEPS_HA:
+            if area <= max_area_ha:
+                scale = step_scale
+                break
+
+    pixels = area * 10000.0 / (scale * scale)
+    tile_scale = MAX_TILE_SCALE
+    for max_pixels, step_tile_scale in TILE_SCALE_STEPS_PIXELS:
+        if pixels <= max_pixels:
+            tile_scale = step_tile_scale
+            break
+    if len(coordinates) > TILE_SCALE_DENSE_VERTICES:
+        tile_scale = max(tile_scale, 4)
+
+    return {"scale": scale, "tileScale": tile_scale}
+
+def _build_global_layers():
+    gfc = ee.Image(HANSEN_GFC_ASSET)
     tree_cover_2000 = gfc.select("treecover2000")
     loss_year = gfc.select("lossyear")
 
@@ -493,21 +575,74 @@ def _build_deforestation_inputs(geometry):
     # Hansen loss after 2020 baseline.
     hansen_loss_mask = loss_year.gt(20).And(forest_mask).rename("hansen_loss")
 
-    sentinel_loss_mask = None
-    try:
+    layers = {
+        "tree_cover_2000": tree_cover_2000,
+        "loss_year": loss_year,
+        "forest_mask": forest_mask,
+        "hansen_loss_mask": hansen_loss_mask,
+        "ndvi_change": None,
+        "s2_baseline": None,
+        "s2_recent": None,
+    }
+
+    ndvi_change_asset = _ndvi_change_asset()
+    if ndvi_change_asset:
+        layers["ndvi_change"] = ee.Image(ndvi_change_asset).select(0)
+    else:
         s2 = (
-            ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-            .filterBounds(geometry)
+            ee.ImageCollection(SENTINEL2_COLLECTION)
             .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
         )
+        layers["s2_baseline"] = s2.filterDate(*SENTINEL_BASELINE_DATES)
+        layers["s2_recent"] = s2.filterDate(*SENTINEL_RECENT_DATES)
+    return layers
 
-        s2_2020 = s2.filterDate("2019-01-01", "2020-12-31").median()
-        s2_recent = s2.filterDate("2024-01-01", "2026-01-01").median()
+def _ndvi_change_asset():
+    """Optional pre-exported image of baseline NDVI minus recent NDVI."""
+    return (get_ee_config() or {}).get("ndvi_change_asset") or None
 
-        ndvi_2020 = s2_2020.normalizedDifference(["B8", "B4"])
-        ndvi_recent = s2_recent.normalizedDifference(["B8", "B4"])
-        ndvi_change = ndvi_2020.subtract(ndvi_recent)
+def _get_global_layers():
+    """
+    Hansen and Sentinel-2 layers, built once per process and shared by every
+    analysis and tile request so only geometry-specific filtering is added per call.
+    """
+    global _GLOBAL_LAYERS
+    ndvi_change_asset = _ndvi_change_asset()
+    cached = _GLOBAL_LAYERS
+    if cached is None or cached[0] != ndvi_change_asset:
+        with _GLOBAL_LAYERS_LOCK:
+            if _GLOBAL_LAYERS is None or _GLOBAL_LAYERS[0] != ndvi_change_asset:
+                _GLOBAL_LAYERS = (ndvi_change_asset, _build_global_layers())
+            cached = _GLOBAL_LAYERS
+    return cached[1]
+
+def _ndvi_change_image(layers, geometry=None):
+    """Baseline minus recent NDVI, from the exported asset or the shared S2 collections."""
+    if layers["ndvi_change"] is not None:
+        return layers["ndvi_change"]
+
+    baseline = layers["s2_baseline"]
+    recent = layers["s2_recent"]
+    if geometry is not None:
+        baseline = baseline.filterBounds(geometry)
+        recent = recent.filterBounds(geometry)
+
+    ndvi_2020 = baseline.median().normalizedDifference(["B8", "B4"])
+    ndvi_recent = recent.median().normalizedDifference(["B8", "B4"])
+    return ndvi_2020.subtract(ndvi_recent)
 
+def _build_deforestation_inputs(geometry):
+    """
+    Build Hansen + Sentinel-2 masks for combined deforestation analysis.
+    Combined loss is computed as UNION(Hansen loss, Sentinel NDVI-loss).
+    """
+    layers = _get_global_layers()
+    forest_mask = layers["forest_mask"]
+    hansen_loss_mask = layers["hansen_loss_mask"]
+
+    sentinel_loss_mask = None
+    try:
+        ndvi_change = _ndvi_change_image(layers, geometry)
         sentinel_loss_mask = ndvi_change.gt(0.25).And(forest_mask).rename("sentinel_loss")
     except Exception as sentinel_error:
         # Do not fail overall analysis if Sentinel processing fails.
@@ -522,216 +657,995 @@ def _build_deforestation_inputs(geometry):
     combined_loss_mask = hansen_loss_mask.Or(sentinel_loss_mask).rename("combined_loss")
 
     return {
-        "tree_cover_2000": tree_cover_2000,
-        "loss_year": loss_year,
+        "tree_cover_2000": layers["tree_cover_2000"],
+        "loss_year": layers["loss_year"],
         "forest_mask": forest_mask,
         "hansen_loss_mask": hansen_loss_mask,
         "sentinel_loss_mask": sentinel_loss_mask,
         "combined_loss_mask": combined_loss_mask,
     }
 
-def _calculate_deforestation_stats(geometry, forest_mask, combined_loss_mask):
-    """Calculate area and percentage metrics from forest/loss masks."""
+def _area_bands_image(masks):
+    """Stack forest and per-source loss masks as pixel-area bands, one per AREA_BANDS name."""
     pixel_area = ee.Image.pixelArea()
-    forest_area_img = forest_mask.rename("forest").multiply(pixel_area)
-    loss_area_img = combined_loss_mask.rename("loss").multiply(pixel_area)
-
-    reduce_kwargs = {
-        "reducer": ee.Reducer.sum(),
-        "geometry": geometry,
-        "scale": 10,
-        "maxPixels": 1e10,
-        "bestEffort": True,
-        "tileScale": 4,
-    }
-
-    forest_area_dict = forest_area_img.reduceRegion(**reduce_kwargs)
-    loss_area_dict = loss_area_img.reduceRegion(**reduce_kwargs)
-
-    forest_area = ee.Number(
-        ee.Algorithms.If(forest_area_dict.get("forest"), forest_area_dict.get("forest"), 0)
+    forest_mask = masks["forest_mask"]
+    year_masks = [
+        masks["loss_year"].eq(code).And(forest_mask) for code in HANSEN_LOSS_YEAR_CODES
+    ]
+    return ee.Image.cat([
+        forest_mask.rename("forest"),
+        masks["hansen_loss_mask"].rename("hansen_loss"),
+        masks["sentinel_loss_mask"].rename("sentinel_loss"),
+        masks["combined_loss_mask"].rename("loss"),
+    ] + year_masks).multiply(pixel_area).rename(list(AREA_BANDS))
+
+def _loss_by_year(sums):
+    """Loss histogram (ha): Hansen loss per year plus the Sentinel-2 window, zero entries omitted."""
+    hansen = {}
+    for code, band in zip(HANSEN_LOSS_YEAR_CODES, LOSS_YEAR_BANDS):
+        area_ha = round(float(sums.get(band) or 0) / 10000.0, 2)
+        if area_ha:
+            hansen[str(2000 + code)] = area_ha
+
+    sentinel = {}
+    sentinel_ha = round(float(sums.get("sentinel_loss") or 0) / 10000.0, 2)
+    if sentinel_ha:
+        sentinel[SENTINEL_RECENT_WINDOW] = sentinel_ha
+    return {"hansen": hansen, "sentinel": sentinel}
+
+def _stats_from_area_sums(sums, scale=None):
+    """Stats dict from {band: m2} sums; missing or null bands count as zero."""
+    sums = sums or {}
+    stats = _format_deforestation_stats(
+        sums.get("forest"),
+        sums.get("loss"),
+        scale=scale,
+        hansen_loss_m2=sums.get("hansen_loss"),
+        sentinel_loss_m2=sums.get("sentinel_loss"),
     )
-    loss_area = ee.Number(
-        ee.Algorithms.If(loss_area_dict.get("loss"), loss_area_dict.get("loss"), 0)
+    stats["loss_by_year"] = _loss_by_year(sums)
+    return stats
+
+def _calculate_deforestation_stats(geometry, masks, scale=DEFAULT_ANALYSIS_SCALE_M, tile_scale=4):
+    """Area and percentage metrics, with the per-source loss breakdown, from one multi-band reduction."""
+    sums = run_ee(_area_bands_image(masks).reduceRegion(
+        reducer=ee.Reducer.sum(),
+        geometry=geometry,
+        scale=scale,
+        maxPixels=1e10,
+        tileScale=tile_scale,
+    ).getInfo)
+    return _stats_from_area_sums(sums, scale=scale)
+
+def _deforestation_cache_key(coordinates, area_ha=None, backend_name=None, scale=None):
+    """
+    Content key for a plot analysis; area only matters for single-point buffers.
+    Results at the default 10 m scale share a key whatever mode produced them.
+    """
+    buffer_area = None
+    if len(coordinates) == 1:
+        area_value = _to_positive_float(area_ha)
+        buffer_area = round(area_value, 4) if area_value else None
+    extra = {}
+    ndvi_change_asset = _ndvi_change_asset() if backend_name == BACKEND_EARTH_ENGINE else None
+    if ndvi_change_asset:
+        # Exported composites can differ slightly from on-the-fly medians.
+        extra["ndvi_change_asset"] = ndvi_change_asset
+    if scale and int(scale) != DEFAULT_ANALYSIS_SCALE_M:
+        extra["scale_m"] = int(scale)
+    return geometry_hash(
+        coordinates,
+        buffer_area_ha=buffer_area,
+        version=DEFORESTATION_STATS_VERSION,
+        backend=backend_name,
+        **extra,
     )
 
-    forest_area_ha = forest_area.divide(10000)
-    loss_area_ha = loss_area.divide(10000)
-    loss_percent = ee.Algorithms.If(
-        forest_area_ha.gt(0),
-        loss_area_ha.divide(forest_area_ha).multiply(100),
-        0
-    )
+def _get_cached_deforestation_stats(cache_keys):
+    """Return {cache_key: stats} for keys already analyzed with the current version."""
+    keys = sorted({key for key in cache_keys or [] if key})
+    if not keys:
+        return {}
 
-    stats = ee.Dictionary({
-        "forest_area_ha": forest_area_ha,
-        "loss_area_ha": loss_area_ha,
-        "deforestation_percent": loss_percent
-    }).getInfo()
+    try:
+        rows = frappe.get_all(
+            DEFORESTATION_CACHE_DOCTYPE,
+            filters={"name": ["in", keys], "analysis_version": DEFORESTATION_STATS_VERSION},
+            fields=["name", "result_json"],
+            limit_page_length=len(keys),
+        )
+    except Exception as e:
+        safe_log_error(f"Deforestation cache lookup failed: {str(e)}", "Deforestation Cache Error")
+        return {}
 
+    cached = {}
+    for row in rows:
+        try:
+            stats = json.loads(row.get("result_json") or "")
+        except Exception:
+            continue
+        if isinstance(stats, dict):
+            cached[row.get("name")] = stats
+    return cached
+
+def _store_deforestation_stats(cache_key, stats):
+    if not cache_key or not stats:
+        return
+    try:
+        frappe.get_doc({
+            "doctype": DEFORESTATION_CACHE_DOCTYPE,
+            "cache_key": cache_key,
+            "analysis_version": DEFORESTATION_STATS_VERSION,
+            "forest_area_ha": stats.get("forest_area_ha", 0),
+            "loss_area_ha": stats.get("loss_area_ha", 0),
+            "deforestation_percent": stats.get("deforestation_percent", 0),
+            "result_json": json.dumps(stats),
+        }).insert(ignore_permissions=True, ignore_if_duplicate=True)
+    except Exception as e:
+        safe_log_error(f"Deforestation cache write failed: {str(e)}", "Deforestation Cache Error")
+
+def _record_deforestation_cache_usage(hits=0, misses=0):
+    """Accumulate hit/miss counters in Redis so they are shared across workers."""
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(DEFORESTATION_CACHE_STATS_KEY)
+        if hits:
+            cache.hincrby(key, "hits", hits)
+        if misses:
+            cache.hincrby(key, "misses", misses)
+    except Exception:
+        pass
+
+@frappe.whitelist()
+def get_deforestation_cache_stats():
+    """Hit/miss counters of the deforestation result cache."""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    raw = cache.hgetall(cache.make_key(DEFORESTATION_CACHE_STATS_KEY)) or {}
+    counters = {
+        (k.decode() if isinstance(k, bytes) else str(k)): int(v or 0)
+        for k, v in raw.items()
+    }
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+    lookups = hits + misses
     return {
-        "forest_area_ha": round(stats["forest_area_ha"], 2),
-        "loss_area_ha": round(stats["loss_area_ha"], 2),
-        "deforestation_percent": round(stats["deforestation_percent"], 2)
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0,
+        "entries": frappe.db.count(DEFORESTATION_CACHE_DOCTYPE),
+        "analysis_version": DEFORESTATION_STATS_VERSION,
     }
 
-def calculate_deforestation_data(coordinates, area_ha=None, ensure_init=True):
-    """Calculate deforestation data for given coordinates"""
+def _ee_calculate_deforestation(coordinates, area_ha=None, ensure_init=True, mode=None):
+    """Single-plot analysis on Earth Engine (used by the earth_engine backend)."""
+    if ensure_init:
+        init_earth_engine()
+
+    geometry = _build_analysis_geometry(coordinates, area_ha=area_ha)
+    if not geometry:
+        return None
+
+    params = _reduction_params(coordinates, area_ha=area_ha, mode=mode)
+    masks = _build_deforestation_inputs(geometry)
+    return _calculate_deforestation_stats(
+        geometry,
+        masks,
+        scale=params["scale"],
+        tile_scale=params["tileScale"],
+    )
+
+def calculate_deforestation_data(coordinates, area_ha=None, ensure_init=True, use_cache=True, mode=None):
+    """
+    Calculate deforestation data for given coordinates.
+    `mode` is "fast" (interactive estimate), "standard" (default) or "exact".
+    """
     try:
-        if ensure_init:
-            init_earth_engine()
-        
-        geometry = _build_analysis_geometry(coordinates, area_ha=area_ha)
-        if not geometry:
+        if not coordinates:
             return None
 
-        masks = _build_deforestation_inputs(geometry)
-        return _calculate_deforestation_stats(
-            geometry,
-            masks["forest_mask"],
-            masks["combined_loss_mask"],
-        )
+        backend = get_deforestation_backend()
+        cache_key = None
+        if use_cache:
+            scale = backend.analysis_scale(coordinates, area_ha=area_ha, mode=mode)
+            cache_key = _deforestation_cache_key(coordinates, area_ha, backend.name, scale=scale)
+        if cache_key:
+            cached = _get_cached_deforestation_stats([cache_key]).get(cache_key)
+            _record_deforestation_cache_usage(hits=1 if cached else 0, misses=0 if cached else 1)
+            if cached:
+                return cached
+
+        stats = backend.calculate(coordinates, area_ha=area_ha, ensure_init=ensure_init, mode=mode)
+        _store_deforestation_stats(cache_key, stats)
+        return stats
 
     except Exception as e:
         safe_log_error(f"Deforestation calculation failed: {str(e)}", "Deforestation Error")
         return None
 
-        
-@frappe.whitelist()
-def get_deforestation_tiles(coordinates_json, area_ha=None):
-    """Generate Earth Engine tile URLs for deforestation visualization"""
-    try:
+def _deforestation_plot_fields(stats, coordinates=None, area_ha=None):
+    """Land Plot field values for a finished analysis, tagged with the geometry/version key."""
+    fields = {
+        "deforestation_percentage": stats.get("deforestation_percent", 0),
+        "deforested_area": stats.get("loss_area_ha", 0),
+        "forest_area": stats.get("forest_area_ha", 0),
+        "analysis_scale": stats.get("analysis_scale_m") or DEFAULT_ANALYSIS_SCALE_M,
+        "hansen_loss_area": stats.get("hansen_loss_ha"),
+        "sentinel_loss_area": stats.get("sentinel_loss_ha"),
+        "loss_by_year": _encode_loss_by_year(stats.get("loss_by_year")),
+    }
+    coordinates = _coerce_coordinates(coordinates)
+    if coordinates:
+        fields["analysis_key"] = _deforestation_cache_key(
+            coordinates,
+            area_ha,
+            get_deforestation_backend().name,
+            scale=stats.get("analysis_scale_m"),
+        )
+    return fields
+
+def _encode_loss_by_year(loss_by_year):
+    """Compact JSON for the Land Plot loss_by_year field (None when not computed)."""
+    if not isinstance(loss_by_year, dict):
+        return None
+    return json.dumps(loss_by_year, separators=(",", ":"), sort_keys=True)
+
+def _coerce_coordinates(value):
+    """Return a coordinate list from a JSON string or list, or None when unusable."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except Exception:
+            return None
+    if not isinstance(value, list) or not value:
+        return None
+    return value
+
+def _format_deforestation_stats(forest_area_m2, loss_area_m2, scale=None, hansen_loss_m2=0, sentinel_loss_m2=0):
+    """
+    Convert summed pixel areas (m2) into the stats shape used across the app.
+    `loss_area_ha` is the combined (union) loss; the per-source areas overlap where
+    both Hansen and Sentinel-2 flag the same pixels.
+    """
+    forest_area_ha = float(forest_area_m2 or 0) / 10000.0
+    loss_area_ha = float(loss_area_m2 or 0) / 10000.0
+    loss_percent = (loss_area_ha / forest_area_ha) * 100 if forest_area_ha > 0 else 0
+    stats = {
+        "forest_area_ha": round(forest_area_ha, 2),
+        "loss_area_ha": round(loss_area_ha, 2),
+        "deforestation_percent": round(loss_percent, 2),
+        "hansen_loss_ha": round(float(hansen_loss_m2 or 0) / 10000.0, 2),
+        "sentinel_loss_ha": round(float(sentinel_loss_m2 or 0) / 10000.0, 2),
+    }
+    if scale:
+        stats["analysis_scale_m"] = int(scale)
+    return stats
+
+def _chunk_batch_items(items, max_plots=None, max_vertices=None):
+    """Split batch items so each reduceRegions request stays within the payload budget."""
+    max_plots = max_plots or DEFORESTATION_BATCH_MAX_PLOTS
+    max_vertices = max_vertices or DEFORESTATION_BATCH_MAX_VERTICES
+
+    chunk = []
+    vertices = 0
+    for item in items:
+        count = item["vertices"]
+        if chunk and (len(chunk) >= max_plots or vertices + count > max_vertices):
+            yield chunk
+            chunk = []
+            vertices = 0
+        chunk.append(item)
+        vertices += count
+    if chunk:
+        yield chunk
+
+def _build_deforestation_chunk_request(chunk):
+    """
+    Build one reduceRegions request yielding [idx, *AREA_BANDS m2] rows for a chunk.
+    Chunks are grouped so all their items share the same reduction params.
+    """
+    params = chunk[0]["reduction"]
+    collection = ee.FeatureCollection([
+        ee.Feature(item["geometry"], {"idx": item["idx"]}) for item in chunk
+    ])
+    masks = _build_deforestation_inputs(collection.geometry())
+
+    reduced = _area_bands_image(masks).reduceRegions(
+        collection=collection,
+        reducer=ee.Reducer.sum(),
+        scale=params["scale"],
+        tileScale=params["tileScale"],
+    )
+
+    def _strip(feature):
+        properties = {"idx": feature.get("idx")}
+        for band in AREA_BANDS:
+            value = feature.get(band)
+            properties[band] = ee.Algorithms.If(value, value, 0)
+        return ee.Feature(None, properties)
+
+    # Drop geometries before download; only the per-plot sums are needed.
+    columns = ["idx"] + list(AREA_BANDS)
+    return (
+        reduced.map(_strip)
+        .reduceColumns(ee.Reducer.toList(len(columns)), columns)
+        .get("list")
+    )
+
+def _fetch_ee_object(ee_object):
+    return ee_object.getInfo()
+
+def _get_map_id(layer):
+    image, vis_params = layer
+    return image.getMapId(vis_params)
+
+def _fetch_chunk_requests(chunks, build_request):
+    """Build one EE request per chunk and fetch them concurrently; failures come back as exceptions."""
+    outcomes = [None] * len(chunks)
+    requests = []
+    for position, chunk in enumerate(chunks):
+        try:
+            requests.append((position, build_request(chunk)))
+        except Exception as e:
+            outcomes[position] = e
+
+    fetched = get_ee_executor().map(_fetch_ee_object, [request for _, request in requests], return_exceptions=True)
+    for (position, _), outcome in zip(requests, fetched):
+        outcomes[position] = outcome
+    return outcomes
+
+def _reduce_deforestation_chunks(chunks):
+    """
+    Reduce chunks concurrently through the EE executor. A failed chunk is halved
+    and retried so one oversized or bad geometry cannot sink the batch; single
+    plots that still fail fall back to the per-plot calculation.
+    """
+    results = {}
+    pending = [chunk for chunk in chunks if chunk]
+    singles = []
+
+    while pending:
+        outcomes = _fetch_chunk_requests(pending, _build_deforestation_chunk_request)
+
+        retry = []
+        for chunk, outcome in zip(pending, outcomes):
+            if not isinstance(outcome, Exception):
+                scale = chunk[0]["reduction"]["scale"]
+                for row in outcome or []:
+                    results[int(row[0])] = _stats_from_area_sums(dict(zip(AREA_BANDS, row[1:])), scale=scale)
+                continue
+            if len(chunk) > 1:
+                middle = len(chunk) // 2
+                retry.extend([chunk[:middle], chunk[middle:]])
+                continue
+            safe_log_error(
+                f"Batch deforestation reduction failed for item {chunk[0]['idx']}, retrying single: {str(outcome)}",
+                "Deforestation Batch Warning"
+            )
+            singles.append(chunk[0])
+        pending = retry
+
+    for item in singles:
+        try:
+            stats = _ee_calculate_deforestation(
+                item["coordinates"], area_ha=item["area"], ensure_init=False, mode=item["mode"]
+            )
+        except Exception as single_error:
+            safe_log_error(f"Deforestation calculation failed: {str(single_error)}", "Deforestation Error")
+            stats = None
+        if stats:
+            results[item["idx"]] = stats
+
+    return results
+
+def _build_forest_screening_request(chunk):
+    """Hansen-only request yielding [idx, max forest flag] rows on the native 30 m grid."""
+    forest_mask = _get_global_layers()["forest_mask"]
+    collection = ee.FeatureCollection([
+        ee.Feature(item["geometry"].buffer(HANSEN_SCREENING_BUFFER_M, 1), {"idx": item["idx"]})
+        for item in chunk
+    ])
+    reduced = forest_mask.reduceRegions(
+        collection=collection,
+        reducer=ee.Reducer.max().setOutputs(["forest"]),
+        crs="EPSG:4326",
+        crsTransform=HANSEN_CRS_TRANSFORM,
+        tileScale=4,
+    )
+
+    def _strip(feature):
+        forest = feature.get("forest")
+        # Unknown results are kept (-1) so they go through the full analysis.
+        return ee.Feature(None, {
+            "idx": feature.get("idx"),
+            "forest": ee.Algorithms.If(ee.Algorithms.IsEqual(forest, None), -1, forest),
+        })
+
+    return (
+        reduced.map(_strip)
+        .reduceColumns(ee.Reducer.toList(2), ["idx", "forest"])
+        .get("list")
+    )
+
+def _screen_forest_items(items):
+    """
+    Stage one of the batch analysis: split items into those touching any Hansen
+    forest pixel and those that provably have none.
+
+    Each geometry is buffered past a Hansen pixel diagonal, so every source pixel
+    the 10 m analysis could sample is inspected. A plot with no such pixel has zero
+    forest and therefore zero combined loss (both loss signals are masked by forest).
+    """
+    chunks = list(_chunk_batch_items(items))
+    outcomes = _fetch_chunk_requests(chunks, _build_forest_screening_request)
+
+    forested, forest_free = [], []
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            # Screening is only an optimisation; analyse the whole chunk instead.
+            forested.extend(chunk)
+            continue
+        without_forest = {int(idx) for idx, forest in outcome or [] if forest == 0}
+        for item in chunk:
+            (forest_free if item["idx"] in without_forest else forested).append(item)
+    return forested, forest_free
+
+def _chunk_items_by_reduction(items):
+    """Chunk items per (scale, tileScale) group; one reduceRegions call has a single scale."""
+    groups = {}
+    for item in items:
+        params = item["reduction"]
+        groups.setdefault((params["scale"], params["tileScale"]), []).append(item)
+    chunks = []
+    for group in groups.values():
+        chunks.extend(_chunk_batch_items(group))
+    return chunks
+
+def _ee_calculate_deforestation_batch(candidates, ensure_init=True, screen=None, mode=None):
+    """
+    Batch analysis on Earth Engine (used by the earth_engine backend).
+    `candidates` are (idx, coordinates, area) tuples; returns {idx: stats}.
+
+    With screening (default, `earth_engine.hansen_screening` in site config), a
+    cheap Hansen-only pass runs first and the Sentinel-2 union pass only runs for
+    plots with forest; results are identical either way.
+    """
+    if ensure_init:
         init_earth_engine()
-        
-        coordinates = json.loads(coordinates_json)
-        geometry = _build_analysis_geometry(coordinates, area_ha=area_ha)
-        if not geometry:
-            frappe.throw(_("Invalid coordinates for deforestation analysis"))
 
-        masks = _build_deforestation_inputs(geometry)
-        tree_cover_2000 = masks["tree_cover_2000"]
-        loss_year = masks["loss_year"]
-        forest_mask = masks["forest_mask"]
-        hansen_loss_mask = masks["hansen_loss_mask"]
-
-        # Create visualization parameters
-        # Tree cover visualization (green shades)
-        tree_cover_vis = {
-            "min": 30, 
-            "max": 100, 
-            "palette": ["#d9f0a3", "#addd8e", "#78c679", "#41ab5d", "#238443", "#006837", "#004529"]
-        }
-        
-        # Deforestation visualization (red)
-        deforestation_vis = {
-            "min": 1, 
-            "max": 1, 
-            "palette": ["red"]
-        }
-        
-        # Loss year visualization (color by year)
-        loss_year_vis = {
-            "min": 21, 
-            "max": 24, 
-            "palette": ["yellow", "orange", "red", "darkred"]
-        }
+    items = []
+    for idx, coordinates, area in candidates:
+        try:
+            geometry = _build_analysis_geometry(coordinates, area_ha=area)
+        except Exception as e:
+            safe_log_error(f"Invalid geometry for batch item {idx}: {str(e)}", "Deforestation Error")
+            continue
+        if geometry is None:
+            continue
+        items.append({
+            "idx": idx,
+            "geometry": geometry,
+            "coordinates": coordinates,
+            "area": area,
+            "vertices": len(coordinates),
+            "mode": mode,
+            "reduction": _reduction_params(coordinates, area_ha=area, mode=mode),
+        })
 
-        # Generate tile URLs
-        tree_cover_tile_info = tree_cover_2000.updateMask(forest_mask).getMapId(tree_cover_vis)
-        # Keep this as Hansen layer for visual continuity; stats below use combined logic.
-        deforestation_tile_info = hansen_loss_mask.selfMask().getMapId(deforestation_vis)
-        loss_year_tile_info = loss_year.updateMask(loss_year.gt(20)).getMapId(loss_year_vis)
+    if screen is None:
+        screen = (get_ee_config() or {}).get("hansen_screening", True)
 
-        stats = _calculate_deforestation_stats(
-            geometry,
-            masks["forest_mask"],
-            masks["combined_loss_mask"],
-        )
+    results = {}
+    if screen and items:
+        items, forest_free = _screen_forest_items(items)
+        for item in forest_free:
+            results[item["idx"]] = _stats_from_area_sums({}, scale=item["reduction"]["scale"])
 
-        return {
-            "tree_cover_tile_url": tree_cover_tile_info['tile_fetcher'].url_format,
-            "deforestation_tile_url": deforestation_tile_info['tile_fetcher'].url_format,
-            "loss_year_tile_url": loss_year_tile_info['tile_fetcher'].url_format,
-            "forest_area_ha": stats["forest_area_ha"],
-            "loss_area_ha": stats["loss_area_ha"],
-            "deforestation_percent": stats["deforestation_percent"]
+    results.update(_reduce_deforestation_chunks(_chunk_items_by_reduction(items)))
+    return results
+
+def calculate_deforestation_batch(plots, ensure_init=True, use_cache=True, mode=None):
+    """
+    Calculate deforestation data for many plots with as few backend round trips as possible.
+
+    `plots` is a list of dicts with `coordinates` (list or JSON string) and optional `area`.
+    Returns a list aligned with `plots`; entries are stats dicts or None when a plot
+    has no usable geometry or could not be analyzed.
+    """
+    plots = plots or []
+    results = [None] * len(plots)
+
+    candidates = []
+    for idx, plot in enumerate(plots):
+        coordinates = _coerce_coordinates((plot or {}).get("coordinates"))
+        if coordinates:
+            candidates.append((idx, coordinates, plot.get("area")))
+
+    backend = get_deforestation_backend()
+    cache_keys = {}
+    if use_cache and candidates:
+        cache_keys = {
+            idx: _deforestation_cache_key(
+                coords,
+                area,
+                backend.name,
+                scale=backend.analysis_scale(coords, area_ha=area, mode=mode),
+            )
+            for idx, coords, area in candidates
         }
+        cached = _get_cached_deforestation_stats(cache_keys.values())
+        misses = []
+        for candidate in candidates:
+            stats = cached.get(cache_keys[candidate[0]])
+            if stats:
+                results[candidate[0]] = stats
+            else:
+                misses.append(candidate)
+        _record_deforestation_cache_usage(hits=len(candidates) - len(misses), misses=len(misses))
+        candidates = misses
+
+    if not candidates:
+        return results
+
+    try:
+        for idx, stats in backend.calculate_batch(candidates, ensure_init=ensure_init, mode=mode).items():
+            results[idx] = stats
+            _store_deforestation_stats(cache_keys.get(idx), stats)
 
     except Exception as e:
-        safe_log_error(f"Error generating tile URLs: {str(e)}", "Tile Generation Error")
-        frappe.throw(f"Error generating tile URLs: {str(e)}")
+        safe_log_error(f"Batch deforestation calculation failed: {str(e)}", "Deforestation Error")
 
-@frappe.whitelist()
-def get_global_deforestation_tiles():
-    """Generate global Earth Engine tile URLs for background deforestation layers"""
+    return results
+
+
+def _compute_plot_tile_layers():
+    """Generate Earth Engine tile URLs for the plot deforestation map layers"""
+    init_earth_engine()
+
+    layers = _get_global_layers()
+    tree_cover_2000 = layers["tree_cover_2000"]
+    loss_year = layers["loss_year"]
+    forest_mask = layers["forest_mask"]
+    hansen_loss_mask = layers["hansen_loss_mask"]
+
+    # Create visualization parameters
+    # Tree cover visualization (green shades)
+    tree_cover_vis = {
+        "min": 30, 
+        "max": 100, 
+        "palette": ["#d9f0a3", "#addd8e", "#78c679", "#41ab5d", "#238443", "#006837", "#004529"]
+    }
+    
+    # Deforestation visualization (red)
+    deforestation_vis = {
+        "min": 1, 
+        "max": 1, 
+        "palette": ["red"]
+    }
+    
+    # Loss year visualization (color by year)
+    loss_year_vis = {
+        "min": 21, 
+        "max": 24, 
+        "palette": ["yellow", "orange", "red", "darkred"]
+    }
+
+    # Generate tile URLs (the three getMapId calls run concurrently)
+    tree_cover_tile_info, deforestation_tile_info, loss_year_tile_info = get_ee_executor().map(
+        _get_map_id,
+        [
+            (tree_cover_2000.updateMask(forest_mask), tree_cover_vis),
+            # Keep this as Hansen layer for visual continuity; stats use combined logic.
+            (hansen_loss_mask.selfMask(), deforestation_vis),
+            (loss_year.updateMask(loss_year.gt(20)), loss_year_vis),
+        ],
+    )
+
+    return {
+        "tree_cover_tile_url": tree_cover_tile_info['tile_fetcher'].url_format,
+        "deforestation_tile_url": deforestation_tile_info['tile_fetcher'].url_format,
+        "loss_year_tile_url": loss_year_tile_info['tile_fetcher'].url_format,
+    }
+
+def refresh_plot_tile_layers():
+    """Background job: renew the cached plot tile URLs before their map IDs expire."""
+    shared_cache.refresh(PLOT_TILE_LAYERS_CACHE_KEY, _compute_plot_tile_layers, TILE_CACHE_TTL_SEC)
+
+def _polygon_extraction_settings():
+    """(enabled, tolerance_m) for the optional deforested-polygon stage."""
+    config = get_deforestation_config()
+    enabled = bool(config.get("extract_polygons")) and get_deforestation_backend().name == BACKEND_EARTH_ENGINE
+    tolerance = _to_positive_float(config.get("polygon_tolerance_m")) or DEFAULT_POLYGON_TOLERANCE_M
+    return enabled, tolerance
+
+def _round_nested_coordinates(value, precision=DEFORESTED_POLYGON_PRECISION):
+    if isinstance(value, (list, tuple)):
+        if value and not isinstance(value[0], (list, tuple)):
+            return [round(float(v), precision) for v in value]
+        return [_round_nested_coordinates(v, precision) for v in value]
+    return value
+
+def _to_multipolygon_coordinates(geometry):
+    """Polygon parts of an EE geometry dict as MultiPolygon coordinates (lines/points dropped)."""
+    geometry = geometry or {}
+    geometry_type = geometry.get("type")
+    if geometry_type == "Polygon":
+        return [geometry.get("coordinates") or []]
+    if geometry_type == "MultiPolygon":
+        return list(geometry.get("coordinates") or [])
+    if geometry_type == "GeometryCollection":
+        parts = []
+        for child in geometry.get("geometries") or []:
+            parts.extend(_to_multipolygon_coordinates(child))
+        return parts
+    return []
+
+def _encode_deforested_polygons(polygons, analysis_key, tolerance_m):
+    """Compact GeoJSON Feature tagged with the analysis it was extracted for."""
+    return json.dumps({
+        "type": "Feature",
+        "properties": {"analysis_key": analysis_key, "tolerance_m": tolerance_m},
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": _round_nested_coordinates([p for p in polygons if p]),
+        },
+    }, separators=(",", ":"))
+
+def _decode_deforested_polygons(value, analysis_key=None):
+    """Stored loss polygons, or None when missing or extracted for another analysis."""
     try:
+        feature = json.loads(value) if isinstance(value, str) else value
+    except Exception:
+        return None
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        return None
+    if analysis_key and (feature.get("properties") or {}).get("analysis_key") != analysis_key:
+        return None
+    return feature
+
+def _ee_extract_deforested_polygons(coordinates, area_ha=None, tolerance_m=DEFAULT_POLYGON_TOLERANCE_M,
+                                    ensure_init=True, mode=None, scale=None):
+    """
+    Vectorize the combined loss mask inside a plot; returns MultiPolygon coordinates.
+    Pass the mode/scale of the plot's analysis so the outlines match its loss area.
+    """
+    if ensure_init:
         init_earth_engine()
 
-        # Load Hansen dataset
-        gfc = ee.Image("UMD/hansen/global_forest_change_2024_v1_12")
-        tree_cover_2000 = gfc.select("treecover2000")
-        loss_year = gfc.select("lossyear")
+    geometry = _build_analysis_geometry(coordinates, area_ha=area_ha)
+    if not geometry:
+        return None
 
-        # Global layers
-        forest_mask = tree_cover_2000.gte(30)
-        loss_after_2020 = loss_year.gt(20)
+    params = _reduction_params(coordinates, area_ha=area_ha, mode=mode, scale=scale)
+    masks = _build_deforestation_inputs(geometry)
+    vectors = masks["combined_loss_mask"].selfMask().reduceToVectors(
+        geometry=geometry,
+        scale=params["scale"],
+        geometryType="polygon",
+        eightConnected=True,
+        maxPixels=1e10,
+        tileScale=params["tileScale"],
+    )
+    # Pixel-edged outlines are clipped to the plot and simplified before download.
+    loss_geometry = (
+        vectors.geometry(tolerance_m)
+        .intersection(geometry, tolerance_m)
+        .simplify(tolerance_m)
+    )
+    return _to_multipolygon_coordinates(run_ee(loss_geometry.getInfo))
 
-        # Visualization parameters
-        tree_cover_vis = {
-            "min": 30, 
-            "max": 100, 
-            "palette": ["#d9f0a3", "#addd8e", "#78c679", "#41ab5d", "#238443", "#006837", "#004529"]
-        }
-        
-        deforestation_vis = {
-            "min": 1, 
-            "max": 1, 
-            "palette": ["#ff0000"]
-        }
+def enqueue_deforested_polygon_extraction(plot_names):
+    """Queue the optional polygon stage for freshly analyzed plots (no-op unless enabled)."""
+    enabled, _tolerance = _polygon_extraction_settings()
+    plot_names = [name for name in (plot_names or []) if name]
+    if not enabled or not plot_names:
+        return
+    for offset in range(0, len(plot_names), POLYGON_EXTRACTION_JOB_SIZE):
+        frappe.enqueue(
+            "farmportal.api.landplots.extract_deforested_polygons_job",
+            queue="long",
+            timeout=3600,
+            enqueue_after_commit=True,
+            plot_names=plot_names[offset:offset + POLYGON_EXTRACTION_JOB_SIZE],
+        )
 
-        canopy_loss_vis = {
-            "min": 1,
-            "max": 1,
-            "palette": ["#ff8c00"]
-        }
+def enqueue_plot_analysis(plot_names):
+    """Queue deforestation analysis for stored plots (imports insert first, analyze after)."""
+    plot_names = [name for name in (plot_names or []) if name]
+    for offset in range(0, len(plot_names), PLOT_ANALYSIS_JOB_SIZE):
+        frappe.enqueue(
+            "farmportal.api.landplots.analyze_plots_job",
+            queue="long",
+            timeout=3600,
+            enqueue_after_commit=True,
+            plot_names=plot_names[offset:offset + PLOT_ANALYSIS_JOB_SIZE],
+        )
+
+def analyze_plots_job(plot_names):
+    """Background job: batch-analyze stored plots and save their deforestation fields."""
+    from farmportal.api.plot_tiles import invalidate_plot_tiles
+
+    warm_up_earth_engine()
+    plots = frappe.get_all(
+        "Land Plot",
+        filters={"name": ["in", list(plot_names or [])]},
+        fields=["name", "supplier", "area", "coordinates", "geometry_hash", "geometry_blob"],
+        limit_page_length=0,
+    )
+    candidates = [
+        {"name": plot.name, "coordinates": plot_coordinates(plot), "area": plot.area}
+        for plot in plots
+    ]
+    suppliers = {plot.name: plot.supplier for plot in plots}
+    batch_stats = calculate_deforestation_batch(candidates)
+
+    analyzed = []
+    for plot, stats in zip(candidates, batch_stats):
+        if not stats:
+            continue
+        area = plot["area"] if (plot["area"] or 0) > 0 else None
+        frappe.db.set_value(
+            "Land Plot",
+            plot["name"],
+            _deforestation_plot_fields(stats, plot["coordinates"], area),
+            update_modified=False,
+        )
+        analyzed.append(plot["name"])
+    frappe.db.commit()
+
+    if analyzed:
+        invalidate_plot_tiles(suppliers={suppliers[name] for name in analyzed})
+        enqueue_deforested_polygon_extraction(analyzed)
+        frappe.db.commit()
 
-        # Generate global tile URLs
-        global_tree_cover = tree_cover_2000.updateMask(forest_mask).getMapId(tree_cover_vis)
-        global_deforestation = loss_after_2020.selfMask().getMapId(deforestation_vis)
-        global_canopy_loss_url = None
+def extract_deforested_polygons_job(plot_names):
+    """
+    Background job: store simplified loss polygons in Land Plot.deforested_polygons.
+    Plots without loss get an empty MultiPolygon without an EE call; plots whose
+    stored polygons already match their analysis are skipped.
+    """
+    enabled, tolerance = _polygon_extraction_settings()
+    if not enabled:
+        return
+    init_earth_engine()
 
-        # Sentinel-2 canopy loss (baseline vs recent NDVI drop, masked by forest)
+    for plot_name in plot_names or []:
         try:
-            s2 = (
-                ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-                .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
+            plot = frappe.db.get_value(
+                "Land Plot",
+                plot_name,
+                [
+                    "coordinates", "area", "analysis_key", "analysis_scale", "deforested_area",
+                    "deforested_polygons",
+                ],
+                as_dict=True,
             )
-            s2_2020 = s2.filterDate("2019-01-01", "2020-12-31").median()
-            s2_recent = s2.filterDate("2024-01-01", "2026-01-01").median()
+            if not plot or not plot.analysis_key:
+                continue
+            if _decode_deforested_polygons(plot.deforested_polygons, plot.analysis_key):
+                continue
+
+            polygons = []
+            if (plot.deforested_area or 0) > 0:
+                coordinates = _coerce_coordinates(plot.coordinates)
+                if not coordinates:
+                    continue
+                polygons = _ee_extract_deforested_polygons(
+                    coordinates,
+                    area_ha=plot.area,
+                    tolerance_m=tolerance,
+                    ensure_init=False,
+                    scale=plot.analysis_scale or DEFAULT_ANALYSIS_SCALE_M,
+                )
+                if polygons is None:
+                    continue
+
+            frappe.db.set_value(
+                "Land Plot",
+                plot_name,
+                "deforested_polygons",
+                _encode_deforested_polygons(polygons, plot.analysis_key, tolerance),
+                update_modified=False,
+            )
+            frappe.db.commit()
+        except Exception as e:
+            frappe.db.rollback()
+            safe_log_error(f"Deforested polygon extraction failed for {plot_name}: {str(e)}", "Deforestation Polygon Error")
 
-            ndvi_2020 = s2_2020.normalizedDifference(["B8", "B4"])
-            ndvi_recent = s2_recent.normalizedDifference(["B8", "B4"])
-            ndvi_change = ndvi_2020.subtract(ndvi_recent)
+def _get_stored_plot_stats(plot_name, analysis_key):
+    """Stats persisted on a Land Plot, if they were computed for this exact geometry/version."""
+    if not plot_name or not analysis_key:
+        return None
+    row = frappe.db.get_value(
+        "Land Plot",
+        plot_name,
+        [
+            "analysis_key",
+            "forest_area",
+            "deforested_area",
+            "deforestation_percentage",
+            "analysis_scale",
+            "hansen_loss_area",
+            "sentinel_loss_area",
+            "loss_by_year",
+            "deforested_polygons",
+        ],
+        as_dict=True,
+    )
+    if not row or row.get("analysis_key") != analysis_key:
+        return None
+    evidence = _plot_loss_evidence(row)
+    return {
+        "forest_area_ha": row.get("forest_area") or 0,
+        "loss_area_ha": row.get("deforested_area") or 0,
+        "deforestation_percent": row.get("deforestation_percentage") or 0,
+        "analysis_scale_m": row.get("analysis_scale") or DEFAULT_ANALYSIS_SCALE_M,
+        "hansen_loss_ha": evidence["hansen_loss_area"],
+        "sentinel_loss_ha": evidence["sentinel_loss_area"],
+        "loss_by_year": evidence["loss_by_year"],
+        "deforested_polygons": _decode_deforested_polygons(row.get("deforested_polygons"), analysis_key),
+    }
 
-            recent_canopy_loss = ndvi_change.gt(0.25).And(forest_mask)
-            global_canopy_loss = recent_canopy_loss.selfMask().getMapId(canopy_loss_vis)
-            global_canopy_loss_url = global_canopy_loss["tile_fetcher"].url_format
-        except Exception as sentinel_error:
-            safe_log_error(
-                f"Sentinel-2 canopy loss tile generation failed: {str(sentinel_error)}",
-                "Sentinel Layer Error"
-            )
+def _load_plot_analysis_geometry(plot_name):
+    """(full coordinates, declared area) of a plot the session user may view, else None."""
+    plot = frappe.db.get_value(
+        "Land Plot",
+        plot_name,
+        ["name", "supplier", "area", "coordinates", "geometry_hash", "geometry_blob"],
+        as_dict=True,
+    )
+    if not plot:
+        return None
+    customer, supplier = _get_party_from_user(frappe.session.user)
+    if not (supplier and plot.supplier == supplier):
+        if not customer or plot.name not in _collect_customer_shared_plot_names(customer):
+            return None
+    coordinates = plot_coordinates(plot)
+    if not coordinates:
+        return None
+    return coordinates, plot.area
+
+@frappe.whitelist()
+def get_deforestation_tiles(coordinates_json=None, area_ha=None, plot_name=None, mode=None):
+    """
+    Tile URLs and stats for a plot's deforestation map.
+
+    The tile layers are not clipped to the plot, so their map IDs are shared by
+    every plot through Redis. Stats come from the Land Plot (when `plot_name` is
+    given and its stored analysis matches this geometry and analysis version),
+    then from the geometry-keyed analysis cache, and only then from a new analysis.
+    Pass `mode="fast"` for a quick estimate while a plot is being drawn.
+    With `plot_name` the plot's stored full geometry and area are analyzed and
+    `coordinates_json` is ignored (list views send simplified outlines).
+    Stored plots also return their extracted loss polygons, if any.
+    """
+    try:
+        stored = _load_plot_analysis_geometry(plot_name) if plot_name else None
+        if stored:
+            coordinates, area_ha = stored
+        else:
+            coordinates = _coerce_coordinates(coordinates_json)
+            plot_name = None
+        if not coordinates:
+            frappe.throw(_("Invalid coordinates for deforestation analysis"))
+
+        backend = get_deforestation_backend()
+        analysis_key = _deforestation_cache_key(
+            coordinates,
+            area_ha,
+            backend.name,
+            scale=backend.analysis_scale(coordinates, area_ha=area_ha, mode=mode),
+        )
+        stats = _get_stored_plot_stats(plot_name, analysis_key)
+        if not stats:
+            stats = calculate_deforestation_data(coordinates, area_ha=area_ha, mode=mode)
+        if not stats:
+            frappe.throw(_("Failed to calculate deforestation data"))
+
+        layers = shared_cache.get_or_compute(
+            PLOT_TILE_LAYERS_CACHE_KEY,
+            _compute_plot_tile_layers,
+            ttl=TILE_CACHE_TTL_SEC,
+            refresh_after=TILE_CACHE_REFRESH_AFTER_SEC,
+            refresh_method="farmportal.api.landplots.refresh_plot_tile_layers",
+        )
 
         return {
-            "global_tree_cover_url": global_tree_cover['tile_fetcher'].url_format,
-            "global_deforestation_url": global_deforestation['tile_fetcher'].url_format,
-            "global_canopy_loss_url": global_canopy_loss_url
+            "tree_cover_tile_url": layers["tree_cover_tile_url"],
+            "deforestation_tile_url": layers["deforestation_tile_url"],
+            "loss_year_tile_url": layers["loss_year_tile_url"],
+            "forest_area_ha": stats["forest_area_ha"],
+            "loss_area_ha": stats["loss_area_ha"],
+            "deforestation_percent": stats["deforestation_percent"],
+            "analysis_scale_m": stats.get("analysis_scale_m") or DEFAULT_ANALYSIS_SCALE_M,
+            "hansen_loss_ha": stats.get("hansen_loss_ha"),
+            "sentinel_loss_ha": stats.get("sentinel_loss_ha"),
+            "loss_by_year": stats.get("loss_by_year"),
+            # Stored loss outlines (when extracted) draw without any tile requests.
+            "deforested_polygons": stats.get("deforested_polygons"),
         }
 
+    except Exception as e:
+        safe_log_error(f"Error generating tile URLs: {str(e)}", "Tile Generation Error")
+        frappe.throw(f"Error generating tile URLs: {str(e)}")
+
+@frappe.whitelist()
+def get_global_deforestation_tiles():
+    """Global Earth Engine tile URLs for background deforestation layers, shared via Redis"""
+    try:
+        return shared_cache.get_or_compute(
+            GLOBAL_TILES_CACHE_KEY,
+            _compute_global_deforestation_tiles,
+            ttl=TILE_CACHE_TTL_SEC,
+            refresh_after=TILE_CACHE_REFRESH_AFTER_SEC,
+            refresh_method="farmportal.api.landplots.refresh_global_deforestation_tiles",
+        )
     except Exception as e:
         safe_log_error(f"Error generating global tile URLs: {str(e)}", "Global Tile Error")
         frappe.throw(f"Error generating global tile URLs: {str(e)}")
 
+def refresh_global_deforestation_tiles():
+    """Background job: renew the cached global tile URLs before their map IDs expire."""
+    shared_cache.refresh(GLOBAL_TILES_CACHE_KEY, _compute_global_deforestation_tiles, TILE_CACHE_TTL_SEC)
+
+def _compute_global_deforestation_tiles():
+    """Generate global Earth Engine tile URLs for background deforestation layers"""
+    init_earth_engine()
+
+    # Shared Hansen / Sentinel-2 layers
+    layers = _get_global_layers()
+    tree_cover_2000 = layers["tree_cover_2000"]
+    forest_mask = layers["forest_mask"]
+    loss_after_2020 = layers["loss_year"].gt(20)
+
+    # Visualization parameters
+    tree_cover_vis = {
+        "min": 30, 
+        "max": 100, 
+        "palette": ["#d9f0a3", "#addd8e", "#78c679", "#41ab5d", "#238443", "#006837", "#004529"]
+    }
+    
+    deforestation_vis = {
+        "min": 1, 
+        "max": 1, 
+        "palette": ["#ff0000"]
+    }
+
+    canopy_loss_vis = {
+        "min": 1,
+        "max": 1,
+        "palette": ["#ff8c00"]
+    }
+
+    # Generate global tile URLs
+    global_tree_cover, global_deforestation = get_ee_executor().map(
+        _get_map_id,
+        [
+            (tree_cover_2000.updateMask(forest_mask), tree_cover_vis),
+            (loss_after_2020.selfMask(), deforestation_vis),
+        ],
+    )
+    global_canopy_loss_url = None
+
+    # Sentinel-2 canopy loss (baseline vs recent NDVI drop, masked by forest)
+    try:
+        ndvi_change = _ndvi_change_image(layers)
+        recent_canopy_loss = ndvi_change.gt(0.25).And(forest_mask)
+        global_canopy_loss = run_ee(recent_canopy_loss.selfMask().getMapId, canopy_loss_vis)
+        global_canopy_loss_url = global_canopy_loss["tile_fetcher"].url_format
+    except Exception as sentinel_error:
+        safe_log_error(
+            f"Sentinel-2 canopy loss tile generation failed: {str(sentinel_error)}",
+            "Sentinel Layer Error"
+        )
+
+    return {
+        "global_tree_cover_url": global_tree_cover['tile_fetcher'].url_format,
+        "global_deforestation_url": global_deforestation['tile_fetcher'].url_format,
+        "global_canopy_loss_url": global_canopy_loss_url
+    }
+
 
 USER_LINK_FIELDS = {
     "Customer": ["custom_user", "user_id", "user"],
@@ -809,9 +1723,100 @@ def _get_party_from_user(user):
     supplier = _link_by_user_field("Supplier", user) or _link_by_contact_email(user, "Supplier")
     return customer, supplier
 
+def _parse_plot_list_fields(fields):
+    """Requested get_land_plots fields ("a,b" or JSON list); all fields when empty."""
+    if not fields:
+        return list(LAND_PLOT_LIST_FIELDS)
+    if isinstance(fields, str):
+        try:
+            fields = json.loads(fields)
+        except Exception:
+            fields = fields.split(",")
+    if isinstance(fields, str):
+        fields = [fields]
+    selected = ["name"]
+    for field in fields or []:
+        field = str(field).strip()
+        if not field or field in selected:
+            continue
+        if field not in LAND_PLOT_LIST_FIELDS:
+            frappe.throw(_("Unknown land plot field: {0}").format(field))
+        selected.append(field)
+    return selected
+
+
+def _encode_plot_list_cursor(row):
+    payload = json.dumps([str(row.modified), row.name], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_plot_list_cursor(cursor):
+    try:
+        modified, name = json.loads(base64.urlsafe_b64decode(str(cursor).encode("ascii")))
+        return str(modified), str(name)
+    except Exception:
+        frappe.throw(_("Invalid cursor"))
+
+
+def _plot_list_conditions(supplier, country=None, commodity=None, risk=None, cursor=None):
+    conditions = ["lp.supplier = %(supplier)s"]
+    values = {"supplier": supplier}
+    if country:
+        conditions.append("lp.country = %(country)s")
+        values["country"] = country
+    if commodity:
+        # commodities is stored as "Cocoa, Coffee"; match whole items only.
+        conditions.append("CONCAT(',', REPLACE(lp.commodities, ', ', ','), ',') LIKE %(commodity)s")
+        values["commodity"] = f"%,{str(commodity).strip()},%"
+    if risk:
+        risk = str(risk).strip().lower()
+        if risk not in PLOT_RISK_CONDITIONS:
+            frappe.throw(_("risk must be one of: {0}").format(", ".join(PLOT_RISK_CONDITIONS)))
+        conditions.append(PLOT_RISK_CONDITIONS[risk])
+    if cursor:
+        modified, name = _decode_plot_list_cursor(cursor)
+        conditions.append(
+            "(lp.modified < %(cursor_modified)s"
+            " OR (lp.modified = %(cursor_modified)s AND lp.name < %(cursor_name)s))"
+        )
+        values.update(cursor_modified=modified, cursor_name=name)
+    return conditions, values
+
+
+def _load_plot_products(plot_names):
+    """Product codes of many plots in one query, keyed by plot name."""
+    products = {name: [] for name in plot_names}
+    if not plot_names:
+        return products
+    rows = frappe.db.sql(
+        """
+        SELECT parent, product
+        FROM `tabLand Plot Product`
+        WHERE parenttype = 'Land Plot' AND parent IN %(names)s
+        ORDER BY parent, idx
+        """,
+        {"names": tuple(plot_names)},
+        as_dict=True,
+    )
+    for row in rows:
+        products[row.parent].append(row.product)
+    return products
+
+
 @frappe.whitelist()
-def get_land_plots():
-    """Get all land plots for the logged-in supplier"""
+def get_land_plots(detail=None, zoom=None, fields=None, limit=None, cursor=None,
+                   country=None, commodity=None, risk=None):
+    """
+    Get land plots of the logged-in supplier, most recently modified first.
+    Coordinates are simplified to `detail` (low/medium/high) or to suit a map `zoom`;
+    use get_land_plot for a single plot's full geometry.
+
+    `fields` limits the returned fields (e.g. leave out coordinates, geojson and
+    deforested_polygons for tables). `country`, `commodity` and `risk`
+    (high/low/mitigated) filter on the server. With `limit`, pages are returned
+    together with a `next_cursor` to pass back as `cursor`; without it all plots are
+    returned.
+    """
     user = frappe.session.user
     if user == "Guest":
         frappe.throw(_("Not logged in"), frappe.PermissionError)
@@ -820,45 +1825,261 @@ def get_land_plots():
     if not supplier:
         frappe.throw(_("Only Suppliers can access land plots"), frappe.PermissionError)
 
-    plots = frappe.get_all("Land Plot", 
-        filters={"supplier": supplier},
-        fields=[
-            "name", "plot_id", "farmer_name", "state_province", "country", "area", "yield_dried_mt",
-            "coordinates", "geojson", "latitude", "longitude",
-            "commodities", "deforestation_percentage", "deforested_area",
-            "deforested_polygons"
-        ]
+    selected = _parse_plot_list_fields(fields)
+    plot_detail = resolve_detail(detail, zoom)
+    columns = [f"lp.`{field}`" for field in selected if field not in ("products", "coordinates")]
+    columns.append("lp.`modified`")
+    if "coordinates" in selected:
+        columns += plot_geometry_columns(plot_detail)
+
+    try:
+        limit = int(limit or 0)
+    except (TypeError, ValueError):
+        limit = 0
+    limit = min(max(limit, 0), LAND_PLOT_LIST_MAX_LIMIT)
+
+    conditions, values = _plot_list_conditions(supplier, country, commodity, risk, cursor)
+    limit_clause = ""
+    if limit:
+        limit_clause = "LIMIT %(limit)s"
+        values["limit"] = limit + 1
+
+    plots = frappe.db.sql(
+        f"""
+        SELECT {", ".join(columns)}
+        FROM `tabLand Plot` lp
+        WHERE {" AND ".join(conditions)}
+        ORDER BY lp.modified DESC, lp.name DESC
+        {limit_clause}
+        """,
+        values,
+        as_dict=True,
     )
-    
+
+    next_cursor = None
+    if limit and len(plots) > limit:
+        plots = plots[:limit]
+        next_cursor = _encode_plot_list_cursor(plots[-1])
+
+    if "coordinates" in selected:
+        apply_plot_detail(plots, plot_detail)
+    products = _load_plot_products([plot.name for plot in plots]) if "products" in selected else None
+
     # Parse JSON fields and add products
     for plot in plots:
+        plot.pop("modified", None)
+        for field in ("geojson", "deforested_polygons"):
+            if plot.get(field):
+                try:
+                    plot[field] = json.loads(plot[field])
+                except Exception:
+                    pass
+
+        if products is not None:
+            plot.products = products[plot.name]
+
+        if "commodities" in selected:
+            plot.commodities = [c.strip() for c in plot.commodities.split(",")] if plot.commodities else []
+
+    return {"data": plots, "next_cursor": next_cursor}
+
+@frappe.whitelist()
+def get_land_plot(name):
+    """Get one land plot of the logged-in supplier with its full-resolution geometry"""
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw(_("Not logged in"), frappe.PermissionError)
+
+    customer, supplier = _get_party_from_user(user)
+    if not supplier:
+        frappe.throw(_("Only Suppliers can access land plots"), frappe.PermissionError)
+
+    plot = frappe.db.get_value(
+        "Land Plot",
+        name,
+        [
+            "name", "plot_id", "farmer_name", "supplier", "state_province", "country", "area",
+            "computed_area_ha", "area_mismatch", "yield_dried_mt", "coordinates", "geometry_hash", "geometry_blob", "geojson",
+            "latitude", "longitude", "commodities", "deforestation_percentage",
+            "deforested_area", "deforested_polygons"
+        ],
+        as_dict=True,
+    )
+    if not plot or plot.supplier != supplier:
+        frappe.throw(_("Access denied"), frappe.PermissionError)
+
+    apply_plot_detail([plot], DETAIL_FULL)
+    try:
+        if plot.geojson:
+            plot.geojson = json.loads(plot.geojson)
+        if plot.deforested_polygons:
+            plot.deforested_polygons = json.loads(plot.deforested_polygons)
+    except Exception:
+        pass
+
+    plot.products = frappe.get_all("Land Plot Product", filters={"parent": plot.name}, pluck="product")
+    plot.commodities = [c.strip() for c in plot.commodities.split(",")] if plot.commodities else []
+    return {"data": plot}
+
+def _parse_bbox(bbox):
+    """Parse "west,south,east,north" (string, JSON list or dict) into floats."""
+    if isinstance(bbox, str):
+        text = bbox.strip()
         try:
-            if plot.coordinates:
-                plot.coordinates = json.loads(plot.coordinates)
-            if plot.geojson:
-                plot.geojson = json.loads(plot.geojson)
-            if plot.deforested_polygons:
-                plot.deforested_polygons = json.loads(plot.deforested_polygons)
-        except:
-            pass
-            
-        # Get products
-        products = frappe.get_all("Land Plot Product",
-            filters={"parent": plot.name},
-            fields=["product", "product_name"]
+            bbox = json.loads(text)
+        except Exception:
+            bbox = text.split(",")
+    if isinstance(bbox, dict):
+        bbox = [bbox.get("west"), bbox.get("south"), bbox.get("east"), bbox.get("north")]
+    try:
+        west, south, east, north = (float(v) for v in bbox)
+    except (TypeError, ValueError):
+        frappe.throw(_("bbox must be west,south,east,north"))
+    if south > north or not (-90 <= south <= 90 and -90 <= north <= 90):
+        frappe.throw(_("Invalid bbox latitude range"))
+    return west, south, east, north
+
+
+def _bbox_conditions(west, south, east, north):
+    """SQL conditions and values for plots whose bbox intersects the viewport."""
+    conditions = [
+        "lp.bbox_min_lat BETWEEN %(min_lat_from)s AND %(north)s",
+        "lp.bbox_max_lat >= %(south)s",
+    ]
+    values = {"min_lat_from": south - BBOX_QUERY_MAX_SPAN_DEG, "north": north, "south": south}
+    if west > east:
+        # Viewport crosses the antimeridian: [west, 180] or [-180, east].
+        conditions.append("(lp.bbox_max_lng >= %(west)s OR lp.bbox_min_lng <= %(east)s)")
+        values.update(east=east, west=west)
+    elif east - west < 360:
+        conditions.append("lp.bbox_min_lng <= %(east)s AND lp.bbox_max_lng >= %(west)s")
+        values.update(east=east, west=west)
+    # Plots without geometry keep an all-zero bbox and must not match (0, 0).
+    conditions.append("lp.geometry_hash IS NOT NULL AND lp.geometry_hash != ''")
+    return conditions, values
+
+
+def _resolve_plot_scope(scope=None):
+    """
+    Plots visible to the session user: "supplier" (own plots) or "customer" (plots
+    shared with the customer); defaults to the user's party. Supplier scopes carry the
+    SQL `condition` and its `values`; customer scopes get `shared`, the shared plot
+    names per supplier, loaded on first use from the per-version cache in plot_tiles.
+    """
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw(_("Not logged in"), frappe.PermissionError)
+
+    customer, supplier = _get_party_from_user(user)
+    scope = str(scope or ("supplier" if supplier else "customer")).strip().lower()
+    if scope == "supplier":
+        if not supplier:
+            frappe.throw(_("Only Suppliers can access land plots"), frappe.PermissionError)
+        return {
+            "scope": scope,
+            "party": supplier,
+            "condition": "lp.supplier = %(supplier)s",
+            "values": {"supplier": supplier},
+        }
+    if scope == "customer":
+        if not customer:
+            frappe.throw(_("Only Customers can view shared plots"), frappe.PermissionError)
+        return {
+            "scope": scope,
+            "party": customer,
+            "shared": None,
+        }
+    frappe.throw(_("scope must be 'supplier' or 'customer'"))
+
+
+def _query_plots_in_bbox(bbox, plot_scope, columns, limit):
+    """Rows (`columns` of `tabLand Plot` lp) intersecting `bbox`; returns (rows, truncated)."""
+    conditions, values = _bbox_conditions(*bbox)
+    if plot_scope["scope"] != "customer":
+        conditions.insert(0, plot_scope["condition"])
+        values.update(plot_scope["values"])
+        values["limit"] = limit + 1
+        rows = frappe.db.sql(
+            f"""
+            SELECT {", ".join(columns)}
+            FROM `tabLand Plot` lp
+            WHERE {" AND ".join(conditions)}
+            LIMIT %(limit)s
+            """,
+            values,
+            as_dict=True,
         )
-        plot.products = [p.product for p in products]
-        
-        # Parse commodities 
-        if plot.commodities:
-            plot.commodities = [c.strip() for c in plot.commodities.split(',')]
-        else:
-            plot.commodities = []
-    
-    return {"data": plots}
+        return rows[:limit], len(rows) > limit
+
+    if plot_scope["shared"] is None:
+        from farmportal.api.plot_tiles import _customer_plot_context
+
+        plot_scope["shared"] = _customer_plot_context(plot_scope["party"])["shared"]
+    shared = plot_scope["shared"]
+    if not shared:
+        return [], False
+
+    # Shared plots: one walk of the (supplier, bbox) index ranges of the sharing suppliers
+    # for names only, keep the shared ones, then load the columns of at most `limit` plots.
+    in_view = frappe.db.sql(
+        f"""
+        SELECT lp.supplier, lp.name
+        FROM `tabLand Plot` lp
+        WHERE lp.supplier IN %(suppliers)s AND {" AND ".join(conditions)}
+        """,
+        {**values, "suppliers": tuple(sorted(shared))},
+    )
+    names = [name for supplier, name in in_view if name in shared.get(supplier, ())]
+    if not names:
+        return [], False
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT {", ".join(columns)}
+        FROM `tabLand Plot` lp
+        WHERE lp.name IN %(names)s
+        """,
+        {"names": tuple(names[:limit])},
+        as_dict=True,
+    )
+    return rows, len(names) > limit
 
-def create_single_plot_internal(plot_data, supplier, calculate_deforestation=True):
-    """Internal function to create a single plot with proper unique ID generation"""
+
+@frappe.whitelist()
+def get_plots_in_bbox(bbox, scope=None, limit=None, detail=None, zoom=None):
+    """
+    Plots whose bounding box intersects the map viewport `bbox` ("west,south,east,north").
+    `scope` is "supplier" (own plots) or "customer" (plots shared with the customer);
+    it defaults to the user's party. Coordinates are simplified as in get_land_plots.
+    """
+    plot_scope = _resolve_plot_scope(scope)
+    bbox = _parse_bbox(bbox)
+    try:
+        limit = int(limit or BBOX_QUERY_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = BBOX_QUERY_DEFAULT_LIMIT
+    limit = max(1, min(limit, BBOX_QUERY_MAX_LIMIT))
+    plot_detail = resolve_detail(detail, zoom)
+
+    plots, truncated = _query_plots_in_bbox(
+        bbox,
+        plot_scope,
+        [
+            "lp.name", "lp.plot_id", "lp.farmer_name", "lp.supplier", "lp.country", "lp.area",
+            "lp.deforestation_percentage", "lp.deforested_area",
+            "lp.bbox_min_lng", "lp.bbox_min_lat", "lp.bbox_max_lng", "lp.bbox_max_lat",
+        ] + plot_geometry_columns(plot_detail),
+        limit,
+    )
+    apply_plot_detail(plots, plot_detail)
+    return {"plots": plots, "truncated": truncated}
+
+
+def create_single_plot_internal(plot_data, supplier, calculate_deforestation=True, deforestation_data=None):
+    """
+    Internal function to create a single plot with proper unique ID generation.
+    Pass `deforestation_data` when stats were already computed (e.g. by a batch run).
+    """
     
     # Generate unique plot ID
     unique_plot_id = generate_unique_plot_id(plot_data.get('id'), supplier)
@@ -880,8 +2101,7 @@ def create_single_plot_internal(plot_data, supplier, calculate_deforestation=Tru
         area_value = 0.0
 
     # Calculate deforestation data only when explicitly requested
-    deforestation_data = None
-    if calculate_deforestation and plot_data.get('coordinates'):
+    if deforestation_data is None and calculate_deforestation and plot_data.get('coordinates'):
         coordinates = plot_data.get('coordinates')
         if isinstance(coordinates, str):
             try:
@@ -929,10 +2149,17 @@ def create_single_plot_internal(plot_data, supplier, calculate_deforestation=Tru
         # Set deforestation data from calculation
         "deforestation_percentage": deforestation_data["deforestation_percent"] if deforestation_data else 0,
         "deforested_area": deforestation_data["loss_area_ha"] if deforestation_data else 0,
-        "deforested_polygons": None  # Can be enhanced later
+        # Filled by the optional polygon stage (extract_deforested_polygons_job)
+        "deforested_polygons": None
     }
     if meta.has_field("plot_name"):
         doc_fields["plot_name"] = plot_label
+    if deforestation_data:
+        doc_fields.update(_deforestation_plot_fields(
+            deforestation_data,
+            plot_data.get("coordinates"),
+            area_value if area_value > 0 else None,
+        ))
 
     doc = frappe.get_doc(doc_fields)
     
@@ -965,6 +2192,8 @@ def create_land_plot(plot_data, calculate_deforestation=True):
 
     data = json.loads(plot_data) if isinstance(plot_data, str) else plot_data
     result = create_single_plot_internal(data, supplier, calculate_deforestation)
+    if result.get("deforestation_data"):
+        enqueue_deforested_polygon_extraction([result["name"]])
     frappe.db.commit()
     return result
 
@@ -1024,8 +2253,12 @@ def update_land_plot(name, plot_data, recalculate_deforestation=False):
                 area_ha=data.get("area", doc.area),
             )
             if deforestation_data:
-                doc.deforestation_percentage = deforestation_data["deforestation_percent"]
-                doc.deforested_area = deforestation_data["loss_area_ha"]
+                doc.update(_deforestation_plot_fields(
+                    deforestation_data,
+                    coordinates,
+                    data.get("area", doc.area),
+                ))
+                enqueue_deforested_polygon_extraction([doc.name])
                 print(f"Deforestation recalculation complete: {deforestation_data['deforestation_percent']}%")
     
     # Update products - clear and re-add
@@ -1056,33 +2289,31 @@ def bulk_create_land_plots(plots_data, calculate_deforestation=True):
     )
 
     plots = json.loads(plots_data) if isinstance(plots_data, str) else plots_data
-    created_plots = []
-    failed_plots = []
     
-    # Initialize Earth Engine only when requested
+    # Analyze all plots up front in batched EE requests instead of one round trip per plot
+    batch_stats = [None] * len(plots)
     if calculate_deforestation:
-        init_earth_engine()
-    
-    for i, plot_data in enumerate(plots):
-        try:
-            # Create plot with unique ID generation
-            result = create_single_plot_internal(plot_data, supplier, calculate_deforestation)
-            created_plots.append(result)
-            frappe.db.commit()  # Commit each successful creation
-            
-        except Exception as e:
-            error_msg = f"Plot {plot_data.get('id', f'Plot_{i+1}')}: {str(e)}"
-            failed_plots.append({
-                'plot_id': plot_data.get('id', f'Plot_{i+1}'),
-                'error': str(e)
-            })
-            
-            # Use safe logging to avoid character length issues
-            safe_log_error(error_msg, f"Plot Creation Failed", "bulk_create")
-            frappe.db.rollback()  # Rollback this individual failure
-            
-            print(f"Failed to create plot {plot_data.get('id', f'Plot_{i+1}')}: {str(e)}")
+        batch_stats = calculate_deforestation_batch([
+            {"coordinates": p.get("coordinates"), "area": p.get("area")}
+            for p in plots
+        ])
+        # Persist freshly cached analyses before per-plot rollbacks can discard them
+        frappe.db.commit()
     
+    # Multi-row inserts in chunked transactions; rows that fail are reported individually
+    from farmportal.api.plot_import import bulk_insert_plots
+
+    result = bulk_insert_plots(plots, supplier, deforestation_stats=batch_stats)
+    created_plots = result["created_plots"]
+    failed_plots = result["failed_plots"]
+    for failure in failed_plots:
+        # Use safe logging to avoid character length issues
+        safe_log_error(f"Plot {failure['plot_id']}: {failure['error']}", "Plot Creation Failed", "bulk_create")
+
+    enqueue_deforested_polygon_extraction([
+        plot["name"] for plot in created_plots if plot.get("deforestation_data")
+    ])
+
     # Final commit for all successful creations
     frappe.db.commit()
     
@@ -1124,9 +2355,9 @@ def recalculate_deforestation(plot_name):
         deforestation_data = calculate_deforestation_data(coordinates, area_ha=doc.area)
         
         if deforestation_data:
-            doc.deforestation_percentage = deforestation_data["deforestation_percent"]
-            doc.deforested_area = deforestation_data["loss_area_ha"]
+            doc.update(_deforestation_plot_fields(deforestation_data, coordinates, doc.area))
             doc.save(ignore_permissions=True)
+            enqueue_deforested_polygon_extraction([doc.name])
             frappe.db.commit()
             
             return {
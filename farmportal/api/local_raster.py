@@ -0,0 +1,272 @@
+"""
+Offline deforestation engine over Hansen Global Forest Change tiles.
+
+Tiles follow the Hansen 10x10 degree layout and are named by their top-left
+corner, e.g. `treecover2000_10N_080W.npy` and `lossyear_10N_080W.npy` (the
+`Hansen_GFC-2024-v1.12_` prefix of the official files is accepted too).
+Optional `ndvi_change_10N_080W.npy` tiles hold baseline NDVI minus recent NDVI
+and add the Sentinel-2 loss signal; they may use a different grid than Hansen.
+
+`.npy` tiles are opened with `mmap_mode="r"`, so only the window covering a
+plot is paged in. The compressed GeoTIFFs Hansen ships are read window by
+window through rasterio when it is installed; convert them once with
+`convert_tile_to_npy` to get the memory-mapped path.
+
+This module has no Frappe dependency so it can be driven from scripts and
+benchmarks directly.
+"""
+
+import glob
+import math
+import os
+
+from farmportal.api.geometry import normalize_ring
+
+TILE_SIZE_DEG = 10
+FOREST_COVER_THRESHOLD = 30
+LOSS_YEAR_AFTER = 20
+NDVI_LOSS_THRESHOLD = 0.25
+# Hansen pixels are ~30 m; 3x3 sub-sampling mirrors the EE reductions at scale=10.
+DEFAULT_SUPERSAMPLE = 3
+DEFAULT_SINGLE_POINT_RADIUS_M = 100.0
+EARTH_RADIUS_M = 6371008.8
+
+LAYER_TREECOVER = "treecover2000"
+LAYER_LOSSYEAR = "lossyear"
+LAYER_NDVI_CHANGE = "ndvi_change"
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise RuntimeError("numpy is required for the local deforestation backend") from e
+    return np
+
+
+def tile_name(top, left):
+    """Hansen tile suffix for a tile's top-left corner, e.g. (10, -80) -> '10N_080W'."""
+    lat = f"{abs(top):02d}{'N' if top >= 0 else 'S'}"
+    lng = f"{abs(left):03d}{'E' if left >= 0 else 'W'}"
+    return f"{lat}_{lng}"
+
+
+def convert_tile_to_npy(tif_path, out_dir=None):
+    """Convert a GeoTIFF tile to an uncompressed .npy next to it (or in out_dir)."""
+    np = _import_numpy()
+    try:
+        import rasterio
+    except ImportError as e:
+        raise RuntimeError("rasterio is required to convert GeoTIFF tiles") from e
+
+    with rasterio.open(tif_path) as dataset:
+        data = dataset.read(1)
+
+    base = os.path.splitext(os.path.basename(tif_path))[0]
+    out_path = os.path.join(out_dir or os.path.dirname(tif_path), f"{base}.npy")
+    np.save(out_path, data)
+    return out_path
+
+
+def circle_ring(np, lng, lat, radius_m, segments=64):
+    """Approximate a geodesic buffer around a point as a closed lng/lat ring."""
+    angles = np.linspace(0.0, 2.0 * math.pi, segments, endpoint=False)
+    dlat = radius_m / 111320.0
+    dlng = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+    ring = np.column_stack([lng + dlng * np.cos(angles), lat + dlat * np.sin(angles)])
+    return np.vstack([ring, ring[:1]])
+
+
+def ring_mask(np, ring, lats, lngs):
+    """Even-odd point-in-polygon mask for pixel centers (rows=lats, cols=lngs)."""
+    x1, y1 = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+
+    mask = np.zeros((len(lats), len(lngs)), dtype=bool)
+    for i, lat in enumerate(lats):
+        crosses = (y1 > lat) != (y2 > lat)
+        if not crosses.any():
+            continue
+        xa, ya, xb, yb = x1[crosses], y1[crosses], x2[crosses], y2[crosses]
+        xs = np.sort(xa + (lat - ya) * (xb - xa) / (yb - ya))
+        # A pixel is inside when an odd number of edge crossings lie to its left.
+        mask[i] = (np.searchsorted(xs, lngs, side="right") % 2) == 1
+    return mask
+
+
+def row_pixel_areas(np, row_top_lats, res_lat, res_lng):
+    """Spherical area (m2) of one pixel per row, given each row's top latitude."""
+    top = np.radians(row_top_lats)
+    bottom = np.radians(row_top_lats - res_lat)
+    return (EARTH_RADIUS_M ** 2) * math.radians(res_lng) * np.abs(np.sin(top) - np.sin(bottom))
+
+
+class _Tile:
+    def __init__(self, np, path, top, left):
+        self.path = path
+        self.top = top
+        self.left = left
+        self.array = None
+        self.dataset = None
+
+        if path.endswith(".npy"):
+            self.array = np.load(path, mmap_mode="r")
+            self.height, self.width = self.array.shape[:2]
+        else:
+            try:
+                import rasterio
+            except ImportError as e:
+                raise RuntimeError(f"rasterio is required to read {path}; convert it to .npy instead") from e
+            self.dataset = rasterio.open(path)
+            self.height, self.width = self.dataset.height, self.dataset.width
+
+        self.res_lat = TILE_SIZE_DEG / self.height
+        self.res_lng = TILE_SIZE_DEG / self.width
+
+    def read(self, np, r0, r1, c0, c1):
+        if self.array is not None:
+            return np.asarray(self.array[r0:r1, c0:c1])
+
+        from rasterio.windows import Window
+
+        return self.dataset.read(1, window=Window(c0, r0, c1 - c0, r1 - r0))
+
+    def sample(self, np, lats, lngs):
+        """Nearest-neighbour values at the given pixel-center grid."""
+        rows = np.clip(np.floor((self.top - lats) / self.res_lat).astype(np.int64), 0, self.height - 1)
+        cols = np.clip(np.floor((lngs - self.left) / self.res_lng).astype(np.int64), 0, self.width - 1)
+        r0, c0 = int(rows.min()), int(cols.min())
+        window = self.read(np, r0, int(rows.max()) + 1, c0, int(cols.max()) + 1)
+        return window[np.ix_(rows - r0, cols - c0)]
+
+
+class LocalRasterEngine:
+    """Computes forest and loss areas for plot rings from local raster tiles."""
+
+    def __init__(self, raster_dir, supersample=None):
+        self.np = _import_numpy()
+        self.raster_dir = raster_dir
+        self.supersample = max(1, int(supersample or DEFAULT_SUPERSAMPLE))
+        self._tiles = {}
+
+    def _get_tile(self, layer, top, left):
+        key = (layer, top, left)
+        if key not in self._tiles:
+            suffix = f"{layer}_{tile_name(top, left)}"
+            path = None
+            for ext in (".npy", ".tif"):
+                matches = sorted(glob.glob(os.path.join(self.raster_dir, f"*{suffix}{ext}")))
+                if matches:
+                    path = matches[0]
+                    break
+            self._tiles[key] = _Tile(self.np, path, top, left) if path else None
+        return self._tiles[key]
+
+    def _analysis_ring(self, coordinates, area_ha=None):
+        np = self.np
+        if len(coordinates) == 1:
+            lng, lat = float(coordinates[0][0]), float(coordinates[0][1])
+            try:
+                area_value = float(area_ha or 0)
+            except (TypeError, ValueError):
+                area_value = 0.0
+            # Area-based circle, matching the EE single-point buffer.
+            radius_m = math.sqrt(area_value * 10000.0 / math.pi) if area_value > 0 else DEFAULT_SINGLE_POINT_RADIUS_M
+            return circle_ring(np, lng, lat, radius_m)
+
+        ring = normalize_ring(coordinates)
+        if len(ring) < 4:
+            return None
+        return np.asarray(ring, dtype=float)
+
+    def _accumulate_tile(self, ring, bbox, top, left, totals, supersample):
+        np = self.np
+        treecover = self._get_tile(LAYER_TREECOVER, top, left)
+        lossyear = self._get_tile(LAYER_LOSSYEAR, top, left)
+        if treecover is None or lossyear is None:
+            raise FileNotFoundError(
+                f"Missing Hansen tiles for {tile_name(top, left)} in {self.raster_dir}"
+            )
+
+        min_lng, min_lat, max_lng, max_lat = bbox
+        west, east = max(min_lng, left), min(max_lng, left + TILE_SIZE_DEG)
+        south, north = max(min_lat, top - TILE_SIZE_DEG), min(max_lat, top)
+        if west >= east or south >= north:
+            return
+
+        # Sampling grid: the Hansen grid subdivided `supersample` times.
+        res_lat = treecover.res_lat / supersample
+        res_lng = treecover.res_lng / supersample
+        rows = np.arange(
+            max(int(math.floor((top - north) / res_lat)), 0),
+            min(int(math.ceil((top - south) / res_lat)), treecover.height * supersample),
+        )
+        cols = np.arange(
+            max(int(math.floor((west - left) / res_lng)), 0),
+            min(int(math.ceil((east - left) / res_lng)), treecover.width * supersample),
+        )
+        if not len(rows) or not len(cols):
+            return
+
+        lats = top - (rows + 0.5) * res_lat
+        lngs = left + (cols + 0.5) * res_lng
+        inside = ring_mask(np, ring, lats, lngs)
+        if not inside.any():
+            return
+
+        forest = (treecover.sample(np, lats, lngs) >= FOREST_COVER_THRESHOLD) & inside
+        loss_years = lossyear.sample(np, lats, lngs)
+        hansen_loss = (loss_years > LOSS_YEAR_AFTER) & forest
+
+        sentinel_loss = np.zeros_like(forest)
+        ndvi_change = self._get_tile(LAYER_NDVI_CHANGE, top, left)
+        if ndvi_change is not None:
+            sentinel_loss = (ndvi_change.sample(np, lats, lngs) > NDVI_LOSS_THRESHOLD) & forest
+
+        combined_loss = hansen_loss | sentinel_loss
+        pixel_area = row_pixel_areas(np, top - rows * res_lat, res_lat, res_lng)[:, None]
+
+        totals["forest_m2"] += float((forest * pixel_area).sum())
+        totals["loss_m2"] += float((combined_loss * pixel_area).sum())
+        totals["hansen_loss_m2"] += float((hansen_loss * pixel_area).sum())
+        totals["sentinel_loss_m2"] += float((sentinel_loss * pixel_area).sum())
+
+        hansen_loss_area = hansen_loss * pixel_area
+        by_year = totals["hansen_loss_by_year_m2"]
+        for code in np.unique(loss_years[hansen_loss]):
+            code = int(code)
+            by_year[code] = by_year.get(code, 0.0) + float(hansen_loss_area[loss_years == code].sum())
+
+    def calculate(self, coordinates, area_ha=None, supersample=None):
+        """
+        Return {"forest_m2", "loss_m2", "hansen_loss_m2", "sentinel_loss_m2",
+        "hansen_loss_by_year_m2"} for a plot, or None when the geometry is unusable.
+        `loss_m2` is the union of both sources; the per-year dict is keyed by lossyear code.
+        """
+        supersample = max(1, int(supersample or self.supersample))
+        if not coordinates:
+            return None
+        ring = self._analysis_ring(coordinates, area_ha=area_ha)
+        if ring is None:
+            return None
+
+        min_lng, min_lat = (float(v) for v in ring.min(axis=0))
+        max_lng, max_lat = (float(v) for v in ring.max(axis=0))
+        bbox = (min_lng, min_lat, max_lng, max_lat)
+
+        totals = {
+            "forest_m2": 0.0,
+            "loss_m2": 0.0,
+            "hansen_loss_m2": 0.0,
+            "sentinel_loss_m2": 0.0,
+            "hansen_loss_by_year_m2": {},
+        }
+        first_top = int(math.floor(min_lat / TILE_SIZE_DEG)) * TILE_SIZE_DEG + TILE_SIZE_DEG
+        last_top = int(math.floor(max_lat / TILE_SIZE_DEG)) * TILE_SIZE_DEG + TILE_SIZE_DEG
+        first_left = int(math.floor(min_lng / TILE_SIZE_DEG)) * TILE_SIZE_DEG
+        last_left = int(math.floor(max_lng / TILE_SIZE_DEG)) * TILE_SIZE_DEG
+
+        for top in range(first_top, last_top + 1, TILE_SIZE_DEG):
+            for left in range(first_left, last_left + 1, TILE_SIZE_DEG):
+                self._accumulate_tile(ring, bbox, top, left, totals, supersample)
+        return totals
@@ -0,0 +1,188 @@
+"""
+Minimal Mapbox Vector Tile (v2) encoder for plot layers.
+
+Only what plot tiles need: point and polygon features, string/number/bool
+attributes, one or more layers. Geometry is given in lng/lat and projected to
+Web Mercator tile coordinates here. Like geometry.py this module has no Frappe
+dependency.
+"""
+
+import math
+import struct
+
+DEFAULT_EXTENT = 4096
+
+GEOM_POINT = 1
+GEOM_POLYGON = 3
+
+_CMD_MOVE_TO = 1
+_CMD_LINE_TO = 2
+_CMD_CLOSE_PATH = 7
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_BYTES = 2
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees of tile z/x/y."""
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+class TileProjection:
+    """lng/lat -> integer tile coordinates (y down) for one tile."""
+
+    def __init__(self, z, x, y, extent=DEFAULT_EXTENT):
+        self.scale = 2 ** z
+        self.x = x
+        self.y = y
+        self.extent = extent
+
+    def __call__(self, lng, lat):
+        lat = max(min(lat, 85.0511287798), -85.0511287798)
+        mx = (lng + 180.0) / 360.0 * self.scale
+        sin_lat = math.sin(math.radians(lat))
+        my = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * self.scale
+        return (
+            int(round((mx - self.x) * self.extent)),
+            int(round((my - self.y) * self.extent)),
+        )
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, payload):
+    return _key(field, _WIRE_BYTES) + _varint(len(payload)) + payload
+
+
+def _varint_field(field, value):
+    return _key(field, _WIRE_VARINT) + _varint(value)
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b"".join(_varint(v) for v in values))
+
+
+def _command(command, count):
+    return (command & 0x7) | (count << 3)
+
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _varint_field(7, int(value))
+    if isinstance(value, int):
+        return _varint_field(6, _zigzag(value)) if value < 0 else _varint_field(5, value)
+    if isinstance(value, float):
+        return _key(3, _WIRE_FIXED64) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def _ring_area2(points):
+    total = 0
+    for i in range(len(points)):
+        x1, y1 = points[i]
+        x2, y2 = points[(i + 1) % len(points)]
+        total += x1 * y2 - x2 * y1
+    return total
+
+
+def project_ring(ring, project):
+    """Tile-space ring without duplicate or closing points; exterior winding per the spec."""
+    points = []
+    for lng, lat in ring:
+        point = project(lng, lat)
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    if len(points) < 3:
+        return None
+    area2 = _ring_area2(points)
+    if area2 == 0:
+        return None
+    # Exterior rings must have positive surveyor's area in tile coordinates (y down).
+    return points if area2 > 0 else points[::-1]
+
+
+def _encode_geometry(geom_type, points):
+    commands = []
+    cx = cy = 0
+    x, y = points[0]
+    commands += [_command(_CMD_MOVE_TO, 1), _zigzag(x - cx), _zigzag(y - cy)]
+    cx, cy = x, y
+    if geom_type == GEOM_POLYGON:
+        commands.append(_command(_CMD_LINE_TO, len(points) - 1))
+        for x, y in points[1:]:
+            commands += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+        commands.append(_command(_CMD_CLOSE_PATH, 1))
+    return commands
+
+
+class Layer:
+    """Collects features for one MVT layer; attribute keys/values are de-duplicated."""
+
+    def __init__(self, name, extent=DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self.keys = {}
+        self.values = {}
+        self.features = []
+
+    def _index(self, table, item):
+        if item not in table:
+            table[item] = len(table)
+        return table[item]
+
+    def add_feature(self, geom_type, points, properties=None):
+        """`points`: one tile-space point for GEOM_POINT, a projected ring for GEOM_POLYGON."""
+        tags = []
+        for key, value in (properties or {}).items():
+            if value is None:
+                continue
+            tags.append(self._index(self.keys, key))
+            tags.append(self._index(self.values, (type(value).__name__, value)))
+        self.features.append((geom_type, tags, _encode_geometry(geom_type, points)))
+
+    def encode(self):
+        out = [_varint_field(15, 2), _bytes_field(1, self.name.encode("utf-8"))]
+        for geom_type, tags, geometry in self.features:
+            feature = b""
+            if tags:
+                feature += _packed_field(2, tags)
+            feature += _varint_field(3, geom_type) + _packed_field(4, geometry)
+            out.append(_bytes_field(2, feature))
+        for key in self.keys:
+            out.append(_bytes_field(3, key.encode("utf-8")))
+        for _type_name, value in self.values:
+            out.append(_bytes_field(4, _encode_value(value)))
+        out.append(_varint_field(5, self.extent))
+        return b"".join(out)
+
+
+def encode_tile(layers):
+    """Serialize layers into MVT bytes; empty layers are omitted."""
+    return b"".join(_bytes_field(3, layer.encode()) for layer in layers if layer.features)
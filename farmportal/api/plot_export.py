@@ -0,0 +1,241 @@
+"""
+Streaming export of Land Plot geolocation for due diligence statements.
+
+    GET /api/method/farmportal.api.plot_export.export_plots?format=geojson
+    GET /api/method/farmportal.api.plot_export.export_plots?request_id=REQ-0001&format=csv
+
+Without `request_id` a supplier exports all of their own plots. With it, the
+plots shared in that request or purchase order are exported, for the request's
+customer or supplier. Formats: "geojson" (FeatureCollection), "ndjson" (one
+Feature per line) and "csv" (attributes plus a WKT geometry column).
+
+Rows are read through an unbuffered (server-side) cursor and written feature by
+feature to a temporary file that is then streamed to the client, so memory use
+does not grow with the size of the portfolio. Geometry is exported at full
+detail and bypasses the decode cache.
+"""
+
+import csv
+import io
+import json
+import tempfile
+
+import frappe
+from frappe import _
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+from farmportal.api.geometry import plot_coordinates
+
+EXPORT_FORMATS = {
+    "geojson": ("application/geo+json", "geojson"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+NAME_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "name", "plot_id", "farmer_name", "supplier", "country", "state_province", "area",
+    "computed_area_ha", "commodities", "deforestation_percentage", "deforested_area",
+    "custom_risk_mitigated",
+)
+GEOMETRY_COLUMNS = ("coordinates", "geometry_hash", "geometry_blob", "latitude", "longitude")
+CSV_HEADER = EXPORT_COLUMNS + ("geometry_type", "wkt")
+
+
+def _parse_commodities(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    try:
+        parsed = json.loads(value)
+        if isinstance(parsed, list):
+            return parsed
+    except Exception:
+        pass
+    return [item.strip() for item in str(value).split(",") if item.strip()]
+
+
+def _plot_geometry(row):
+    """GeoJSON geometry of a row: Polygon for rings, Point for single-coordinate plots."""
+    coordinates = plot_coordinates(row, remember=False) or []
+    if len(coordinates) >= 4:
+        return {"type": "Polygon", "coordinates": [coordinates]}
+    if len(coordinates) == 1:
+        return {"type": "Point", "coordinates": list(coordinates[0])}
+    if row.get("latitude") is not None and row.get("longitude") is not None:
+        try:
+            return {"type": "Point", "coordinates": [float(row.longitude), float(row.latitude)]}
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _feature_properties(row):
+    properties = {column: row.get(column) for column in EXPORT_COLUMNS}
+    properties["commodities"] = _parse_commodities(row.get("commodities"))
+    properties["custom_risk_mitigated"] = bool(row.get("custom_risk_mitigated"))
+    for column in ("area", "computed_area_ha", "deforestation_percentage", "deforested_area"):
+        if properties[column] is not None:
+            properties[column] = float(properties[column])
+    return properties
+
+
+def _wkt(geometry):
+    if not geometry:
+        return ""
+    if geometry["type"] == "Point":
+        return "POINT ({} {})".format(*geometry["coordinates"])
+    ring = ", ".join(f"{lng} {lat}" for lng, lat in geometry["coordinates"][0])
+    return f"POLYGON (({ring}))"
+
+
+class _GeoJSONWriter:
+    def __init__(self, out):
+        self.out = out
+        self.first = True
+        out.write(b'{"type":"FeatureCollection","features":[\n')
+
+    def write(self, feature):
+        prefix = b"" if self.first else b",\n"
+        self.first = False
+        self.out.write(prefix + json.dumps(feature, separators=(",", ":"), default=str).encode("utf-8"))
+
+    def close(self):
+        self.out.write(b"\n]}\n")
+
+
+class _NDJSONWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, feature):
+        self.out.write(json.dumps(feature, separators=(",", ":"), default=str).encode("utf-8") + b"\n")
+
+    def close(self):
+        pass
+
+
+class _CSVWriter:
+    def __init__(self, out):
+        self.out = out
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self._emit(CSV_HEADER)
+
+    def _emit(self, values):
+        self.writer.writerow(values)
+        self.out.write(self.buffer.getvalue().encode("utf-8"))
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def write(self, feature):
+        properties = feature["properties"]
+        values = [properties.get(column) for column in EXPORT_COLUMNS]
+        values[EXPORT_COLUMNS.index("commodities")] = ", ".join(str(c) for c in properties["commodities"])
+        geometry = feature["geometry"]
+        self._emit(values + [geometry["type"] if geometry else "", _wkt(geometry)])
+
+    def close(self):
+        pass
+
+
+_WRITERS = {"geojson": _GeoJSONWriter, "ndjson": _NDJSONWriter, "csv": _CSVWriter}
+
+
+def _iter_plot_rows(condition, values):
+    """Stream Land Plot rows matching `condition` through an unbuffered cursor."""
+    columns = ", ".join(f"`{column}`" for column in EXPORT_COLUMNS + GEOMETRY_COLUMNS)
+    # No other query may run on the connection while the unbuffered result is open.
+    with frappe.db.unbuffered_cursor():
+        yield from frappe.db.sql(
+            f"SELECT {columns} FROM `tabLand Plot` WHERE {condition} ORDER BY name",
+            values,
+            as_dict=True,
+            as_iterator=True,
+        )
+
+
+def _export_sources(request_id=None):
+    """Resolve what the session user may export: (filename stem, list of (condition, values))."""
+    from farmportal.api.requests import (
+        _get_party_from_user,
+        _parse_request_plot_ids,
+        _require_customer_request_permission,
+        _resolve_supplier_plot_names,
+    )
+
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw(_("Not logged in"), frappe.PermissionError)
+    customer, supplier = _get_party_from_user(user)
+
+    if not request_id:
+        if not supplier:
+            frappe.throw(_("Only Suppliers can export their land plots"), frappe.PermissionError)
+        return supplier, [("supplier = %(supplier)s AND docstatus != 2", {"supplier": supplier})]
+
+    request_doc = frappe.get_doc("Request", request_id)
+    if customer and request_doc.customer == customer:
+        _require_customer_request_permission(user, customer, request_type=request_doc.request_type)
+        if request_doc.request_type == "purchase_order" and request_doc.status != "Accepted":
+            frappe.throw(_("Purchase order not yet accepted by supplier"))
+    elif not (supplier and request_doc.supplier == supplier):
+        frappe.throw(_("Not authorized to export this request"), frappe.PermissionError)
+
+    # Only plots owned by the request's supplier, like the request plot views.
+    plot_names = _resolve_supplier_plot_names(
+        request_doc.supplier, _parse_request_plot_ids(request_doc.as_dict())
+    )
+    sources = [
+        ("name IN %(names)s", {"names": tuple(plot_names[offset:offset + NAME_CHUNK_SIZE])})
+        for offset in range(0, len(plot_names), NAME_CHUNK_SIZE)
+    ]
+    return request_doc.name, sources
+
+
+def write_plot_export(out, sources, export_format):
+    """Write every plot of `sources` to the binary file `out`; returns the feature count."""
+    writer = _WRITERS[export_format](out)
+    count = 0
+    for condition, values in sources:
+        for row in _iter_plot_rows(condition, values):
+            writer.write({
+                "type": "Feature",
+                "id": row.name,
+                "geometry": _plot_geometry(row),
+                "properties": _feature_properties(row),
+            })
+            count += 1
+    writer.close()
+    return count
+
+
+@frappe.whitelist(methods=["GET"])
+def export_plots(format="geojson", request_id=None):
+    """Download the user's plots, or those of `request_id`, as GeoJSON, NDJSON or CSV."""
+    export_format = str(format or "geojson").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        frappe.throw(_("format must be one of: {0}").format(", ".join(EXPORT_FORMATS)))
+
+    stem, sources = _export_sources(request_id)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+
+    out = tempfile.TemporaryFile()
+    try:
+        count = write_plot_export(out, sources, export_format)
+        out.seek(0)
+    except Exception:
+        out.close()
+        raise
+
+    response = Response(
+        wrap_file(frappe.local.request.environ, out),
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    filename = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in f"plots-{stem}.{extension}")
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["X-Plot-Count"] = str(count)
+    return response
@@ -0,0 +1,742 @@
+"""
+Bulk creation of Land Plots.
+
+`bulk_insert_plots` is the fast path behind bulk_create_land_plots. Instead of
+one `doc.insert` and commit per plot it
+
+- reads the supplier's existing plot_id values once and allocates unique IDs in memory,
+- validates and prepares every row in Python: mandatory fields as doc.insert checks
+  them, plus the geometry columns and area_mismatch exactly as the Land Plot
+  controller would set them,
+- names every row through Frappe's set_new_name, the path doc.insert takes, so
+  bulk plots continue the same PLOT-<year>-NNNNN counter,
+- writes plots and their Land Plot Product rows with multi-row inserts, one
+  transaction per chunk.
+
+A chunk the database rejects is rolled back and retried row by row, so a single
+bad row is reported without losing the rest of the chunk.
+
+Large uploads run as a background job attached to a "Land Plot Import" doc
+(`start_plot_import`). The job streams the rows from the posted rows file or the
+uploaded source file (see plot_parsers) through a staged pipeline
+(plot_import_pipeline): rows are parsed, normalized and checked for duplicates
+on worker threads while the job inserts them chunk by chunk and queues their
+deforestation analysis. `processed_rows`, the created/failed counters, the
+failed rows (Land Plot Import Error) and the stage counters are written in the
+same transaction as each chunk's plots, so a job that dies is resumed from the
+last committed row without duplicating plots. `resume_stalled_plot_imports` (scheduler) re-queues imports
+whose worker stopped reporting progress.
+"""
+
+import json
+import re
+import uuid
+from datetime import datetime
+from functools import partial
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.model import no_value_fields
+from frappe.model.naming import set_new_name
+from frappe.utils import add_to_date, cint, flt, now_datetime, time_diff_in_seconds
+
+from farmportal.api import shared_cache
+from farmportal.api.geometry import (
+    MAX_PLOT_LAT_SPAN_DEG,
+    exceeds_max_plot_span,
+    is_area_mismatch,
+    plot_geometry_fields,
+)
+from farmportal.api.plot_parsers import (
+    FORMAT_JSON,
+    PARSE_ERROR_KEY,
+    PlotFileError,
+    detect_format,
+    iter_plot_rows,
+)
+from farmportal.api.plot_tiles import invalidate_plot_tiles
+
+PLOT_INSERT_CHUNK_SIZE = 500
+PLOT_ID_SUFFIX_ATTEMPTS = 99
+
+PLOT_IMPORT_DOCTYPE = "Land Plot Import"
+PLOT_IMPORT_ERROR_DOCTYPE = "Land Plot Import Error"
+PLOT_IMPORT_CHUNK_SIZE = 500
+PLOT_IMPORT_JOB_TIMEOUT_SEC = 6 * 60 * 60
+# The running job refreshes its lock after every chunk; an import without progress
+# for longer than this has lost its worker.
+PLOT_IMPORT_LOCK_TTL_SEC = 15 * 60
+PLOT_IMPORT_STALL_SEC = 20 * 60
+PLOT_IMPORT_ACTIVE_STATUSES = ("Queued", "Running")
+PLOT_IMPORT_ERRORS_MAX_LIMIT = 1000
+PLOT_IMPORT_STAGE_STATS_TTL_SEC = 24 * 60 * 60
+
+
+def clean_plot_id(base_id):
+    return re.sub(r"[^a-zA-Z0-9-_]", "", str(base_id or "").strip())
+
+
+class PlotIdAllocator:
+    """Supplier-scoped unique plot_id allocation against one snapshot of existing IDs."""
+
+    def __init__(self, supplier, plot_ids=None):
+        if plot_ids is None:
+            plot_ids = frappe.db.sql_list(
+                "SELECT plot_id FROM `tabLand Plot` WHERE supplier = %s AND plot_id IS NOT NULL",
+                (supplier,),
+            )
+        self.taken = set(plot_ids)
+
+    def allocate(self, base_id=None):
+        """Same rules as generate_unique_plot_id: the cleaned ID, then -01..-99, then a random ID."""
+        clean_id = clean_plot_id(base_id)
+        candidates = []
+        if clean_id:
+            candidates.append(clean_id)
+            candidates.extend(f"{clean_id}-{i:02d}" for i in range(1, PLOT_ID_SUFFIX_ATTEMPTS + 1))
+        for candidate in candidates:
+            if candidate not in self.taken:
+                self.taken.add(candidate)
+                return candidate
+
+        while True:
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            candidate = f"PLOT-{timestamp}-{str(uuid.uuid4())[:8].upper()}"
+            if candidate not in self.taken:
+                self.taken.add(candidate)
+                return candidate
+
+
+def _optional_float(value, label):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        frappe.throw(_("{0} must be a number").format(label))
+
+
+def _load_item_names(plots):
+    product_ids = {product for plot in plots for product in (plot.get("products") or []) if product}
+    if not product_ids:
+        return {}
+    rows = frappe.db.sql(
+        "SELECT name, item_name FROM `tabItem` WHERE name IN %(names)s",
+        {"names": tuple(product_ids)},
+    )
+    return dict(rows)
+
+
+def prepare_plot_row(plot_data, supplier, plot_id, deforestation_data=None, item_names=None,
+                     area_tolerance=None, has_plot_name=False, geometry=None):
+    """
+    Column values for one new Land Plot and its product IDs, validated in Python.
+    Mirrors create_single_plot_internal plus the Land Plot controller's validate().
+    `geometry` takes plot_geometry_fields output computed ahead of time (import pipeline).
+    """
+    from farmportal.api.landplots import _deforestation_plot_fields
+    from farmportal.farmportal.doctype.land_plot.land_plot import get_area_mismatch_tolerance
+
+    if not isinstance(plot_data, dict):
+        frappe.throw(_("Plot data must be an object"))
+    if plot_data.get(PARSE_ERROR_KEY):
+        frappe.throw(plot_data[PARSE_ERROR_KEY])
+
+    area_value = _optional_float(plot_data.get("area"), _("Area")) or 0.0
+    plot_label = (
+        plot_data.get("farmer_name")
+        or plot_data.get("name")
+        or plot_data.get("plot_name")
+        or "Unnamed Plot"
+    )
+    commodities = plot_data.get("commodities") or []
+    if isinstance(commodities, str):
+        commodities = [c.strip() for c in commodities.split(",") if c.strip()]
+
+    values = {
+        "plot_id": plot_id,
+        "farmer_name": plot_label,
+        "state_province": plot_data.get("state_province", ""),
+        "supplier": supplier,
+        "country": plot_data.get("country", ""),
+        "area": area_value,
+        "yield_dried_mt": _optional_float(plot_data.get("yield_dried_mt"), _("Yield")),
+        "latitude": _optional_float(plot_data.get("latitude") or None, _("Latitude")),
+        "longitude": _optional_float(plot_data.get("longitude") or None, _("Longitude")),
+        "geojson": json.dumps(plot_data.get("geojson")) if plot_data.get("geojson") else None,
+        "commodities": ",".join(commodities),
+        "deforestation_percentage": deforestation_data["deforestation_percent"] if deforestation_data else 0,
+        "deforested_area": deforestation_data["loss_area_ha"] if deforestation_data else 0,
+        "deforested_polygons": None,
+    }
+    if has_plot_name:
+        values["plot_name"] = plot_label
+
+    coordinates = plot_data.get("coordinates")
+    if isinstance(coordinates, str):
+        try:
+            coordinates = json.loads(coordinates)
+        except Exception:
+            frappe.throw(_("Coordinates are not valid JSON"))
+    values.update(geometry if geometry is not None else plot_geometry_fields(coordinates or None))
+    if coordinates and not values["coordinates"]:
+        frappe.throw(_("Coordinates do not describe a point or polygon"))
+    if exceeds_max_plot_span(values):
+        frappe.throw(_("Plot geometry spans more than {0} degrees of latitude").format(MAX_PLOT_LAT_SPAN_DEG))
+
+    if deforestation_data:
+        values.update(_deforestation_plot_fields(
+            deforestation_data,
+            coordinates,
+            area_value if area_value > 0 else None,
+        ))
+
+    missing = _missing_mandatory_field(values)
+    if missing:
+        frappe.throw(
+            _("Error: Value missing for {0}: {1}").format(_("Land Plot"), _(missing)),
+            frappe.MandatoryError,
+        )
+
+    if area_tolerance is None:
+        area_tolerance = get_area_mismatch_tolerance()
+    values["area_mismatch"] = int(is_area_mismatch(area_value, values["computed_area_ha"], area_tolerance))
+
+    products = [product for product in (plot_data.get("products") or []) if product]
+    if item_names is not None:
+        for product in products:
+            if product not in item_names:
+                frappe.throw(_("Could not find Product: {0}").format(product), frappe.LinkValidationError)
+    return values, products
+
+
+def _reserve_plot_names(rows):
+    """Names for prepared rows, set exactly as doc.insert sets them (autoname, naming rules, series)."""
+    names = []
+    for _index, values, _products, _stats in rows:
+        doc = frappe.new_doc("Land Plot")
+        doc.update(values)
+        set_new_name(doc)
+        names.append(doc.name)
+    return names
+
+
+def _column_defaults(columns):
+    """Value doc.insert stores for a column left unset: the field default, 0 for numbers."""
+    meta = frappe.get_meta("Land Plot")
+    defaults = {}
+    for field in columns:
+        df = meta.get_field(field)
+        default = df.default if df else None
+        if df and df.fieldtype in ("Int", "Check"):
+            default = cint(default)
+        elif df and df.fieldtype in ("Float", "Currency", "Percent"):
+            default = flt(default)
+        defaults[field] = default
+    return defaults
+
+
+def _missing_mandatory_field(values):
+    """Label of the first `reqd` Land Plot field left empty, as doc.insert would reject."""
+    for df in frappe.get_meta("Land Plot").get("fields", {"reqd": 1}):
+        if df.fieldtype in no_value_fields:
+            continue
+        value = values.get(df.fieldname)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return df.label or df.fieldname
+    return None
+
+
+def _insert_rows(rows, item_names):
+    """Multi-row insert of prepared (index, values, products, stats) rows; returns created results."""
+    now = now_datetime()
+    user = frappe.session.user
+    standard = {"owner": user, "modified_by": user, "creation": now, "modified": now, "docstatus": 0}
+
+    # Rows with and without analysis results carry different columns; unset ones get the field default.
+    columns = list(dict.fromkeys(field for row in rows for field in row[1]))
+    defaults = _column_defaults(columns)
+    names = _reserve_plot_names(rows)
+    plot_values = []
+    product_values = []
+    created = []
+    for name, (_index, values, products, stats) in zip(names, rows):
+        plot_values.append([
+            *standard.values(), name,
+            *(defaults[field] if values.get(field) is None else values[field] for field in columns),
+        ])
+        for idx, product in enumerate(products, start=1):
+            product_values.append([
+                *standard.values(), frappe.generate_hash(length=10), name, "Land Plot", "products",
+                idx, product, (item_names or {}).get(product),
+            ])
+        created.append({"name": name, "plot_id": values["plot_id"], "deforestation_data": stats})
+
+    frappe.db.bulk_insert("Land Plot", list(standard) + ["name"] + columns, plot_values)
+    if product_values:
+        frappe.db.bulk_insert(
+            "Land Plot Product",
+            list(standard) + ["name", "parent", "parenttype", "parentfield", "idx", "product", "product_name"],
+            product_values,
+        )
+    return created
+
+
+def _failure(index, plot_data, error):
+    plot_ref = plot_data.get("id", f"Plot_{index + 1}") if isinstance(plot_data, dict) else f"Plot_{index + 1}"
+    return {"row": index, "plot_id": plot_ref, "error": str(error)}
+
+
+def bulk_insert_plots(plots, supplier, deforestation_stats=None, chunk_size=PLOT_INSERT_CHUNK_SIZE,
+                      on_commit=None, allocator=None, geometries=None):
+    """
+    Create many Land Plots for `supplier`. `deforestation_stats` is aligned with `plots`
+    (None entries for unanalyzed plots). Commits per chunk and returns
+    {"created_plots": [{name, plot_id, deforestation_data}], "failed_plots": [{row, plot_id, error}]}.
+
+    `on_commit(created, failed, next_row)` runs inside each transaction right before it
+    is committed, with the outcomes being committed and the index of the first row not
+    yet settled, so callers can checkpoint progress atomically with the inserted rows.
+    Pass an `allocator` to share one plot_id snapshot across calls, and `geometries`
+    (aligned with `plots`) when the geometry columns were already computed.
+    """
+    from farmportal.farmportal.doctype.land_plot.land_plot import get_area_mismatch_tolerance
+
+    plots = list(plots or [])
+    stats = list(deforestation_stats or [None] * len(plots))
+    geometries = list(geometries or [None] * len(plots))
+    allocator = allocator or PlotIdAllocator(supplier)
+    item_names = _load_item_names([plot for plot in plots if isinstance(plot, dict)])
+    has_plot_name = frappe.get_meta("Land Plot").has_field("plot_name")
+    tolerance = get_area_mismatch_tolerance()
+
+    prepared = []
+    invalid = []
+    for index, plot_data in enumerate(plots):
+        try:
+            plot_id = allocator.allocate(plot_data.get("id") if isinstance(plot_data, dict) else None)
+            values, products = prepare_plot_row(
+                plot_data,
+                supplier,
+                plot_id,
+                deforestation_data=stats[index],
+                item_names=item_names,
+                area_tolerance=tolerance,
+                has_plot_name=has_plot_name,
+                geometry=geometries[index],
+            )
+            prepared.append((index, values, products, stats[index]))
+        except Exception as e:
+            invalid.append(_failure(index, plot_data, e))
+
+    created = []
+    failed = []
+
+    def commit(created_rows, failed_rows, next_row):
+        # Validation failures are settled together with the rows around them.
+        settled = [failure for failure in invalid if failure["row"] < next_row]
+        failed_rows = settled + failed_rows
+        if on_commit:
+            on_commit(created_rows, failed_rows, next_row)
+        frappe.db.commit()
+        del invalid[:len(settled)]
+        created.extend(created_rows)
+        failed.extend(failed_rows)
+
+    chunk_size = max(1, cint(chunk_size))
+    for offset in range(0, len(prepared), chunk_size):
+        chunk = prepared[offset:offset + chunk_size]
+        try:
+            commit(_insert_rows(chunk, item_names), [], chunk[-1][0] + 1)
+            continue
+        except Exception:
+            frappe.db.rollback()
+
+        # Isolate the rows the database rejected.
+        for row in chunk:
+            try:
+                commit(_insert_rows([row], item_names), [], row[0] + 1)
+            except Exception as e:
+                frappe.db.rollback()
+                commit([], [_failure(row[0], plots[row[0]], e)], row[0] + 1)
+
+    if invalid or on_commit:
+        commit([], [], len(plots))
+
+    if created:
+        invalidate_plot_tiles(suppliers=[supplier])
+    failed.sort(key=lambda failure: failure["row"])
+    return {"created_plots": created, "failed_plots": failed}
+
+
+class PlotImportLockLost(Exception):
+    pass
+
+
+def _import_lock_key(import_name):
+    return f"plot_import::{import_name}"
+
+
+def _iter_import_rows(doc):
+    """Stream plot rows from the import's rows file, or else its uploaded source file."""
+    file_url = doc.rows_file or doc.source_file
+    if not file_url:
+        frappe.throw(_("Import {0} has no rows to import").format(doc.name))
+    file_doc = frappe.get_doc("File", {"file_url": file_url})
+    file_format = FORMAT_JSON if doc.rows_file else None
+    return iter_plot_rows(file_doc.get_full_path(), file_name=file_doc.file_name, file_format=file_format)
+
+
+def _stage_stats_cache_key(import_name):
+    return f"plot_import_stages::{import_name}"
+
+
+def _publish_stage_stats(import_name, snapshot):
+    try:
+        frappe.cache().set_value(
+            _stage_stats_cache_key(import_name), snapshot, expires_in_sec=PLOT_IMPORT_STAGE_STATS_TTL_SEC
+        )
+    except Exception:
+        pass
+
+
+def _record_import_progress(import_name, offset, created, failed, next_row, stage_stats=None):
+    """on_commit hook: checkpoint, counters and failed rows, written in the chunk's own transaction."""
+    if failed:
+        now = now_datetime()
+        user = frappe.session.user
+        frappe.db.bulk_insert(
+            PLOT_IMPORT_ERROR_DOCTYPE,
+            ["name", "owner", "modified_by", "creation", "modified", "docstatus",
+             "plot_import", "row", "plot_id", "error"],
+            [
+                [frappe.generate_hash(length=10), user, user, now, now, 0,
+                 import_name, offset + failure["row"] + 1, str(failure["plot_id"] or "")[:140], failure["error"]]
+                for failure in failed
+            ],
+        )
+    frappe.db.sql(
+        f"""
+        UPDATE `tab{PLOT_IMPORT_DOCTYPE}`
+        SET processed_rows = %(processed)s,
+            created_plots = COALESCE(created_plots, 0) + %(created)s,
+            failed_rows = COALESCE(failed_rows, 0) + %(failed)s,
+            stage_stats = COALESCE(%(stage_stats)s, stage_stats),
+            last_progress_on = %(now)s
+        WHERE name = %(name)s
+        """,
+        {
+            "processed": offset + next_row,
+            "created": len(created),
+            "failed": len(failed),
+            "stage_stats": json.dumps(stage_stats()) if stage_stats else None,
+            "now": now_datetime(),
+            "name": import_name,
+        },
+    )
+
+
+def _set_import_fields(import_name, **values):
+    frappe.db.set_value(PLOT_IMPORT_DOCTYPE, import_name, values, update_modified=False)
+
+
+def _count_import_rows(doc, heartbeat):
+    """Counting pass (bounded memory like the import itself) that keeps the job's lock alive."""
+    total = 0
+    for _row in _iter_import_rows(doc):
+        total += 1
+        if total % PLOT_IMPORT_CHUNK_SIZE == 0:
+            heartbeat()
+    return total
+
+
+def run_plot_import(import_name):
+    """Background job: import the rows of a Land Plot Import, continuing from its checkpoint."""
+    from farmportal.api.landplots import enqueue_plot_analysis
+    from farmportal.api.plot_import_pipeline import PlotImportPipeline
+
+    lock_key = _import_lock_key(import_name)
+    lock_token = frappe.generate_hash(length=20)
+    if not shared_cache._acquire(lock_key, ttl=PLOT_IMPORT_LOCK_TTL_SEC, token=lock_token):
+        return
+
+    def heartbeat():
+        if not shared_cache._extend(lock_key, PLOT_IMPORT_LOCK_TTL_SEC, token=lock_token):
+            raise PlotImportLockLost(import_name)
+
+    try:
+        doc = frappe.get_doc(PLOT_IMPORT_DOCTYPE, import_name)
+        if doc.status not in PLOT_IMPORT_ACTIVE_STATUSES:
+            return
+
+        total = cint(doc.total_plots) or _count_import_rows(doc, heartbeat)
+        start = cint(doc.processed_rows)
+        _set_import_fields(
+            import_name,
+            status="Running",
+            total_plots=total,
+            started_on=doc.started_on or now_datetime(),
+            last_progress_on=now_datetime(),
+        )
+        frappe.db.commit()
+
+        existing = frappe.db.sql(
+            "SELECT name, plot_id, geometry_hash FROM `tabLand Plot` WHERE supplier = %s",
+            (doc.supplier,),
+            as_dict=True,
+        )
+        allocator = PlotIdAllocator(doc.supplier, plot_ids=[row.plot_id for row in existing if row.plot_id])
+        pipeline = None
+
+        def insert_chunk(offset, plots, geometries):
+            result = bulk_insert_plots(
+                plots,
+                doc.supplier,
+                on_commit=partial(_record_import_progress, import_name, offset, stage_stats=pipeline.snapshot),
+                allocator=allocator,
+                geometries=geometries,
+            )
+            heartbeat()
+            return result
+
+        def analyze(plot_names):
+            enqueue_plot_analysis(plot_names)
+            frappe.db.commit()
+
+        pipeline = PlotImportPipeline(
+            islice(_iter_import_rows(doc), start, None),
+            start,
+            insert_chunk,
+            existing_plots=existing,
+            on_inserted=analyze if cint(doc.calculate_deforestation) else None,
+            on_stats=partial(_publish_stage_stats, import_name),
+            chunk_size=PLOT_IMPORT_CHUNK_SIZE,
+        )
+        pipeline.run()
+
+        created, failed = frappe.db.get_value(
+            PLOT_IMPORT_DOCTYPE, import_name, ["created_plots", "failed_rows"]
+        )
+        _set_import_fields(
+            import_name,
+            status="Imported",
+            finished_on=now_datetime(),
+            log=_("{0} plots created, {1} rows failed").format(cint(created), cint(failed)),
+        )
+        frappe.db.commit()
+    except PlotImportLockLost:
+        # Another worker took the import over after our lock expired; leave it to that job.
+        frappe.db.rollback()
+    except PlotFileError as e:
+        frappe.db.rollback()
+        _set_import_fields(import_name, status="Failed", log=str(e))
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f"Plot import failed: {import_name}")
+        _set_import_fields(
+            import_name,
+            status="Failed",
+            log=_("Import stopped with an error; resume it to continue from the last committed row"),
+        )
+        frappe.db.commit()
+    finally:
+        shared_cache._release(lock_key, token=lock_token)
+
+
+def enqueue_plot_import(import_name):
+    frappe.enqueue(
+        "farmportal.api.plot_import.run_plot_import",
+        queue="long",
+        timeout=PLOT_IMPORT_JOB_TIMEOUT_SEC,
+        job_id=_import_lock_key(import_name),
+        deduplicate=True,
+        enqueue_after_commit=True,
+        import_name=import_name,
+    )
+
+
+def resume_stalled_plot_imports():
+    """Scheduler: re-queue active imports whose worker stopped reporting progress."""
+    stalled_before = add_to_date(now_datetime(), seconds=-PLOT_IMPORT_STALL_SEC)
+    names = frappe.get_all(
+        PLOT_IMPORT_DOCTYPE,
+        filters={
+            "status": ["in", PLOT_IMPORT_ACTIVE_STATUSES],
+            "last_progress_on": ["<", stalled_before],
+        },
+        pluck="name",
+    )
+    for name in names:
+        enqueue_plot_import(name)
+
+
+def _get_import_for_user(name):
+    from farmportal.api.landplots import _get_party_from_user
+    from farmportal.api.organization_profile import (
+        SUPPLIER_PERMISSION_PLOT_MANAGER,
+        _require_supplier_permission,
+    )
+
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw(_("Not logged in"), frappe.PermissionError)
+    _customer, supplier = _get_party_from_user(user)
+    if not supplier:
+        frappe.throw(_("Only Suppliers can upload"), frappe.PermissionError)
+    _require_supplier_permission(
+        user,
+        SUPPLIER_PERMISSION_PLOT_MANAGER,
+        supplier_hint=supplier,
+        message=_("You are not allowed to manage land plots"),
+    )
+    if not name:
+        return None, supplier
+    doc = frappe.get_doc(PLOT_IMPORT_DOCTYPE, name)
+    if doc.supplier != supplier:
+        frappe.throw(_("Access denied"), frappe.PermissionError)
+    return doc, supplier
+
+
+def _attach_rows_file(doc, plots_data):
+    content = plots_data if isinstance(plots_data, str) else json.dumps(plots_data)
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": f"{doc.name}-rows.json",
+        "attached_to_doctype": PLOT_IMPORT_DOCTYPE,
+        "attached_to_name": doc.name,
+        "attached_to_field": "rows_file",
+        "is_private": 1,
+        "content": content,
+    })
+    file_doc.insert(ignore_permissions=True)
+    return file_doc.file_url
+
+
+@frappe.whitelist(methods=["POST"])
+def start_plot_import(plots_data=None, import_name=None, calculate_deforestation=True):
+    """
+    Queue a background import and return at once. `plots_data` is the JSON array
+    bulk_create_land_plots accepts; `import_name` continues a doc from begin_import.
+    Without `plots_data` the doc's source_file (CSV, GeoJSON, KML/KMZ or zipped
+    Shapefile) is parsed on the server. Poll get_plot_import_status for progress.
+    """
+    doc, supplier = _get_import_for_user(import_name)
+    if doc is None:
+        doc = frappe.get_doc({"doctype": PLOT_IMPORT_DOCTYPE, "supplier": supplier, "status": "Draft"})
+        doc.insert(ignore_permissions=True)
+    elif doc.status in PLOT_IMPORT_ACTIVE_STATUSES:
+        frappe.throw(_("Import {0} is already running").format(doc.name))
+    elif doc.status == "Imported":
+        frappe.throw(_("Import {0} has already been imported").format(doc.name))
+
+    if plots_data:
+        doc.rows_file = _attach_rows_file(doc, plots_data)
+    if not (doc.rows_file or doc.source_file):
+        frappe.throw(_("Nothing to import"))
+    if not doc.rows_file:
+        file_name = frappe.db.get_value("File", {"file_url": doc.source_file}, "file_name") or doc.source_file
+        try:
+            detect_format(file_name)
+        except PlotFileError as e:
+            frappe.throw(str(e))
+
+    doc.update({
+        "calculate_deforestation": cint(calculate_deforestation),
+        "status": "Queued",
+        "total_plots": 0,
+        "processed_rows": 0,
+        "created_plots": 0,
+        "failed_rows": 0,
+        "log": None,
+        "started_on": None,
+        "finished_on": None,
+        "last_progress_on": now_datetime(),
+    })
+    doc.save(ignore_permissions=True)
+    frappe.db.delete(PLOT_IMPORT_ERROR_DOCTYPE, {"plot_import": doc.name})
+    enqueue_plot_import(doc.name)
+    frappe.db.commit()
+    return {"name": doc.name, "status": doc.status}
+
+
+@frappe.whitelist(methods=["POST"])
+def resume_plot_import(name):
+    """Re-queue a failed or stalled import; it continues after the last committed row."""
+    doc, _supplier = _get_import_for_user(name)
+    if doc.status == "Imported":
+        frappe.throw(_("Import {0} has already been imported").format(doc.name))
+    if doc.status == "Draft":
+        frappe.throw(_("Import {0} has not been started").format(doc.name))
+    _set_import_fields(doc.name, status="Queued", last_progress_on=now_datetime())
+    enqueue_plot_import(doc.name)
+    frappe.db.commit()
+    return {"name": doc.name, "status": "Queued"}
+
+
+def _import_stage_stats(doc):
+    """Live pipeline counters from Redis, else those saved with the last checkpoint."""
+    stats = None
+    if doc.status in PLOT_IMPORT_ACTIVE_STATUSES:
+        try:
+            stats = frappe.cache().get_value(_stage_stats_cache_key(doc.name))
+        except Exception:
+            stats = None
+    if stats is None and doc.stage_stats:
+        try:
+            stats = json.loads(doc.stage_stats)
+        except ValueError:
+            stats = None
+    return stats
+
+
+@frappe.whitelist()
+def get_plot_import_status(name):
+    """Progress of an import: counts, rows per second and an ETA in seconds."""
+    doc, _supplier = _get_import_for_user(name)
+    processed = cint(doc.processed_rows)
+    total = cint(doc.total_plots)
+    rate = None
+    eta_seconds = None
+    if doc.started_on and doc.last_progress_on and processed:
+        elapsed = time_diff_in_seconds(doc.last_progress_on, doc.started_on)
+        if elapsed > 0:
+            rate = processed / elapsed
+            if doc.status in PLOT_IMPORT_ACTIVE_STATUSES and total:
+                eta_seconds = int(max(total - processed, 0) / rate)
+    return {
+        "name": doc.name,
+        "status": doc.status,
+        "total_plots": total,
+        "processed_rows": processed,
+        "created_plots": cint(doc.created_plots),
+        "failed_rows": cint(doc.failed_rows),
+        "rows_per_second": rate,
+        "eta_seconds": eta_seconds,
+        "started_on": doc.started_on,
+        "last_progress_on": doc.last_progress_on,
+        "finished_on": doc.finished_on,
+        "log": doc.log,
+        "stages": _import_stage_stats(doc),
+    }
+
+
+@frappe.whitelist()
+def get_plot_import_errors(name, start=0, limit=100):
+    """Failed rows of an import as {row, plot_id, error}, in row order."""
+    doc, _supplier = _get_import_for_user(name)
+    start = max(cint(start), 0)
+    limit = min(max(cint(limit), 1), PLOT_IMPORT_ERRORS_MAX_LIMIT)
+    errors = frappe.db.sql(
+        f"""
+        SELECT `row`, plot_id, error
+        FROM `tab{PLOT_IMPORT_ERROR_DOCTYPE}`
+        WHERE plot_import = %(name)s
+        ORDER BY `row`
+        LIMIT %(limit)s OFFSET %(start)s
+        """,
+        {"name": doc.name, "limit": limit, "start": start},
+        as_dict=True,
+    )
+    return {"errors": errors, "total": cint(doc.failed_rows)}
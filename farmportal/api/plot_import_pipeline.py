@@ -0,0 +1,326 @@
+"""
+Staged pipeline behind plot import jobs.
+
+    parse -> normalize -> dedupe -> insert -> analyze (enqueue)
+
+Parse, normalize and dedupe are pure Python and run on their own threads. The
+insert stage runs on the job's main thread, the only one with a Frappe database
+connection. Stages are connected by bounded queues, so a slow stage blocks the
+ones before it (backpressure) and only a few chunks of rows are in memory at any
+time. Deforestation analysis does not run inline: every committed chunk is
+handed to analyze_plots_job on the long queue, so Earth Engine calls for earlier
+chunks run on other workers while later chunks are still being inserted.
+
+Rows keep their file order through every stage, which keeps the per-chunk
+checkpoints of plot_import valid. Each stage counts rows in/out, errors and the
+time it spent working or blocked on its neighbours; `snapshot()` reports them
+together with the queue depths, so a stuck import shows which stage holds it up.
+"""
+
+import queue
+import re
+import threading
+import time
+
+from farmportal.api.geometry import plot_geometry_fields
+from farmportal.api.plot_import import clean_plot_id
+from farmportal.api.plot_parsers import PARSE_ERROR_KEY
+
+STAGE_PARSE = "parse"
+STAGE_NORMALIZE = "normalize"
+STAGE_DEDUPE = "dedupe"
+STAGE_INSERT = "insert"
+STAGE_ANALYZE = "analyze"
+STAGES = (STAGE_PARSE, STAGE_NORMALIZE, STAGE_DEDUPE, STAGE_INSERT, STAGE_ANALYZE)
+
+# Each queue holds this many insert chunks' worth of rows.
+QUEUE_CHUNKS = 2
+STAGE_POLL_SEC = 0.5
+STATS_PUBLISH_SEC = 2.0
+THREAD_JOIN_TIMEOUT_SEC = 10
+
+_END = object()
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+class StageCounters:
+    """Counters of one stage, written only by the thread running it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = "pending"
+        self.rows_in = 0
+        self.rows_out = 0
+        self.errors = 0
+        self.busy_sec = 0.0
+        self.input_wait_sec = 0.0
+        self.output_wait_sec = 0.0
+
+    def snapshot(self, elapsed, input_queue=None):
+        return {
+            "stage": self.name,
+            "state": self.state,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "errors": self.errors,
+            "rows_per_second": round(self.rows_out / elapsed, 2) if elapsed > 0 else None,
+            "busy_sec": round(self.busy_sec, 2),
+            "input_wait_sec": round(self.input_wait_sec, 2),
+            "output_wait_sec": round(self.output_wait_sec, 2),
+            "queued": input_queue.qsize() if input_queue is not None else None,
+        }
+
+
+class _KnownPlots:
+    """(plot_id, geometry_hash) pairs already imported, to skip re-uploaded rows."""
+
+    def __init__(self, existing_plots):
+        self.by_hash = {}
+        for plot in existing_plots or []:
+            if plot.get("plot_id") and plot.get("geometry_hash"):
+                self.add(plot["geometry_hash"], plot["plot_id"], f"plot {plot['name']}")
+
+    def add(self, geometry_hash, plot_id, label):
+        self.by_hash.setdefault(geometry_hash, []).append((plot_id, label))
+
+    def find(self, geometry_hash, plot_id):
+        # Plots re-imported under a taken ID got an "-01" style suffix from the allocator.
+        suffixed = re.compile(re.escape(plot_id) + r"-\d{2,3}")
+        for known_id, label in self.by_hash.get(geometry_hash, ()):
+            if known_id == plot_id or suffixed.fullmatch(known_id):
+                return label
+        return None
+
+
+class PlotImportPipeline:
+    """
+    Runs `rows` (plot dicts, starting at row `start_row`) through the stages.
+    `insert_chunk(offset, plots, geometries)` writes one chunk on the calling thread
+    and returns bulk_insert_plots' result; `on_inserted(names)` queues analysis for
+    created plots; `on_stats(snapshot)` is called periodically with the counters.
+    """
+
+    def __init__(self, rows, start_row, insert_chunk, existing_plots=None, on_inserted=None,
+                 on_stats=None, chunk_size=500):
+        self.rows = rows
+        self.start_row = start_row
+        self.insert_chunk = insert_chunk
+        self.on_inserted = on_inserted
+        self.on_stats = on_stats
+        self.chunk_size = max(1, int(chunk_size))
+        self.known = _KnownPlots(existing_plots)
+
+        size = self.chunk_size * QUEUE_CHUNKS
+        self.queues = {
+            STAGE_NORMALIZE: queue.Queue(maxsize=size),
+            STAGE_DEDUPE: queue.Queue(maxsize=size),
+            STAGE_INSERT: queue.Queue(maxsize=size),
+        }
+        self.counters = {name: StageCounters(name) for name in STAGES}
+        self._stop = threading.Event()
+        self._errors = []
+        self._started = None
+        self._last_publish = 0.0
+
+    # Queue plumbing
+
+    def _get(self, name, counters, on_idle=None):
+        started = time.monotonic()
+        counters.state = "waiting_input"
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped
+            try:
+                item = self.queues[name].get(timeout=STAGE_POLL_SEC)
+                break
+            except queue.Empty:
+                if on_idle:
+                    on_idle()
+        counters.input_wait_sec += time.monotonic() - started
+        counters.state = "working"
+        if item is not _END:
+            counters.rows_in += 1
+        return item
+
+    def _put(self, name, item, counters):
+        started = time.monotonic()
+        counters.state = "waiting_output"
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped
+            try:
+                self.queues[name].put(item, timeout=STAGE_POLL_SEC)
+                break
+            except queue.Full:
+                continue
+        counters.output_wait_sec += time.monotonic() - started
+        counters.state = "working"
+        if item is not _END:
+            counters.rows_out += 1
+
+    def _run_thread(self, stage, counters):
+        counters.state = "working"
+        try:
+            stage(counters)
+            counters.state = "done"
+        except PipelineStopped:
+            counters.state = "stopped"
+        except BaseException as e:
+            counters.state = "failed"
+            self._errors.append(e)
+            self._stop.set()
+
+    # Stages
+
+    def _parse(self, counters):
+        rows = iter(self.rows)
+        index = self.start_row
+        while True:
+            started = time.monotonic()
+            try:
+                plot = next(rows)
+            except StopIteration:
+                break
+            counters.busy_sec += time.monotonic() - started
+            counters.rows_in += 1
+            if isinstance(plot, dict) and plot.get(PARSE_ERROR_KEY):
+                counters.errors += 1
+            self._put(STAGE_NORMALIZE, (index, plot), counters)
+            index += 1
+        self._put(STAGE_NORMALIZE, _END, counters)
+
+    def _normalize(self, counters):
+        while True:
+            item = self._get(STAGE_NORMALIZE, counters)
+            if item is _END:
+                break
+            started = time.monotonic()
+            index, plot = item
+            geometry = None
+            if isinstance(plot, dict) and not plot.get(PARSE_ERROR_KEY):
+                try:
+                    geometry = plot_geometry_fields(plot.get("coordinates") or None)
+                except Exception as e:
+                    plot = {**plot, PARSE_ERROR_KEY: f"Invalid geometry: {e}"}
+                    counters.errors += 1
+            counters.busy_sec += time.monotonic() - started
+            self._put(STAGE_DEDUPE, (index, plot, geometry), counters)
+        self._put(STAGE_DEDUPE, _END, counters)
+
+    def _dedupe(self, counters):
+        while True:
+            item = self._get(STAGE_DEDUPE, counters)
+            if item is _END:
+                break
+            started = time.monotonic()
+            index, plot, geometry = item
+            geometry_hash = (geometry or {}).get("geometry_hash")
+            plot_id = clean_plot_id(plot.get("id")) if isinstance(plot, dict) else ""
+            if geometry_hash and plot_id:
+                duplicate_of = self.known.find(geometry_hash, plot_id)
+                if duplicate_of:
+                    # Rejected rows reach the insert stage so they are checkpointed and logged.
+                    plot = {**plot, PARSE_ERROR_KEY: f"Duplicate of {duplicate_of} (same plot ID and geometry)"}
+                    geometry = None
+                    counters.errors += 1
+                else:
+                    self.known.add(geometry_hash, plot_id, f"row {index + 1}")
+            counters.busy_sec += time.monotonic() - started
+            self._put(STAGE_INSERT, (index, plot, geometry), counters)
+        self._put(STAGE_INSERT, _END, counters)
+
+    def _insert(self):
+        counters = self.counters[STAGE_INSERT]
+        counters.state = "working"
+        chunk = []
+        while True:
+            item = self._get(STAGE_INSERT, counters, on_idle=self.publish_stats)
+            if item is not _END:
+                chunk.append(item)
+            if chunk and (item is _END or len(chunk) >= self.chunk_size):
+                self._write(chunk, counters)
+                chunk = []
+            self.publish_stats()
+            if item is _END:
+                counters.state = "done"
+                return
+
+    def _write(self, chunk, counters):
+        started = time.monotonic()
+        result = self.insert_chunk(
+            chunk[0][0],
+            [plot for _index, plot, _geometry in chunk],
+            [geometry for _index, _plot, geometry in chunk],
+        )
+        counters.busy_sec += time.monotonic() - started
+        counters.rows_out += len(result["created_plots"])
+        counters.errors += len(result["failed_plots"])
+
+        names = [plot["name"] for plot in result["created_plots"]]
+        analyze = self.counters[STAGE_ANALYZE]
+        analyze.rows_in += len(names)
+        if self.on_inserted and names:
+            started = time.monotonic()
+            analyze.state = "working"
+            self.on_inserted(names)
+            analyze.busy_sec += time.monotonic() - started
+            analyze.rows_out += len(names)
+            analyze.state = "waiting_input"
+
+    # Driver
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "elapsed_sec": round(elapsed, 1),
+            "stages": [
+                self.counters[name].snapshot(elapsed, self.queues.get(name))
+                for name in STAGES
+            ],
+        }
+
+    def publish_stats(self, force=False):
+        if not self.on_stats:
+            return
+        now = time.monotonic()
+        if force or now - self._last_publish >= STATS_PUBLISH_SEC:
+            self._last_publish = now
+            self.on_stats(self.snapshot())
+
+    def run(self):
+        """Run all stages to completion; re-raises the first stage error."""
+        self._started = time.monotonic()
+        threads = [
+            threading.Thread(
+                target=self._run_thread,
+                args=(stage, self.counters[name]),
+                name=f"plot-import-{name}",
+                daemon=True,
+            )
+            for name, stage in (
+                (STAGE_PARSE, self._parse),
+                (STAGE_NORMALIZE, self._normalize),
+                (STAGE_DEDUPE, self._dedupe),
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._insert()
+        except PipelineStopped:
+            pass
+        except BaseException:
+            self.counters[STAGE_INSERT].state = "failed"
+            raise
+        finally:
+            # Unblocks producers when the insert stage stopped early.
+            self._stop.set()
+            for thread in threads:
+                thread.join(THREAD_JOIN_TIMEOUT_SEC)
+            self.publish_stats(force=True)
+        if self._errors:
+            raise self._errors[0]
+        self.counters[STAGE_ANALYZE].state = "done"
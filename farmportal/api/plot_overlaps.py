@@ -0,0 +1,268 @@
+"""
+Overlap and duplicate-geometry detection between Land Plots, within and across suppliers.
+
+`detect_plot_overlaps` sweeps every polygon plot's bounding box (bbox_* columns)
+in longitude order, keeps the boxes that can still intersect on a heap, and runs
+the exact polygon intersection only on bbox-overlapping pairs. Runs are
+incremental: a plot is re-tested when its geometry_hash differs from
+overlap_checked_hash, and only pairs involving such plots are evaluated.
+Results are stored as "Land Plot Overlap" rows (one per pair, plot_a < plot_b).
+Point plots have no polygon and are not compared.
+"""
+
+import heapq
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now_datetime
+
+from farmportal.api import shared_cache
+from farmportal.api.geometry import plot_coordinates, polygon_intersection_area_m2
+
+OVERLAP_DOCTYPE = "Land Plot Overlap"
+# Slivers below this are GPS noise along shared boundaries, not competing claims.
+MIN_OVERLAP_AREA_M2 = 10.0
+GEOMETRY_FETCH_SIZE = 500
+NAME_CHUNK_SIZE = 1000
+DETECTION_LOCK_KEY = "plot_overlap_detection"
+DETECTION_LOCK_TTL_SEC = 2 * 60 * 60
+
+
+def _chunks(values, size):
+    values = list(values)
+    for offset in range(0, len(values), size):
+        yield values[offset:offset + size]
+
+
+def _load_plot_boxes():
+    return frappe.db.sql(
+        """
+        SELECT name, supplier, geometry_hash, overlap_checked_hash, computed_area_ha,
+            bbox_min_lng, bbox_min_lat, bbox_max_lng, bbox_max_lat
+        FROM `tabLand Plot`
+        WHERE geometry_hash IS NOT NULL AND geometry_hash != ''
+          AND computed_area_ha > 0
+        """,
+        as_dict=True,
+    )
+
+
+def _candidate_pairs(boxes, dirty):
+    """Sweep-line over bboxes: index pairs whose boxes intersect and that involve a dirty plot."""
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i].bbox_min_lng)
+    active = []
+    for i in order:
+        box = boxes[i]
+        while active and active[0][0] < box.bbox_min_lng:
+            heapq.heappop(active)
+        box_dirty = box.name in dirty
+        for _max_lng, j in active:
+            other = boxes[j]
+            if not (box_dirty or other.name in dirty):
+                continue
+            if other.bbox_min_lat <= box.bbox_max_lat and box.bbox_min_lat <= other.bbox_max_lat:
+                yield (j, i) if other.name < box.name else (i, j)
+        heapq.heappush(active, (box.bbox_max_lng, i))
+
+
+def _load_geometries(names):
+    rows = frappe.get_all(
+        "Land Plot",
+        filters={"name": ["in", list(names)]},
+        fields=["name", "coordinates", "geometry_hash", "geometry_blob"],
+        limit_page_length=0,
+    )
+    return {row.name: plot_coordinates(row) for row in rows}
+
+
+def _measure_overlap(box_a, box_b, geometries):
+    """Return (overlap_area_ha, identical) for a candidate pair, or None below the threshold."""
+    if box_a.geometry_hash == box_b.geometry_hash:
+        return float(box_a.computed_area_ha or 0), True
+
+    ring_a, ring_b = geometries.get(box_a.name), geometries.get(box_b.name)
+    if not ring_a or not ring_b:
+        return None
+    area_m2 = polygon_intersection_area_m2(ring_a, ring_b)
+    if area_m2 < MIN_OVERLAP_AREA_M2:
+        return None
+    return area_m2 / 10000.0, False
+
+
+def _insert_overlap(box_a, box_b, overlap_area_ha, identical, detected_on):
+    def share(box):
+        area = float(box.computed_area_ha or 0)
+        return min(100.0, overlap_area_ha / area * 100.0) if area > 0 else 0
+
+    frappe.get_doc({
+        "doctype": OVERLAP_DOCTYPE,
+        "plot_a": box_a.name,
+        "supplier_a": box_a.supplier,
+        "plot_b": box_b.name,
+        "supplier_b": box_b.supplier,
+        "cross_supplier": int(box_a.supplier != box_b.supplier),
+        "identical": int(identical),
+        "overlap_area_ha": overlap_area_ha,
+        "overlap_pct_a": share(box_a),
+        "overlap_pct_b": share(box_b),
+        "detected_on": detected_on,
+    }).insert(ignore_permissions=True, ignore_links=True)
+
+
+def delete_plot_overlaps(plot_names):
+    for chunk in _chunks(plot_names, NAME_CHUNK_SIZE):
+        frappe.db.delete(OVERLAP_DOCTYPE, {"plot_a": ["in", chunk]})
+        frappe.db.delete(OVERLAP_DOCTYPE, {"plot_b": ["in", chunk]})
+
+
+def _clear_removed_geometries():
+    """Drop overlaps of plots whose polygon was removed since the last run."""
+    names = frappe.db.sql_list(
+        """
+        SELECT name FROM `tabLand Plot`
+        WHERE (geometry_hash IS NULL OR geometry_hash = '' OR computed_area_ha = 0)
+          AND overlap_checked_hash IS NOT NULL AND overlap_checked_hash != ''
+        """
+    )
+    if not names:
+        return
+    delete_plot_overlaps(names)
+    for chunk in _chunks(names, NAME_CHUNK_SIZE):
+        frappe.db.sql(
+            "UPDATE `tabLand Plot` SET overlap_checked_hash = NULL WHERE name IN %(names)s",
+            {"names": tuple(chunk)},
+        )
+    frappe.db.commit()
+
+
+def detect_plot_overlaps(full=False):
+    """Scheduler/background job: re-test new or changed plots (all plots when `full`)."""
+    lock_token = frappe.generate_hash(length=20)
+    if not shared_cache._acquire(DETECTION_LOCK_KEY, ttl=DETECTION_LOCK_TTL_SEC, token=lock_token):
+        return
+    try:
+        _clear_removed_geometries()
+
+        boxes = _load_plot_boxes()
+        dirty = {box.name for box in boxes if full or box.overlap_checked_hash != box.geometry_hash}
+        if not dirty:
+            return
+
+        pairs = sorted(_candidate_pairs(boxes, dirty))
+        delete_plot_overlaps(dirty)
+
+        detected_on = now_datetime()
+        found = 0
+        for chunk in _chunks(pairs, GEOMETRY_FETCH_SIZE):
+            names = {boxes[i].name for pair in chunk for i in pair}
+            geometries = _load_geometries(names)
+            for i, j in chunk:
+                try:
+                    measured = _measure_overlap(boxes[i], boxes[j], geometries)
+                except Exception:
+                    frappe.log_error(
+                        frappe.get_traceback(),
+                        f"Plot overlap check failed: {boxes[i].name} / {boxes[j].name}",
+                    )
+                    continue
+                if measured:
+                    _insert_overlap(boxes[i], boxes[j], measured[0], measured[1], detected_on)
+                    found += 1
+            frappe.db.commit()
+            if not shared_cache._extend(DETECTION_LOCK_KEY, DETECTION_LOCK_TTL_SEC, token=lock_token):
+                # The lock expired and another run took over; leave the remaining pairs to it.
+                return
+
+        # Mark plots as checked against the geometry that was actually tested.
+        for box in boxes:
+            if box.name in dirty:
+                frappe.db.sql(
+                    """
+                    UPDATE `tabLand Plot` SET overlap_checked_hash = %s
+                    WHERE name = %s AND geometry_hash = %s
+                    """,
+                    (box.geometry_hash, box.name, box.geometry_hash),
+                )
+        frappe.db.commit()
+        frappe.logger().info(
+            f"Plot overlap detection: {len(dirty)} plots re-tested, {len(pairs)} candidate pairs, {found} overlaps"
+        )
+    finally:
+        shared_cache._release(DETECTION_LOCK_KEY, token=lock_token)
+
+
+@frappe.whitelist(methods=["POST"])
+def run_plot_overlap_detection(full=False):
+    """Queue overlap detection (System Manager)."""
+    frappe.only_for("System Manager")
+    full = cint(full)
+    frappe.enqueue(
+        "farmportal.api.plot_overlaps.detect_plot_overlaps",
+        queue="long",
+        timeout=4 * 60 * 60,
+        full=bool(full),
+    )
+    return {"queued": True, "full": bool(full)}
+
+
+def get_overlaps_for_plots(plot_names, visible_names=None):
+    """
+    Overlaps involving `plot_names`, keyed by plot name. The other plot and its
+    supplier are only named when they are in `visible_names` (defaults to `plot_names`),
+    so a customer learns that land is claimed twice without seeing unshared plots.
+    """
+    plot_names = [name for name in plot_names or [] if name]
+    visible = set(visible_names if visible_names is not None else plot_names)
+    overlaps = {}
+    for chunk in _chunks(plot_names, NAME_CHUNK_SIZE):
+        rows = frappe.db.sql(
+            f"""
+            SELECT plot_a, supplier_a, plot_b, supplier_b, cross_supplier, identical,
+                overlap_area_ha, overlap_pct_a, overlap_pct_b
+            FROM `tab{OVERLAP_DOCTYPE}`
+            WHERE plot_a IN %(names)s OR plot_b IN %(names)s
+            """,
+            {"names": tuple(chunk)},
+            as_dict=True,
+        )
+        chunk_names = set(chunk)
+        for row in rows:
+            for side, other in (("a", "b"), ("b", "a")):
+                plot = row[f"plot_{side}"]
+                if plot not in chunk_names:
+                    continue
+                other_plot = row[f"plot_{other}"]
+                other_visible = other_plot in visible
+                overlaps.setdefault(plot, []).append({
+                    "other_plot": other_plot if other_visible else None,
+                    "other_supplier": row[f"supplier_{other}"] if other_visible else None,
+                    "cross_supplier": bool(row.cross_supplier),
+                    "identical": bool(row.identical),
+                    "overlap_area_ha": row.overlap_area_ha,
+                    "overlap_pct": row[f"overlap_pct_{side}"],
+                })
+    return overlaps
+
+
+@frappe.whitelist()
+def get_shared_plot_overlaps():
+    """Overlaps affecting plots shared with the logged-in customer."""
+    from farmportal.api.requests import _collect_customer_shared_plot_names, _get_party_from_user
+
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw(_("Not logged in"), frappe.PermissionError)
+
+    customer, _supplier = _get_party_from_user(user)
+    if not customer:
+        frappe.throw(_("Only Customers can view shared plots"), frappe.PermissionError)
+
+    shared_names = _collect_customer_shared_plot_names(customer)
+    overlaps = get_overlaps_for_plots(shared_names)
+    return {
+        "overlaps": overlaps,
+        "overlapping_plots": len(overlaps),
+        "cross_supplier_plots": len([
+            name for name, items in overlaps.items() if any(item["cross_supplier"] for item in items)
+        ]),
+    }
@@ -0,0 +1,630 @@
+"""
+Streaming readers for plot upload files.
+
+`iter_plot_rows(path)` yields one plot dict per row/feature, in the shape
+bulk_create_land_plots accepts (id, farmer_name, country, area, coordinates,
+...), reading the file incrementally so memory stays bounded by the largest
+single feature rather than the file:
+
+- CSV: one plot per line, geometry from a WKT column or latitude/longitude columns
+- GeoJSON / JSON: FeatureCollections and arrays are decoded one element at a time;
+  newline-delimited GeoJSON (.geojsonl/.ndjson) line by line
+- KML / KMZ: Placemarks through ElementTree.iterparse, discarded once read
+- zipped Shapefiles: .shp and .dbf records read in lockstep with struct
+
+Rows that cannot be read yield a dict carrying PARSE_ERROR_KEY so the importer
+can report them against their row number. Multi-polygons keep their largest
+polygon, and every polygon keeps its outer ring only, as Land Plots store a
+single ring. Coordinates must be WGS84 longitude/latitude. Like geometry.py
+this module has no Frappe dependency.
+"""
+
+import csv
+import json
+import os
+import re
+import struct
+import sys
+import zipfile
+from contextlib import nullcontext
+from xml.etree import ElementTree
+
+from farmportal.api.geometry import ring_area_m2
+
+PARSE_ERROR_KEY = "parse_error"
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"
+FORMAT_JSON_SEQ = "jsonseq"
+FORMAT_KML = "kml"
+FORMAT_KMZ = "kmz"
+FORMAT_SHAPEFILE_ZIP = "shapefile"
+
+FORMAT_BY_EXTENSION = {
+    ".csv": FORMAT_CSV,
+    ".txt": FORMAT_CSV,
+    ".json": FORMAT_JSON,
+    ".geojson": FORMAT_JSON,
+    ".geojsonl": FORMAT_JSON_SEQ,
+    ".geojsons": FORMAT_JSON_SEQ,
+    ".ndjson": FORMAT_JSON_SEQ,
+    ".jsonl": FORMAT_JSON_SEQ,
+    ".kml": FORMAT_KML,
+    ".kmz": FORMAT_KMZ,
+    ".zip": FORMAT_SHAPEFILE_ZIP,
+}
+
+JSON_READ_SIZE = 64 * 1024
+CSV_SNIFF_SIZE = 16 * 1024
+# Large enough for WKT polygons with tens of thousands of vertices, still bounded.
+CSV_FIELD_SIZE_LIMIT = min(64 * 1024 * 1024, sys.maxsize)
+
+# Attribute names (lower-cased, non-alphanumerics removed) mapped to plot fields.
+# Includes the EUDR GeoJSON property names (ProductionPlace, ProducerName, ...).
+FIELD_ALIASES = {
+    "id": "id", "plotid": "id", "plotcode": "id", "code": "id", "productionplace": "id",
+    "farmername": "farmer_name", "farmer": "farmer_name", "producername": "farmer_name",
+    "producer": "farmer_name", "name": "farmer_name", "plotname": "farmer_name",
+    "country": "country", "producercountry": "country", "countrycode": "country",
+    "stateprovince": "state_province", "state": "state_province", "province": "state_province",
+    "region": "state_province",
+    "area": "area", "areaha": "area", "hectares": "area", "ha": "area",
+    "commodities": "commodities", "commodity": "commodities",
+    "products": "products", "product": "products",
+    "yielddriedmt": "yield_dried_mt", "yield": "yield_dried_mt",
+}
+LATITUDE_COLUMNS = ("latitude", "lat", "y")
+LONGITUDE_COLUMNS = ("longitude", "lng", "lon", "long", "x")
+WKT_COLUMNS = ("wkt", "geometry", "geom", "the_geom", "shape", "polygon")
+COORDINATES_COLUMNS = ("coordinates",)
+
+
+class PlotFileError(ValueError):
+    """The file as a whole cannot be read (unknown format, broken archive, ...)."""
+
+
+def detect_format(path, file_name=None):
+    extension = os.path.splitext(file_name or path)[1].lower()
+    if extension not in FORMAT_BY_EXTENSION:
+        raise PlotFileError(f"Unsupported plot file type: {extension or 'no extension'}")
+    return FORMAT_BY_EXTENSION[extension]
+
+
+def iter_plot_rows(path, file_name=None, file_format=None):
+    """Yield plot dicts from the file at `path` (format from `file_format` or the file name)."""
+    file_format = file_format or detect_format(path, file_name)
+    readers = {
+        FORMAT_CSV: _iter_csv,
+        FORMAT_JSON: _iter_json,
+        FORMAT_JSON_SEQ: _iter_json_seq,
+        FORMAT_KML: _iter_kml_path,
+        FORMAT_KMZ: _iter_kmz,
+        FORMAT_SHAPEFILE_ZIP: _iter_zip,
+    }
+    yield from readers[file_format](path)
+
+
+# Attributes and geometry
+
+
+def _attribute_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name or "").lower())
+
+
+def _split_list(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").replace(";", ",").split(",") if item.strip()]
+
+
+def plot_from_attributes(attributes, coordinates=None, error=None):
+    """Map free-form attributes onto plot fields; unknown attributes are dropped."""
+    plot = {}
+    for name, value in (attributes or {}).items():
+        field = FIELD_ALIASES.get(_attribute_key(name))
+        if not field or field in plot or value in (None, ""):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        plot[field] = _split_list(value) if field in ("commodities", "products") else value
+    if coordinates is not None:
+        plot["coordinates"] = coordinates
+    if error:
+        plot[PARSE_ERROR_KEY] = error
+    return plot
+
+
+def _lng_lat(position):
+    if not isinstance(position, (list, tuple)) or len(position) < 2:
+        raise ValueError("Invalid coordinate position")
+    lng, lat = float(position[0]), float(position[1])
+    if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+        raise ValueError(f"Coordinate out of range: {lng}, {lat} (expected WGS84 longitude, latitude)")
+    return [lng, lat]
+
+
+def _largest_ring(rings):
+    rings = [ring for ring in rings if len(ring) >= 3]
+    if not rings:
+        raise ValueError("Polygon has no ring")
+    return max(rings, key=ring_area_m2) if len(rings) > 1 else rings[0]
+
+
+def geojson_coordinates(geometry):
+    """Plot coordinates for a GeoJSON geometry: [[lng, lat]] for points, the outer ring for polygons."""
+    if not isinstance(geometry, dict):
+        raise ValueError("Feature has no geometry")
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if geometry_type == "Point":
+        return [_lng_lat(coordinates)]
+    if geometry_type == "Polygon":
+        return [_lng_lat(p) for p in (coordinates or [[]])[0]]
+    if geometry_type == "MultiPolygon":
+        return _largest_ring([[_lng_lat(p) for p in polygon[0]] for polygon in coordinates or [] if polygon])
+    if geometry_type == "GeometryCollection":
+        parts = [geojson_coordinates(g) for g in geometry.get("geometries") or []]
+        polygons = [part for part in parts if len(part) > 1]
+        if polygons:
+            return _largest_ring(polygons)
+        if parts:
+            return parts[0]
+    raise ValueError(f"Unsupported geometry type: {geometry_type}")
+
+
+_WKT_TYPE = re.compile(r"^\s*(POINT|POLYGON|MULTIPOLYGON)\s*(Z|M|ZM)?\s*\(", re.IGNORECASE)
+_WKT_RING = re.compile(r"\(([^()]+)\)")
+
+
+def wkt_coordinates(text):
+    """Plot coordinates from WKT POINT, POLYGON or MULTIPOLYGON text."""
+    match = _WKT_TYPE.match(text or "")
+    if not match:
+        raise ValueError("Unsupported WKT geometry")
+    geometry_type = match.group(1).upper()
+    rings = [
+        [_lng_lat(position.split()) for position in ring.split(",")]
+        for ring in _WKT_RING.findall(text)
+    ]
+    if not rings:
+        raise ValueError("WKT geometry has no coordinates")
+    if geometry_type == "POINT":
+        return rings[0][:1]
+    if geometry_type == "POLYGON":
+        return rings[0]
+    # Outer rings of a MULTIPOLYGON open with "((" right before the ring text.
+    outer = [
+        [_lng_lat(position.split()) for position in ring.split(",")]
+        for ring in re.findall(r"\(\s*\(([^()]+)\)", text)
+    ]
+    return _largest_ring(outer or rings)
+
+
+def feature_to_plot(feature):
+    """Plot dict for a GeoJSON Feature, or pass through a plain plot dict."""
+    if not isinstance(feature, dict):
+        return {PARSE_ERROR_KEY: "Row is not an object"}
+    if feature.get("type") != "Feature":
+        return feature
+    properties = feature.get("properties") or {}
+    try:
+        return plot_from_attributes(properties, geojson_coordinates(feature.get("geometry")))
+    except (TypeError, ValueError) as e:
+        return plot_from_attributes(properties, error=str(e))
+
+
+# CSV
+
+
+def _iter_csv(path):
+    if csv.field_size_limit() < CSV_FIELD_SIZE_LIMIT:
+        csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+    with open(path, "r", encoding="utf-8-sig", newline="") as handle:
+        sample = handle.read(CSV_SNIFF_SIZE)
+        handle.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(handle, dialect=dialect)
+        try:
+            fieldnames = reader.fieldnames or []
+        except csv.Error as e:
+            raise PlotFileError(f"Cannot read CSV header: {e}") from e
+        columns = {_attribute_key(name): name for name in fieldnames}
+
+        def column(candidates):
+            return next((columns[c] for c in candidates if c in columns), None)
+
+        wkt_column = column(WKT_COLUMNS)
+        coordinates_column = column(COORDINATES_COLUMNS)
+        lat_column = column(LATITUDE_COLUMNS)
+        lng_column = column(LONGITUDE_COLUMNS)
+        if not (wkt_column or coordinates_column or (lat_column and lng_column)):
+            raise PlotFileError("CSV needs a WKT column or latitude and longitude columns")
+
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # The reader resumes on the next line, so only the broken record is lost.
+                yield plot_from_attributes({}, error=f"Invalid CSV row: {e}")
+                continue
+            yield _csv_plot(record, wkt_column, coordinates_column, lat_column, lng_column)
+
+
+def _csv_plot(record, wkt_column, coordinates_column, lat_column, lng_column):
+    attributes = {
+        name: value for name, value in record.items()
+        if name and name not in (wkt_column, coordinates_column)
+    }
+    try:
+        if wkt_column and (record.get(wkt_column) or "").strip():
+            coordinates = wkt_coordinates(record[wkt_column])
+        elif coordinates_column and (record.get(coordinates_column) or "").strip():
+            coordinates = [_lng_lat(p) for p in json.loads(record[coordinates_column])]
+        elif lat_column and lng_column and record.get(lat_column) and record.get(lng_column):
+            coordinates = [_lng_lat([record[lng_column], record[lat_column]])]
+        else:
+            raise ValueError("Row has no geometry")
+    except (TypeError, ValueError) as e:
+        return plot_from_attributes(attributes, error=str(e))
+
+    plot = plot_from_attributes(attributes, coordinates)
+    if len(coordinates) == 1:
+        plot["longitude"], plot["latitude"] = coordinates[0]
+    return plot
+
+
+# JSON / GeoJSON
+
+
+class _JSONStream:
+    """Incremental JSON reader: decodes one value at a time from a text stream."""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=JSON_READ_SIZE):
+        if self.eof:
+            return False
+        chunk = self.handle.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of input."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise PlotFileError(f"Invalid JSON: expected '{char}'")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        read_size = JSON_READ_SIZE
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Incomplete value: read more (growing reads keep huge features linear).
+                if self._fill(read_size):
+                    read_size *= 2
+                    continue
+                raise PlotFileError(f"Invalid JSON: {e.msg}") from e
+            # A number at the buffer end may continue in the next read.
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list, str)):
+                if self._fill(read_size):
+                    continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Yield the elements of the array at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise PlotFileError("Invalid JSON: expected ',' or ']'")
+
+
+def _iter_json(path):
+    with open(path, "r", encoding="utf-8-sig") as handle:
+        stream = _JSONStream(handle)
+        first = stream.peek()
+        if first == "[":
+            for item in stream.items():
+                yield feature_to_plot(item)
+            return
+        if first != "{":
+            raise PlotFileError("JSON file must hold an object or an array")
+
+        # Walk the top-level object; stream "features", keep the other (small) members.
+        stream.expect("{")
+        members = {}
+        while stream.peek() != "}":
+            key = stream.value()
+            stream.expect(":")
+            if key == "features" and stream.peek() == "[":
+                for item in stream.items():
+                    yield feature_to_plot(item)
+                members["features"] = None
+            else:
+                members[key] = stream.value()
+            if stream.peek() == ",":
+                stream.pos += 1
+        if "features" in members:
+            return
+        if members.get("type") == "Feature":
+            yield feature_to_plot(members)
+        elif "coordinates" in members and "type" in members:
+            yield feature_to_plot({"type": "Feature", "properties": {}, "geometry": members})
+        else:
+            yield feature_to_plot(members)
+
+
+def _iter_json_seq(path):
+    with open(path, "r", encoding="utf-8-sig") as handle:
+        for line in handle:
+            # RFC 8142 GeoJSON text sequences prefix records with an RS character.
+            line = line.strip().lstrip("\x1e")
+            if not line:
+                continue
+            try:
+                yield feature_to_plot(json.loads(line))
+            except ValueError as e:
+                yield {PARSE_ERROR_KEY: f"Invalid JSON: {e}"}
+
+
+# KML / KMZ
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _kml_positions(text):
+    return [_lng_lat(position.split(",")) for position in (text or "").split() if position]
+
+
+def _kml_plot(placemark):
+    attributes = {}
+    polygons = []
+    points = []
+    for element in placemark.iter():
+        name = _local_name(element.tag)
+        if name == "name" and "name" not in attributes:
+            attributes["name"] = (element.text or "").strip()
+        elif name == "Data":
+            value = next((child.text for child in element if _local_name(child.tag) == "value"), None)
+            attributes[element.get("name")] = value
+        elif name == "SimpleData":
+            attributes[element.get("name")] = element.text
+    try:
+        for element in placemark.iter():
+            name = _local_name(element.tag)
+            if name == "outerBoundaryIs":
+                coordinates = next((c for c in element.iter() if _local_name(c.tag) == "coordinates"), None)
+                if coordinates is not None:
+                    polygons.append(_kml_positions(coordinates.text))
+            elif name == "Point":
+                coordinates = next((c for c in element.iter() if _local_name(c.tag) == "coordinates"), None)
+                if coordinates is not None:
+                    points.append(_kml_positions(coordinates.text)[:1])
+        if polygons:
+            coordinates = _largest_ring(polygons)
+        elif points and points[0]:
+            coordinates = points[0]
+        else:
+            raise ValueError("Placemark has no Polygon or Point")
+    except (TypeError, ValueError) as e:
+        return plot_from_attributes(attributes, error=str(e))
+    return plot_from_attributes(attributes, coordinates)
+
+
+def _iter_kml(handle):
+    stack = []
+    for event, element in ElementTree.iterparse(handle, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        if _local_name(element.tag) == "Placemark":
+            yield _kml_plot(element)
+            # Drop the finished Placemark so the tree never grows past one feature.
+            element.clear()
+            if stack:
+                stack[-1].remove(element)
+
+
+def _iter_kml_path(path):
+    with open(path, "rb") as handle:
+        yield from _iter_kml(handle)
+
+
+def _iter_kmz(path):
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise PlotFileError("KMZ file is not a valid zip archive") from e
+    with archive:
+        members = [name for name in archive.namelist() if name.lower().endswith(".kml")]
+        if not members:
+            raise PlotFileError("KMZ archive contains no .kml file")
+        with archive.open(members[0]) as handle:
+            yield from _iter_kml(handle)
+
+
+# Zipped Shapefile
+
+SHP_NULL = 0
+SHP_POINT = 1
+SHP_POLYGON = 5
+SHP_POINT_Z = 11
+SHP_POLYGON_Z = 15
+SHP_POINT_M = 21
+SHP_POLYGON_M = 25
+SHP_POINT_TYPES = (SHP_POINT, SHP_POINT_Z, SHP_POINT_M)
+SHP_POLYGON_TYPES = (SHP_POLYGON, SHP_POLYGON_Z, SHP_POLYGON_M)
+
+
+def _read_exact(handle, size):
+    data = handle.read(size)
+    if len(data) != size:
+        raise PlotFileError("Shapefile is truncated")
+    return data
+
+
+def _shp_records(handle):
+    """Yield (shape type, points or rings) for each .shp record, in file order."""
+    header = _read_exact(handle, 100)
+    if struct.unpack(">i", header[:4])[0] != 9994:
+        raise PlotFileError("Not a shapefile (.shp header)")
+    while True:
+        record_header = handle.read(8)
+        if not record_header:
+            return
+        if len(record_header) != 8:
+            raise PlotFileError("Shapefile is truncated")
+        _number, length_words = struct.unpack(">2i", record_header)
+        content = _read_exact(handle, length_words * 2)
+        shape_type = struct.unpack("<i", content[:4])[0]
+        if shape_type in SHP_POINT_TYPES:
+            yield SHP_POINT, [list(struct.unpack("<2d", content[4:20]))]
+        elif shape_type in SHP_POLYGON_TYPES:
+            num_parts, num_points = struct.unpack("<2i", content[36:44])
+            parts = struct.unpack(f"<{num_parts}i", content[44:44 + 4 * num_parts])
+            offset = 44 + 4 * num_parts
+            flat = struct.unpack(f"<{2 * num_points}d", content[offset:offset + 16 * num_points])
+            points = [[flat[i], flat[i + 1]] for i in range(0, len(flat), 2)]
+            bounds = list(parts) + [num_points]
+            yield SHP_POLYGON, [points[bounds[i]:bounds[i + 1]] for i in range(num_parts)]
+        else:
+            yield shape_type, None
+
+
+def _dbf_records(handle, encoding):
+    """Yield each .dbf record as {field name: value}."""
+    header = _read_exact(handle, 32)
+    num_records, header_length, record_length = struct.unpack("<IHH", header[4:12])
+    fields = []
+    remaining = header_length - 32
+    while remaining >= 32:
+        descriptor = _read_exact(handle, 32)
+        remaining -= 32
+        if descriptor[0] == 0x0D:
+            break
+        name = descriptor[:11].split(b"\x00", 1)[0].decode("ascii", "replace")
+        fields.append((name, chr(descriptor[11]), descriptor[16]))
+    _read_exact(handle, remaining)
+
+    for _index in range(num_records):
+        record = _read_exact(handle, record_length)
+        deleted = record[:1] == b"*"
+        values = {}
+        position = 1
+        for name, field_type, length in fields:
+            raw = record[position:position + length]
+            position += length
+            text = raw.decode(encoding, "replace").strip().strip("\x00")
+            if field_type in ("N", "F"):
+                try:
+                    values[name] = float(text) if text else None
+                except ValueError:
+                    values[name] = None
+            elif field_type == "L":
+                values[name] = text[:1].upper() in ("T", "Y") if text else None
+            else:
+                values[name] = text
+        yield deleted, values
+
+
+def _shapefile_encoding(archive, base):
+    cpg = next((n for n in archive.namelist() if n.lower() == f"{base}.cpg"), None)
+    if cpg:
+        encoding = archive.read(cpg).decode("ascii", "ignore").strip() or "utf-8"
+        try:
+            "".encode(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _check_projection(archive, base):
+    prj = next((n for n in archive.namelist() if n.lower() == f"{base}.prj"), None)
+    if prj:
+        text = archive.read(prj).decode("ascii", "ignore").upper()
+        if text.startswith("PROJCS"):
+            raise PlotFileError("Shapefile uses a projected CRS; export it in WGS84 (EPSG:4326)")
+
+
+def _iter_shapefile(archive, shp_name):
+    base = shp_name[:-4].lower()
+    dbf_name = next((n for n in archive.namelist() if n.lower() == f"{base}.dbf"), None)
+    _check_projection(archive, base)
+    encoding = _shapefile_encoding(archive, base)
+
+    with archive.open(shp_name) as shp, (archive.open(dbf_name) if dbf_name else nullcontext()) as dbf:
+        attributes_iter = _dbf_records(dbf, encoding) if dbf_name else iter(())
+        for shape_type, shape in _shp_records(shp):
+            deleted, attributes = next(attributes_iter, (False, {}))
+            if deleted:
+                continue
+            try:
+                if shape_type == SHP_POINT:
+                    coordinates = [_lng_lat(shape[0])]
+                elif shape_type == SHP_POLYGON:
+                    coordinates = _largest_ring([[_lng_lat(p) for p in ring] for ring in shape])
+                elif shape_type == SHP_NULL:
+                    raise ValueError("Record has no geometry")
+                else:
+                    raise ValueError(f"Unsupported shape type {shape_type}")
+            except (TypeError, ValueError) as e:
+                yield plot_from_attributes(attributes, error=str(e))
+                continue
+            yield plot_from_attributes(attributes, coordinates)
+
+
+def _iter_zip(path):
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise PlotFileError("File is not a valid zip archive") from e
+    with archive:
+        names = archive.namelist()
+        shapefiles = sorted(n for n in names if n.lower().endswith(".shp") and not n.startswith("__MACOSX"))
+        if shapefiles:
+            for shp_name in shapefiles:
+                yield from _iter_shapefile(archive, shp_name)
+            return
+        kml = next((n for n in names if n.lower().endswith(".kml")), None)
+        if kml:
+            with archive.open(kml) as handle:
+                yield from _iter_kml(handle)
+            return
+    raise PlotFileError("Zip archive contains no shapefile (.shp) or .kml")
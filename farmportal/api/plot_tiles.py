@@ -0,0 +1,215 @@
+"""
+Mapbox Vector Tiles of the Land Plots visible to the session user.
+
+    GET /api/method/farmportal.api.plot_tiles.get_plot_tile?z=14&x=4823&y=7710&scope=customer
+
+One "plots" layer with attributes name, plot_id, supplier, area, risk_level,
+deforestation_percentage and mitigated. Below POLYGON_MIN_ZOOM plots are drawn
+as points; from there on polygons use the simplification level matching the
+zoom (see geometry.resolve_detail).
+
+Tiles are cached in Redis per scope, party and z/x/y under a version number
+per party (plus a global one). `invalidate_plot_tiles` bumps the versions of
+the suppliers whose plots changed, of the customers those suppliers share with,
+and of customers whose shares or risk state changed, so stale tiles are never
+served and simply expire. A cache hit costs no database query. For customers,
+the shared plot names per supplier and the analyzed plot names are cached under
+the same version, so the tiles of one map view share a single lookup.
+"""
+
+import frappe
+from frappe import _
+from werkzeug.wrappers import Response
+
+from farmportal.api.geometry import plot_coordinates, plot_geometry_columns, resolve_detail
+from farmportal.api.mvt import (
+    DEFAULT_EXTENT,
+    GEOM_POINT,
+    GEOM_POLYGON,
+    Layer,
+    TileProjection,
+    encode_tile,
+    project_ring,
+    tile_bounds,
+)
+
+PLOT_TILE_LAYER = "plots"
+MVT_MIMETYPE = "application/vnd.mapbox-vector-tile"
+POLYGON_MIN_ZOOM = 10
+MAX_TILE_ZOOM = 22
+MAX_TILE_FEATURES = 20000
+# Features within this many tile pixels of the edge are included so borders render seamlessly.
+TILE_BUFFER_PX = 64
+TILE_CACHE_TTL_SEC = 24 * 60 * 60
+TILE_VERSION_CACHE_KEY = "plot_mvt_version"
+TILE_CUSTOMER_CONTEXT_CACHE_KEY = "plot_mvt_customer"
+TILE_BROWSER_MAX_AGE_SEC = 60
+
+
+def _version_key(scope=None, party=None):
+    key = TILE_VERSION_CACHE_KEY if not scope else f"{TILE_VERSION_CACHE_KEY}::{scope}::{party}"
+    return frappe.cache().make_key(key)
+
+
+def invalidate_plot_tiles(suppliers=None, customers=None):
+    """
+    Make cached plot tiles stale. `suppliers` whose plots changed also invalidate the
+    customers they have requests with; `customers` covers share and risk-state changes.
+    Without either, every tile is invalidated.
+    """
+    try:
+        cache = frappe.cache()
+        if suppliers is None and customers is None:
+            cache.incr(_version_key())
+            return
+
+        suppliers = {supplier for supplier in suppliers or [] if supplier}
+        customers = {customer for customer in customers or [] if customer}
+        if suppliers:
+            customers.update(frappe.db.sql_list(
+                "SELECT DISTINCT customer FROM `tabRequest` WHERE supplier IN %(suppliers)s",
+                {"suppliers": tuple(suppliers)},
+            ))
+        for supplier in suppliers:
+            cache.incr(_version_key("supplier", supplier))
+        for customer in customers:
+            cache.incr(_version_key("customer", customer))
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Plot tile invalidation failed")
+
+
+def _tiles_version(scope, party):
+    try:
+        cache = frappe.cache()
+        return "{}.{}".format(
+            int(cache.get(_version_key()) or 0),
+            int(cache.get(_version_key(scope, party)) or 0),
+        )
+    except Exception:
+        return "0.0"
+
+
+def _buffered_bounds(z, x, y):
+    west, south, east, north = tile_bounds(z, x, y)
+    pad = TILE_BUFFER_PX / DEFAULT_EXTENT
+    pad_lng = (east - west) * pad
+    pad_lat = (north - south) * pad
+    return (
+        max(west - pad_lng, -180.0),
+        max(south - pad_lat, -85.0511287798),
+        min(east + pad_lng, 180.0),
+        min(north + pad_lat, 85.0511287798),
+    )
+
+
+def _customer_analyzed_plot_names(customer):
+    from farmportal.api.requests import (
+        _cache_get_json,
+        _load_persistent_analyzed_plot_names,
+        _risk_cache_keys,
+    )
+
+    cached = _cache_get_json(_risk_cache_keys(customer)["analyzed"], []) or []
+    return {str(name).strip() for name in cached if name} | _load_persistent_analyzed_plot_names(customer)
+
+
+def _customer_plot_context(customer):
+    """
+    {"shared": {supplier: frozenset(names)}, "analyzed": frozenset(names)} for a customer,
+    cached under the customer's tile version so sharing or risk changes rebuild it.
+    """
+    from farmportal.api.requests import _collect_customer_shared_plots_by_supplier
+
+    cache_key = f"{TILE_CUSTOMER_CONTEXT_CACHE_KEY}::{_tiles_version('customer', customer)}::{customer}"
+    context = frappe.cache().get_value(cache_key)
+    if context is None:
+        context = {
+            "shared": _collect_customer_shared_plots_by_supplier(customer),
+            "analyzed": sorted(_customer_analyzed_plot_names(customer)),
+        }
+        frappe.cache().set_value(cache_key, context, expires_in_sec=TILE_CACHE_TTL_SEC)
+    return {
+        "shared": {supplier: frozenset(names) for supplier, names in context["shared"].items()},
+        "analyzed": frozenset(context["analyzed"]),
+    }
+
+
+def _risk_level(plot, analyzed_names=None):
+    # Same rule as the risk dashboard.
+    if analyzed_names is not None and plot.name not in analyzed_names:
+        return "not_analyzed"
+    if plot.custom_risk_mitigated:
+        return "low"
+    return "high" if (plot.deforestation_percentage or 0) > 0 else "low"
+
+
+def _build_tile(z, x, y, plot_scope):
+    from farmportal.api.landplots import _query_plots_in_bbox
+
+    detail = resolve_detail(zoom=z)
+    columns = [
+        "lp.name", "lp.plot_id", "lp.supplier", "lp.area", "lp.deforestation_percentage",
+        "lp.custom_risk_mitigated", "lp.bbox_min_lng", "lp.bbox_min_lat", "lp.bbox_max_lng",
+        "lp.bbox_max_lat",
+    ]
+    if z >= POLYGON_MIN_ZOOM:
+        columns += plot_geometry_columns(detail)
+    analyzed_names = None
+    if plot_scope["scope"] == "customer":
+        context = _customer_plot_context(plot_scope["party"])
+        plot_scope["shared"] = context["shared"]
+        analyzed_names = context["analyzed"]
+    plots, _truncated = _query_plots_in_bbox(
+        _buffered_bounds(z, x, y), plot_scope, columns, MAX_TILE_FEATURES
+    )
+
+    project = TileProjection(z, x, y)
+    layer = Layer(PLOT_TILE_LAYER)
+    for plot in plots:
+        properties = {
+            "name": plot.name,
+            "plot_id": plot.plot_id,
+            "supplier": plot.supplier,
+            "area": float(plot.area or 0),
+            "risk_level": _risk_level(plot, analyzed_names),
+            "deforestation_percentage": float(plot.deforestation_percentage or 0),
+            "mitigated": bool(plot.custom_risk_mitigated),
+        }
+        coordinates = plot_coordinates(plot, detail) if z >= POLYGON_MIN_ZOOM else None
+        ring = project_ring(coordinates, project) if coordinates and len(coordinates) >= 4 else None
+        if ring:
+            layer.add_feature(GEOM_POLYGON, ring, properties)
+        else:
+            # Low zooms, point plots and polygons smaller than a tile pixel render as points.
+            center = project(
+                (plot.bbox_min_lng + plot.bbox_max_lng) / 2.0,
+                (plot.bbox_min_lat + plot.bbox_max_lat) / 2.0,
+            )
+            layer.add_feature(GEOM_POINT, [center], properties)
+    return encode_tile([layer])
+
+
+@frappe.whitelist(methods=["GET"])
+def get_plot_tile(z, x, y, scope=None):
+    """MVT tile z/x/y of the plots visible to the user (`scope` as in get_plots_in_bbox)."""
+    from farmportal.api.landplots import _resolve_plot_scope
+
+    try:
+        z, x, y = int(z), int(x), int(y)
+    except (TypeError, ValueError):
+        frappe.throw(_("Invalid tile coordinates"))
+    if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        frappe.throw(_("Invalid tile coordinates"))
+
+    # Resolves the party only; shared plots are looked up when a tile is built.
+    plot_scope = _resolve_plot_scope(scope)
+    version = _tiles_version(plot_scope["scope"], plot_scope["party"])
+    cache_key = f"plot_mvt::{version}::{plot_scope['scope']}::{plot_scope['party']}::{z}/{x}/{y}"
+    data = frappe.cache().get_value(cache_key)
+    if data is None:
+        data = _build_tile(z, x, y, plot_scope)
+        frappe.cache().set_value(cache_key, data, expires_in_sec=TILE_CACHE_TTL_SEC)
+
+    response = Response(data, mimetype=MVT_MIMETYPE)
+    response.headers["Cache-Control"] = f"private, max-age={TILE_BROWSER_MAX_AGE_SEC}"
+    return response
@@ -5,6 +5,9 @@ import frappe
 from frappe import _
 from frappe.utils import now_datetime, get_datetime
 from urllib.parse import urlparse
+from farmportal.api.geometry import apply_plot_detail, plot_geometry_columns, resolve_detail
+from farmportal.api.plot_overlaps import get_overlaps_for_plots
+from farmportal.api.plot_tiles import invalidate_plot_tiles
 from farmportal.api.organization_profile import (
     _get_customer_permission_context,
     _get_supplier_permission_context,
@@ -14,7 +17,11 @@ from farmportal.api.organization_profile import (
 )
 
 DT = "Request"
+# Keys customers' risk-analysis state (analyzed plots, progress); stats have their own version.
 RISK_ANALYSIS_CACHE_VERSION = "hansen_sentinel_area_v2"
+# Plots per batched analysis call; progress and DB writes happen after each batch.
+# A batch spans several reduceRegions chunks so the EE executor can run them concurrently.
+RISK_ANALYSIS_BATCH_SIZE = 1000
 
 # NEW: preferred user link fields per doctype (ordered by priority)
 USER_LINK_FIELDS = {
@@ -140,6 +147,26 @@ def _cache_get_json(key: str, default):
     except Exception:
         return default
 
+def _parse_json_dict(value):
+    if isinstance(value, dict):
+        return value
+    try:
+        parsed = json.loads(value or "")
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+def _plot_loss_evidence(plot):
+    """Per-source loss areas and timeline of a plot; None when its analysis predates them."""
+    loss_by_year = _parse_json_dict(plot.get("loss_by_year"))
+    if loss_by_year is None:
+        return {"hansen_loss_area": None, "sentinel_loss_area": None, "loss_by_year": None}
+    return {
+        "hansen_loss_area": plot.get("hansen_loss_area"),
+        "sentinel_loss_area": plot.get("sentinel_loss_area"),
+        "loss_by_year": loss_by_year,
+    }
+
 def _cache_set_json(key: str, value):
     frappe.cache().set_value(key, json.dumps(value))
 
@@ -393,8 +420,8 @@ def _collect_pending_risk_plot_names(customer: str, analyzed_plot_names: set[str
     return pending
 
 
-def _collect_customer_shared_plot_names(customer: str) -> list[str]:
-    """Collect unique plot docnames shared with a customer across requests."""
+def _collect_customer_shared_plots_by_supplier(customer: str) -> dict[str, list[str]]:
+    """Plot docnames shared with a customer across requests, grouped by owning supplier."""
     query = """
         SELECT r.name, r.supplier, r.shared_plots_json, r.purchase_order_data
         FROM `tabRequest` r
@@ -406,7 +433,7 @@ def _collect_customer_shared_plot_names(customer: str) -> list[str]:
     """
     requests_with_plots = frappe.db.sql(query, (customer,), as_dict=True)
 
-    matched_names = set()
+    matched_names = {}
     for req in requests_with_plots:
         refs = _parse_request_plot_ids(req)
         if not refs:
@@ -415,11 +442,32 @@ def _collect_customer_shared_plot_names(customer: str) -> list[str]:
         if not supplier_name:
             continue
         resolved = _resolve_supplier_plot_names(supplier_name, refs)
-        matched_names.update(resolved)
+        matched_names.setdefault(supplier_name, set()).update(
+            str(name).strip() for name in resolved if str(name).strip()
+        )
+
+    return {supplier: sorted(names) for supplier, names in matched_names.items() if names}
+
+def _collect_customer_shared_plot_names(customer: str) -> list[str]:
+    """Collect unique plot docnames shared with a customer across requests."""
+    names = set()
+    for supplier_names in _collect_customer_shared_plots_by_supplier(customer).values():
+        names.update(supplier_names)
+    return sorted(names)
+
+def _get_plots_at_detail(conditions, values, fields, detail, order_by=None, limit=None):
+    """
+    Land Plot rows for `fields` (plain columns, "col as alias" allowed) plus only the
+    geometry `detail` needs, read through plot_geometry_columns. Feed to apply_plot_detail.
+    """
+    columns = [f"lp.{field}" for field in fields] + plot_geometry_columns(detail)
+    query = f"SELECT {', '.join(columns)} FROM `tabLand Plot` lp WHERE {' AND '.join(conditions)}"
+    if order_by:
+        query += f" ORDER BY lp.{order_by}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return frappe.db.sql(query, values, as_dict=True)
 
-    names = [str(name).strip() for name in matched_names if str(name).strip()]
-    names.sort()
-    return names
 
 def _as_list(val):
     if not val:
@@ -1117,8 +1165,11 @@ def get_dashboard_stats():
 #         frappe.log_error(frappe.get_traceback(), "get_supplier_land_plots error")
 #         return {"plots": []}
 @frappe.whitelist()
-def get_supplier_land_plots():
-    """Get land plots for the current supplier user to share with requests"""
+def get_supplier_land_plots(detail=None, zoom=None):
+    """
+    Get land plots for the current supplier user to share with requests.
+    Coordinates are simplified to `detail` (low/medium/high) or to suit a map `zoom`.
+    """
     user = frappe.session.user
     if user == "Guest":
         frappe.throw(_("Not logged in"), frappe.PermissionError)
@@ -1138,7 +1189,6 @@ def get_supplier_land_plots():
             "name as id",
             "country",
             "area",
-            "coordinates",
             "commodities",  # This field exists
             "deforestation_percentage",
             "deforested_area"
@@ -1148,16 +1198,20 @@ def get_supplier_land_plots():
         if name_field:
             fields.insert(2 if has_plot_id else 1, f"{name_field} as plot_name")
 
-        plots = frappe.get_all(
-            "Land Plot",
-            filters={"supplier": supplier, "docstatus": ["!=", 2]},
-            fields=fields,
+        plot_detail = resolve_detail(detail, zoom)
+        plots = _get_plots_at_detail(
+            ["lp.supplier = %(supplier)s", "lp.docstatus != 2"],
+            {"supplier": supplier},
+            fields,
+            plot_detail,
             order_by="creation desc",
-            limit_page_length=500
+            limit=500,
         )
 
         print(f"📍 Found {len(plots)} plots for supplier {supplier}")
 
+        apply_plot_detail(plots, plot_detail, as_json=True)
+
         # Process the plots data
         for plot in plots:
             # Handle commodities that might be stored as JSON strings
@@ -1518,8 +1572,11 @@ def respond_to_request(request_id, action=None, message=None, shared_plots=None,
 # Add to your requests.py file
 
 @frappe.whitelist()
-def get_risk_dashboard_data():
-    """Get risk analysis data for customer dashboard"""
+def get_risk_dashboard_data(detail=None, zoom=None):
+    """
+    Get risk analysis data for customer dashboard.
+    Plot coordinates are simplified to `detail` (low/medium/high) or to suit a map `zoom`.
+    """
     user = frappe.session.user
     if user == "Guest":
         frappe.throw(_("Not logged in"), frappe.PermissionError)
@@ -1528,6 +1585,7 @@ def get_risk_dashboard_data():
         customer, supplier = _get_party_from_user(user)
         if not customer:
             return {"suppliers": [], "summary": {}}
+        plot_detail = resolve_detail(detail, zoom)
 
         # Risk analysis state: combine fast cache + persistent DB-backed state.
         keys = _risk_cache_keys(customer)
@@ -1630,7 +1688,7 @@ def get_risk_dashboard_data():
                     plot_fields = [
                         "name", "country", "area",
                         "deforestation_percentage", "deforested_area", 
-                        "commodities", "coordinates"
+                        "commodities", "computed_area_ha", "area_mismatch"
                     ]
                     if has_plot_id:
                         plot_fields.insert(1, "plot_id")
@@ -1640,6 +1698,10 @@ def get_risk_dashboard_data():
                         plot_fields.append("plot_name")
                     if plot_meta.has_field("custom_risk_mitigated"):
                         plot_fields.append("custom_risk_mitigated")
+                    # Per-source loss evidence (Hansen vs Sentinel-2) and the loss timeline
+                    for evidence_field in ("hansen_loss_area", "sentinel_loss_area", "loss_by_year"):
+                        if plot_meta.has_field(evidence_field):
+                            plot_fields.append(evidence_field)
                     if plot_meta.has_field("custom_risk_mitigation_note"):
                         plot_fields.append("custom_risk_mitigation_note")
                     if plot_meta.has_field("custom_risk_mitigation_on"):
@@ -1671,15 +1733,20 @@ def get_risk_dashboard_data():
                     if mitigation_attachment_name_field:
                         plot_fields.append(mitigation_attachment_name_field)
 
-                    plots = frappe.get_all("Land Plot", 
-                        filters={"name": ["in", plot_ids]},
-                        fields=plot_fields
+                    plots = _get_plots_at_detail(
+                        ["lp.name IN %(plot_ids)s"],
+                        {"plot_ids": tuple(plot_ids)},
+                        plot_fields,
+                        plot_detail,
                     )
                     if not plots and has_plot_id:
-                        plots = frappe.get_all("Land Plot", 
-                            filters={"supplier": request.supplier, "plot_id": ["in", plot_ids]},
-                            fields=plot_fields
+                        plots = _get_plots_at_detail(
+                            ["lp.supplier = %(supplier)s", "lp.plot_id IN %(plot_ids)s"],
+                            {"supplier": request.supplier, "plot_ids": tuple(plot_ids)},
+                            plot_fields,
+                            plot_detail,
                         )
+                    apply_plot_detail(plots, plot_detail, as_json=True)
 
                     plot_names_for_files = [
                         str(p.get("name") or "").strip()
@@ -1759,8 +1826,11 @@ def get_risk_dashboard_data():
                                     "plot_id": plot.get("plot_id"),
                                     "country": plot.get("country"),
                                     "area": plot.get("area", 0),
+                                    "computed_area_ha": plot.get("computed_area_ha") or None,
+                                    "area_mismatch": bool(plot.get("area_mismatch")),
                                     "deforestation_percentage": plot.get("deforestation_percentage", 0),
                                     "deforested_area": plot.get("deforested_area", 0),
+                                    **_plot_loss_evidence(plot),
                                     "commodities": plot.get("commodities"),
                                     "coordinates": plot.get("coordinates"),
                                     "last_shared_date": request.creation,
@@ -1774,8 +1844,11 @@ def get_risk_dashboard_data():
                                 "plot_name": plot_label,
                                 "country": plot.get("country"),
                                 "area": plot.get("area", 0),
+                                "computed_area_ha": plot.get("computed_area_ha") or None,
+                                "area_mismatch": bool(plot.get("area_mismatch")),
                                 "deforestation_percentage": plot.get("deforestation_percentage", 0),
                                 "deforested_area": plot.get("deforested_area", 0),
+                                **_plot_loss_evidence(plot),
                                 "commodities": plot.get("commodities"),
                                 "coordinates": plot.get("coordinates"),
                                 "risk_level": risk_level,
@@ -1816,6 +1889,11 @@ def get_risk_dashboard_data():
             
             # Reset counters
             data["total_area"] = sum([(plot.get("area") or 0) for plot in unique_plots_list])
+            # Geometry-derived total; point plots without a polygon count their declared area.
+            data["total_computed_area"] = sum([
+                (plot.get("computed_area_ha") or plot.get("area") or 0) for plot in unique_plots_list
+            ])
+            data["area_mismatch_plots"] = len([plot for plot in unique_plots_list if plot.get("area_mismatch")])
             data["total_deforestation"] = 0
             data["high_risk_plots"] = 0
             data["medium_risk_plots"] = 0
@@ -1839,6 +1917,9 @@ def get_risk_dashboard_data():
                     plot["risk_level"] = "not_analyzed"
                     plot["deforestation_percentage"] = None
                     plot["deforested_area"] = None
+                    plot["hansen_loss_area"] = None
+                    plot["sentinel_loss_area"] = None
+                    plot["loss_by_year"] = None
                     data["pending_plots"] += 1
                     continue
 
@@ -1887,6 +1968,20 @@ def get_risk_dashboard_data():
             # Remove the dict version, keep only the list for frontend
             del data["unique_plots"]
 
+        # Overlap/duplicate claims on shared plots (see plot_overlaps.detect_plot_overlaps).
+        dashboard_plot_names = [
+            plot["name"] for data in suppliers_data.values() for plot in data["shared_plots"]
+        ]
+        plot_overlaps = get_overlaps_for_plots(dashboard_plot_names)
+        for data in suppliers_data.values():
+            for plot in data["shared_plots"]:
+                plot["overlaps"] = plot_overlaps.get(plot["name"], [])
+            data["overlapping_plots"] = len([plot for plot in data["shared_plots"] if plot["overlaps"]])
+            data["cross_supplier_overlaps"] = len([
+                plot for plot in data["shared_plots"]
+                if any(item["cross_supplier"] for item in plot["overlaps"])
+            ])
+
         # Keep analyzed cache in sync with persisted plot data across restarts.
         _cache_set_json(keys["analyzed"], sorted(analyzed_plot_names))
         # Convert to list
@@ -1902,6 +1997,10 @@ def get_risk_dashboard_data():
             "total_plots": sum([s.get("total_unique_plots", 0) for s in suppliers_list]),
             "total_sharing_instances": sum([s.get("total_sharing_instances", 0) for s in suppliers_list]),
             "total_area": sum([s["total_area"] for s in suppliers_list]),
+            "total_computed_area": sum([s["total_computed_area"] for s in suppliers_list]),
+            "area_mismatch_plots": sum([s["area_mismatch_plots"] for s in suppliers_list]),
+            "overlapping_plots": sum([s["overlapping_plots"] for s in suppliers_list]),
+            "cross_supplier_overlaps": sum([s["cross_supplier_overlaps"] for s in suppliers_list]),
             "total_deforestation": sum([s["total_deforestation"] for s in suppliers_list]),
             "avg_compliance": sum([s["compliance_score"] for s in suppliers_list]) / len(suppliers_list) if suppliers_list else 0
         }
@@ -1927,7 +2026,15 @@ def _run_risk_analysis_job(customer: str, pending_names: list[str] | None = None
     _cache_set_json(keys["progress"], progress)
 
     try:
-        from farmportal.api.landplots import calculate_deforestation_data, init_earth_engine
+        from farmportal.api.deforestation_backend import ANALYSIS_MODE_EXACT
+        from farmportal.api.geometry import plot_coordinates
+        from farmportal.api.landplots import (
+            _deforestation_plot_fields,
+            calculate_deforestation_batch,
+            enqueue_deforested_polygon_extraction,
+            init_earth_engine,
+            warm_up_earth_engine,
+        )
     except Exception:
         frappe.log_error(frappe.get_traceback(), "trigger_risk_analysis import error")
         progress.update({
@@ -1939,6 +2046,7 @@ def _run_risk_analysis_job(customer: str, pending_names: list[str] | None = None
         return
 
     try:
+        warm_up_earth_engine()
         analyzed_raw = _cache_get_json(keys["analyzed"], []) or []
         cached_analyzed_plot_names = {str(p).strip() for p in analyzed_raw if p}
         persistent_analyzed_plot_names = _load_persistent_analyzed_plot_names(customer)
@@ -1963,8 +2071,9 @@ def _run_risk_analysis_job(customer: str, pending_names: list[str] | None = None
         plots = frappe.get_all(
             "Land Plot",
             filters={"name": ["in", list(pending_names)]},
-            fields=["name", "plot_id", "coordinates", "area"],
+            fields=["name", "plot_id", "supplier", "coordinates", "geometry_hash", "geometry_blob", "area"],
         )
+        plot_suppliers = {plot.get("name"): plot.get("supplier") for plot in plots}
 
         total = len(plots)
         updated = 0
@@ -1986,49 +2095,63 @@ def _run_risk_analysis_job(customer: str, pending_names: list[str] | None = None
 
         init_earth_engine()
 
-        for idx, plot in enumerate(plots, start=1):
-            coords = plot.get("coordinates")
-            if isinstance(coords, str):
-                try:
-                    coords = json.loads(coords)
-                except Exception:
-                    coords = None
-
-            if not coords or not isinstance(coords, list):
+        analyzable = []
+        for plot in plots:
+            coords = plot_coordinates(plot)
+            if not coords:
                 skipped += 1
             else:
+                analyzable.append({"name": plot.get("name"), "coordinates": coords, "area": plot.get("area")})
+
+        processed = skipped
+        for offset in range(0, len(analyzable), RISK_ANALYSIS_BATCH_SIZE):
+            batch = analyzable[offset:offset + RISK_ANALYSIS_BATCH_SIZE]
+            try:
+                batch_stats = calculate_deforestation_batch(batch, ensure_init=False, mode=ANALYSIS_MODE_EXACT)
+            except Exception as e:
+                batch_stats = [None] * len(batch)
+                if len(failed_plots) < 20:
+                    failed_plots.append({"plot": batch[0].get("name"), "reason": str(e)})
+
+            batch_updated = []
+            for plot, stats in zip(batch, batch_stats):
+                if not stats:
+                    failed += 1
+                    if len(failed_plots) < 20:
+                        failed_plots.append({"plot": plot.get("name"), "reason": "No stats returned"})
+                    continue
                 try:
-                    stats = calculate_deforestation_data(
-                        coords,
-                        area_ha=plot.get("area"),
-                        ensure_init=False,
+                    frappe.db.set_value(
+                        "Land Plot",
+                        plot.get("name"),
+                        _deforestation_plot_fields(stats, plot.get("coordinates"), plot.get("area")),
+                        update_modified=False,
                     )
-                    if not stats:
-                        failed += 1
-                        if len(failed_plots) < 20:
-                            failed_plots.append({"plot": plot.get("name"), "reason": "No stats returned"})
-                    else:
-                        frappe.db.set_value(
-                            "Land Plot",
-                            plot.get("name"),
-                            {
-                                "deforestation_percentage": stats.get("deforestation_percent", 0),
-                                "deforested_area": stats.get("loss_area_ha", 0),
-                            },
-                            update_modified=False,
-                        )
-                        updated += 1
-                        analyzed_plot_names.add(str(plot.get("name")).strip())
+                    updated += 1
+                    batch_updated.append(plot.get("name"))
+                    analyzed_plot_names.add(str(plot.get("name")).strip())
                 except Exception as e:
                     failed += 1
                     if len(failed_plots) < 20:
                         failed_plots.append({"plot": plot.get("name"), "reason": str(e)})
 
-            # Update progress frequently for frontend polling.
+            processed += len(batch)
+
+            try:
+                enqueue_deforested_polygon_extraction(batch_updated)
+            except Exception:
+                frappe.log_error(frappe.get_traceback(), "Deforested polygon enqueue failed")
+            # Stats and analyzed state feed the plot tiles' risk attributes.
+            invalidate_plot_tiles(
+                suppliers={plot_suppliers.get(name) for name in batch_updated},
+                customers=[customer],
+            )
+
+            # Update progress after each batch for frontend polling.
             progress.update({
                 "status": "running",
                 "total": total,
-                "processed": idx,
+                "processed": processed,
                 "updated": updated,
                 "skipped": skipped,
                 "failed": failed,
@@ -2041,6 +2164,7 @@ def _run_risk_analysis_job(customer: str, pending_names: list[str] | None = None
         frappe.cache().set_value(keys["analysis"], now_datetime().isoformat())
         _cache_set_json(keys["analyzed"], sorted(analyzed_plot_names))
         _save_persistent_analyzed_plot_names(customer, analyzed_plot_names)
+        invalidate_plot_tiles(customers=[customer])
 
         progress.update({
             "status": "completed",
@@ -2133,6 +2257,7 @@ def trigger_risk_analysis():
         _cache_set_json(keys["analyzed"], [])
         _save_persistent_analyzed_plot_names(customer, set())
         analyzed_plot_names = set()
+        invalidate_plot_tiles(customers=[customer])
     else:
         analyzed_raw = _cache_get_json(keys["analyzed"], []) or []
         cached_analyzed_plot_names = {str(p).strip() for p in analyzed_raw if p}
@@ -2867,8 +2992,11 @@ def get_purchase_order_response(request_id):
         frappe.throw(_("Failed to retrieve purchase order data"))
 
 @frappe.whitelist()
-def get_customer_purchase_order_plots(request_id):
-    """Get purchase order plots that customers are allowed to view"""
+def get_customer_purchase_order_plots(request_id, detail=None, zoom=None):
+    """
+    Get purchase order plots that customers are allowed to view.
+    Coordinates are simplified to `detail` (low/medium/high) or to suit a map `zoom`.
+    """
     user = frappe.session.user
     if user == "Guest":
         frappe.throw(_("Not logged in"), frappe.PermissionError)
@@ -2923,7 +3051,6 @@ def get_customer_purchase_order_plots(request_id):
             "name as id",
             "country",
             "area",
-            "coordinates",
             "commodities",
             "deforestation_percentage",
             "deforested_area"
@@ -2933,15 +3060,16 @@ def get_customer_purchase_order_plots(request_id):
         if name_field:
             fields.insert(2 if has_plot_id else 1, f"{name_field} as plot_name")
 
-        plots = frappe.get_all(
-            "Land Plot",
-            filters={
-                "supplier": request_doc.supplier,
-                "name": ["in", valid_plot_names],
-            },
-            fields=fields
+        plot_detail = resolve_detail(detail, zoom)
+        plots = _get_plots_at_detail(
+            ["lp.supplier = %(supplier)s", "lp.name IN %(names)s"],
+            {"supplier": request_doc.supplier, "names": tuple(valid_plot_names)},
+            fields,
+            plot_detail,
         )
 
+        apply_plot_detail(plots, plot_detail, as_json=True)
+
         # Process commodities
         for plot in plots:
             if plot.get("commodities") and isinstance(plot["commodities"], str):
@@ -0,0 +1,162 @@
+"""
+Redis-backed cache for expensive values shared by every worker (e.g. EE map IDs).
+
+Entries carry their generation time. Stale-but-valid entries are served while a
+single background job refreshes them, and when nothing is cached only one
+worker computes the value while concurrent requests wait for its result.
+"""
+
+import time
+
+import frappe
+
+LOCK_TTL_SEC = 120
+WAIT_TIMEOUT_SEC = 60
+WAIT_POLL_SEC = 0.25
+
+# Compare-and-act on a lock's owner token, atomically on the Redis server.
+_EXTEND_IF_OWNER = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_IF_OWNER = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _redis_key(key: str) -> str:
+    return frappe.cache().make_key(key)
+
+
+def _acquire(key: str, ttl: int = LOCK_TTL_SEC, token: str | None = None) -> bool:
+    """
+    Atomic SET NX lock; expires on its own if the holder dies. Long-running holders
+    pass a unique `token` so _extend/_release only act while they still own the lock.
+    """
+    try:
+        return bool(frappe.cache().set(_redis_key(key), token or 1, nx=True, ex=ttl))
+    except Exception:
+        # Without Redis there is nothing to coordinate; let the caller compute.
+        return True
+
+
+def _extend(key: str, ttl: int = LOCK_TTL_SEC, token: str | None = None) -> bool:
+    """Push back the expiry of a lock this worker holds (heartbeat); False once it was lost."""
+    try:
+        if token:
+            return bool(frappe.cache().eval(_EXTEND_IF_OWNER, 1, _redis_key(key), token, ttl))
+        frappe.cache().set(_redis_key(key), 1, ex=ttl)
+    except Exception:
+        pass
+    return True
+
+
+def _release(key: str, token: str | None = None):
+    try:
+        if token:
+            frappe.cache().eval(_RELEASE_IF_OWNER, 1, _redis_key(key), token)
+        else:
+            frappe.cache().delete(_redis_key(key))
+    except Exception:
+        pass
+
+
+def get_entry(key: str):
+    entry = frappe.cache().get_value(key)
+    if isinstance(entry, dict) and "generated_at" in entry:
+        return entry
+    return None
+
+
+def store(key: str, value, ttl: int):
+    frappe.cache().set_value(
+        key,
+        {"generated_at": time.time(), "value": value},
+        expires_in_sec=ttl,
+    )
+
+
+def invalidate(key: str):
+    frappe.cache().delete_value(key)
+
+
+def _refresh_marker_key(key: str) -> str:
+    return f"{key}::refresh_scheduled"
+
+
+def refresh(key: str, compute, ttl: int):
+    """Recompute and store a value unless another worker is already doing it."""
+    lock_key = f"{key}::lock"
+    token = frappe.generate_hash(length=20)
+    try:
+        if not _acquire(lock_key, token=token):
+            return False
+        try:
+            store(key, compute(), ttl)
+            return True
+        finally:
+            _release(lock_key, token=token)
+    finally:
+        # Let the next stale read schedule another refresh.
+        _release(_refresh_marker_key(key))
+
+
+def _schedule_refresh(key: str, method: str, kwargs: dict | None):
+    # One marker per key so a burst of requests enqueues a single refresh job;
+    # refresh() clears it, and its TTL covers a job that never ran.
+    if not _acquire(_refresh_marker_key(key)):
+        return
+    frappe.enqueue(method, queue="short", enqueue_after_commit=False, **(kwargs or {}))
+
+
+def get_or_compute(
+    key: str,
+    compute,
+    ttl: int,
+    refresh_after: int | None = None,
+    refresh_method: str | None = None,
+    refresh_kwargs: dict | None = None,
+):
+    """
+    Return the cached value for `key`, computing it at most once across workers.
+
+    Entries older than `refresh_after` are still served; `refresh_method` (a dotted
+    path calling `refresh`) is enqueued to renew them in the background.
+    """
+    entry = get_entry(key)
+    if entry:
+        age = time.time() - float(entry.get("generated_at") or 0)
+        if refresh_after and refresh_method and age >= refresh_after:
+            try:
+                _schedule_refresh(key, refresh_method, refresh_kwargs)
+            except Exception:
+                frappe.log_error(frappe.get_traceback(), f"Cache refresh scheduling failed: {key}")
+        return entry["value"]
+
+    lock_key = f"{key}::lock"
+    token = frappe.generate_hash(length=20)
+    if _acquire(lock_key, token=token):
+        try:
+            value = compute()
+            store(key, value, ttl)
+            return value
+        finally:
+            _release(lock_key, token=token)
+
+    # Another worker is computing this value; wait for it instead of duplicating the work.
+    deadline = time.time() + WAIT_TIMEOUT_SEC
+    while time.time() < deadline:
+        time.sleep(WAIT_POLL_SEC)
+        entry = get_entry(key)
+        if entry:
+            return entry["value"]
+
+    # The in-flight computation died or timed out; compute locally as a last resort.
+    value = compute()
+    store(key, value, ttl)
+    return value
@@ -1,9 +1,52 @@
 # Copyright (c) 2025, Mirshad and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from farmportal.api.geometry import (
+	AREA_MISMATCH_TOLERANCE,
+	MAX_PLOT_LAT_SPAN_DEG,
+	exceeds_max_plot_span,
+	is_area_mismatch,
+	plot_geometry_fields,
+)
+from farmportal.api.plot_overlaps import delete_plot_overlaps
+from farmportal.api.plot_tiles import invalidate_plot_tiles
+
+
+def get_area_mismatch_tolerance():
+	"""Relative tolerance for declared vs computed area (site config `land_plot_area_tolerance`)."""
+	try:
+		return float(frappe.conf.get("land_plot_area_tolerance") or AREA_MISMATCH_TOLERANCE)
+	except (TypeError, ValueError):
+		return AREA_MISMATCH_TOLERANCE
+
 
 class LandPlot(Document):
-	pass
+	def validate(self):
+		self.set_geometry_fields()
+		self.area_mismatch = int(
+			is_area_mismatch(self.area, self.computed_area_ha, get_area_mismatch_tolerance())
+		)
+
+	def on_update(self):
+		previous = self.get_doc_before_save()
+		invalidate_plot_tiles(suppliers={self.supplier, previous.supplier if previous else None})
+
+	def on_trash(self):
+		delete_plot_overlaps([self.name])
+		invalidate_plot_tiles(suppliers=[self.supplier])
+
+	def set_geometry_fields(self):
+		"""Normalize coordinates and keep the encoded copies, hash and area in step with them."""
+		if not self.coordinates:
+			self.update(plot_geometry_fields(None))
+			return
+		if self.geometry_hash and self.geometry_simplified and not self.has_value_changed("coordinates"):
+			return
+		self.update(plot_geometry_fields(self.coordinates))
+		if exceeds_max_plot_span(self.as_dict()):
+			frappe.throw(
+				frappe._("Plot geometry spans more than {0} degrees of latitude").format(MAX_PLOT_LAT_SPAN_DEG)
+			)
@@ -1,9 +1,71 @@
 # Copyright (c) 2025, Mirshad and Contributors
 # See license.txt
 
-# import frappe
+import re
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from farmportal.api.plot_import import bulk_insert_plots
+
+TEST_SUPPLIER = "_Test Land Plot Supplier"
+TEST_COORDINATES = [[10.0, 5.0], [10.001, 5.0], [10.001, 5.001], [10.0, 5.001], [10.0, 5.0]]
+
+
+def _test_supplier():
+	if not frappe.db.exists("Supplier", TEST_SUPPLIER):
+		frappe.get_doc({"doctype": "Supplier", "supplier_name": TEST_SUPPLIER}).insert(
+			ignore_permissions=True, ignore_mandatory=True
+		)
+	return TEST_SUPPLIER
 
 
 class TestLandPlot(FrappeTestCase):
-	pass
+	def setUp(self):
+		self.supplier = _test_supplier()
+
+	def tearDown(self):
+		for name in frappe.get_all("Land Plot", filters={"supplier": self.supplier}, pluck="name"):
+			frappe.delete_doc("Land Plot", name, force=True, ignore_permissions=True)
+		frappe.db.commit()
+
+	def _insert_plot(self, plot_id):
+		return frappe.get_doc({
+			"doctype": "Land Plot",
+			"plot_id": plot_id,
+			"state_province": "Test",
+			"supplier": self.supplier,
+			"coordinates": frappe.as_json(TEST_COORDINATES),
+		}).insert(ignore_permissions=True)
+
+	def test_bulk_created_names_continue_the_insert_series(self):
+		pattern = re.compile(rf"^PLOT-{now_datetime().year}-(\d{{5}})$")
+		first = self._insert_plot("_T-BULK-1")
+
+		result = bulk_insert_plots(
+			[
+				{"id": "_T-BULK-2", "state_province": "Test", "coordinates": TEST_COORDINATES},
+				{"id": "_T-BULK-3", "state_province": "Test", "coordinates": TEST_COORDINATES},
+			],
+			self.supplier,
+		)
+		self.assertEqual(result["failed_plots"], [])
+		last = self._insert_plot("_T-BULK-4")
+
+		names = [first.name, *(row["name"] for row in result["created_plots"]), last.name]
+		for name in names:
+			self.assertRegex(name, pattern)
+		numbers = [int(pattern.match(name).group(1)) for name in names]
+		self.assertEqual(numbers, list(range(numbers[0], numbers[0] + len(names))))
+
+	def test_bulk_rows_store_numeric_defaults(self):
+		result = bulk_insert_plots(
+			[{"id": "_T-BULK-5", "state_province": "Test", "coordinates": TEST_COORDINATES}],
+			self.supplier,
+		)
+		name = result["created_plots"][0]["name"]
+		values = frappe.db.get_value(
+			"Land Plot", name, ["latitude", "yield_dried_mt", "forest_area", "analysis_scale"], as_dict=True
+		)
+		self.assertEqual(values, {"latitude": 0, "yield_dried_mt": 0, "forest_area": 0, "analysis_scale": 0})
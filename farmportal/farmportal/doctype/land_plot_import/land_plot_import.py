@@ -1,9 +1,10 @@
 # Copyright (c) 2025, Mirshad and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class LandPlotImport(Document):
-	pass
+	def on_trash(self):
+		frappe.db.delete("Land Plot Import Error", {"plot_import": self.name})
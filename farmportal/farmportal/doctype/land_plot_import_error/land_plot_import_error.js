@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Mirshad and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Land Plot Import Error", {
+// 	refresh(frm) {
+
+// 	},
+// });
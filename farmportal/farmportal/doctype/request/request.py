@@ -3,9 +3,24 @@
 
 from frappe.model.document import Document
 
+from farmportal.api.plot_tiles import invalidate_plot_tiles
 from farmportal.notifications import send_request_created_email
 
+# Fields that decide which plots the customer sees on the plot map.
+PLOT_SHARING_FIELDS = ("customer", "supplier", "shared_plots_json", "purchase_order_data")
+
 
 class Request(Document):
     def after_insert(self):
         send_request_created_email(self)
+        if self.shared_plots_json or self.purchase_order_data:
+            invalidate_plot_tiles(customers=[self.customer])
+
+    def on_update(self):
+        previous = self.get_doc_before_save()
+        if previous and any(self.has_value_changed(field) for field in PLOT_SHARING_FIELDS):
+            invalidate_plot_tiles(customers={self.customer, previous.customer})
+
+    def on_trash(self):
+        if self.shared_plots_json or self.purchase_order_data:
+            invalidate_plot_tiles(customers=[self.customer])
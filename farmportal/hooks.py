@@ -45,6 +45,15 @@ doc_events = {
     }
 }
 
+scheduler_events = {
+    "all": [
+        "farmportal.api.plot_import.resume_stalled_plot_imports"
+    ],
+    "hourly_long": [
+        "farmportal.api.plot_overlaps.detect_plot_overlaps"
+    ]
+}
+
 website_redirects = [
     {"source": "/me", "target": "https://traces360.com", "redirect_http_status": 302}
 ]
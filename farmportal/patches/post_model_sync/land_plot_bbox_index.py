@@ -0,0 +1,55 @@
+import frappe
+
+from farmportal.api.geometry import BBOX_FIELDS, plot_geometry_fields
+
+BATCH_SIZE = 500
+INDEX_NAME = "supplier_bbox_index"
+INDEX_COLUMNS = ["supplier", "bbox_min_lat", "bbox_max_lat", "bbox_min_lng", "bbox_max_lng"]
+
+
+def _has_index():
+    index_rows = frappe.db.sql("SHOW INDEX FROM `tabLand Plot`", as_dict=True)
+    return any(str(row.get("Key_name") or "") == INDEX_NAME for row in index_rows)
+
+
+def execute():
+    if not frappe.db.table_exists("Land Plot"):
+        return
+
+    # Float columns default to 0, so an all-zero bbox on a plot with geometry means "not filled yet".
+    last_name = ""
+    while True:
+        rows = frappe.db.sql(
+            """
+            SELECT name, coordinates
+            FROM `tabLand Plot`
+            WHERE name > %s
+              AND geometry_hash IS NOT NULL AND geometry_hash != ''
+              AND bbox_min_lat = 0 AND bbox_max_lat = 0
+              AND bbox_min_lng = 0 AND bbox_max_lng = 0
+            ORDER BY name
+            LIMIT %s
+            """,
+            (last_name, BATCH_SIZE),
+            as_dict=True,
+        )
+        if not rows:
+            break
+
+        for row in rows:
+            fields = plot_geometry_fields(row.coordinates)
+            if fields["coordinates"]:
+                frappe.db.set_value(
+                    "Land Plot",
+                    row.name,
+                    {field: fields[field] for field in BBOX_FIELDS},
+                    update_modified=False,
+                )
+        last_name = rows[-1].name
+        frappe.db.commit()
+
+    # Viewport queries filter by supplier and a bbox_min_lat band; the remaining columns
+    # let the index answer the other bbox comparisons without row lookups.
+    if not _has_index():
+        columns = ", ".join(f"`{column}`" for column in INDEX_COLUMNS)
+        frappe.db.sql(f"ALTER TABLE `tabLand Plot` ADD INDEX `{INDEX_NAME}` ({columns})")
@@ -0,0 +1,46 @@
+import frappe
+
+from farmportal.api.geometry import is_area_mismatch, plot_area_ha, plot_coordinates
+from farmportal.farmportal.doctype.land_plot.land_plot import get_area_mismatch_tolerance
+
+BATCH_SIZE = 500
+
+
+def execute():
+    if not frappe.db.table_exists("Land Plot"):
+        return
+
+    tolerance = get_area_mismatch_tolerance()
+    last_name = ""
+    while True:
+        rows = frappe.db.sql(
+            """
+            SELECT name, area, coordinates, geometry_hash, geometry_blob
+            FROM `tabLand Plot`
+            WHERE name > %s
+              AND geometry_hash IS NOT NULL AND geometry_hash != ''
+              AND computed_area_ha = 0
+            ORDER BY name
+            LIMIT %s
+            """,
+            (last_name, BATCH_SIZE),
+            as_dict=True,
+        )
+        if not rows:
+            break
+
+        for row in rows:
+            computed_area_ha = plot_area_ha(plot_coordinates(row) or [])
+            if not computed_area_ha:
+                continue
+            frappe.db.set_value(
+                "Land Plot",
+                row.name,
+                {
+                    "computed_area_ha": computed_area_ha,
+                    "area_mismatch": int(is_area_mismatch(row.area, computed_area_ha, tolerance)),
+                },
+                update_modified=False,
+            )
+        last_name = rows[-1].name
+        frappe.db.commit()
@@ -0,0 +1,36 @@
+import frappe
+
+from farmportal.api.geometry import plot_geometry_fields
+
+BATCH_SIZE = 500
+
+
+def execute():
+    if not frappe.db.table_exists("Land Plot"):
+        return
+
+    # Precompute the list/map simplification levels for existing plots.
+    last_name = ""
+    while True:
+        rows = frappe.db.sql(
+            """
+            SELECT name, coordinates
+            FROM `tabLand Plot`
+            WHERE name > %s
+              AND coordinates IS NOT NULL AND coordinates != ''
+              AND (geometry_simplified IS NULL OR geometry_simplified = '')
+            ORDER BY name
+            LIMIT %s
+            """,
+            (last_name, BATCH_SIZE),
+            as_dict=True,
+        )
+        if not rows:
+            break
+
+        for row in rows:
+            fields = plot_geometry_fields(row.coordinates)
+            if fields["coordinates"]:
+                frappe.db.set_value("Land Plot", row.name, fields, update_modified=False)
+        last_name = rows[-1].name
+        frappe.db.commit()
@@ -0,0 +1,19 @@
+import frappe
+
+INDEX_NAME = "plot_import_row_index"
+INDEX_COLUMNS = ["plot_import", "row"]
+
+
+def _has_index():
+    index_rows = frappe.db.sql("SHOW INDEX FROM `tabLand Plot Import Error`", as_dict=True)
+    return any(str(row.get("Key_name") or "") == INDEX_NAME for row in index_rows)
+
+
+def execute():
+    if not frappe.db.table_exists("Land Plot Import Error"):
+        return
+
+    # get_plot_import_errors pages one import's errors in row order.
+    if not _has_index():
+        columns = ", ".join(f"`{column}`" for column in INDEX_COLUMNS)
+        frappe.db.sql(f"ALTER TABLE `tabLand Plot Import Error` ADD INDEX `{INDEX_NAME}` ({columns})")
@@ -0,0 +1,20 @@
+import frappe
+
+INDEX_NAME = "supplier_modified_index"
+INDEX_COLUMNS = ["supplier", "modified"]
+
+
+def _has_index():
+    index_rows = frappe.db.sql("SHOW INDEX FROM `tabLand Plot`", as_dict=True)
+    return any(str(row.get("Key_name") or "") == INDEX_NAME for row in index_rows)
+
+
+def execute():
+    if not frappe.db.table_exists("Land Plot"):
+        return
+
+    # get_land_plots pages a supplier's plots by (modified, name) descending; InnoDB
+    # appends the primary key to secondary indexes, so this covers the keyset order.
+    if not _has_index():
+        columns = ", ".join(f"`{column}`" for column in INDEX_COLUMNS)
+        frappe.db.sql(f"ALTER TABLE `tabLand Plot` ADD INDEX `{INDEX_NAME}` ({columns})")